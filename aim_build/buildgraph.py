@@ -0,0 +1,115 @@
+from typing import Dict, List
+
+
+# The builds of a target file indexed by name, with their requirements resolved. This is built once per invocation so
+# that looking up a build or its requirements does not have to scan the builds list.
+class BuildGraph:
+    def __init__(self, builds: List[Dict]):
+        self.builds = builds
+        self.lookup = {build["name"]: build for build in builds}
+        self.requirements = {
+            build["name"]: [self.find(required) for required in build.get("requires", [])] for build in builds
+        }
+        self.order = self._topological_order()
+        self.transitive_requirements = {}
+        self.link_requirements = {}
+
+    def find(self, build_name: str) -> Dict:
+        # Note, this should never fail, as required dependencies are checked by the schema.
+        try:
+            return self.lookup[build_name]
+        except KeyError:
+            raise RuntimeError(f"Failed to find build with name: {build_name}") from None
+
+    def get_requires(self, build_name: str) -> List[Dict]:
+        return self.requirements[build_name]
+
+    def get_transitive_requires(self, build_name: str) -> List[Dict]:
+        # Every build that is required directly or indirectly. A build always comes before the builds it requires,
+        # which is the order the linker needs.
+        if not self.transitive_requirements:
+            self._compute_transitive_requirements()
+        return self.transitive_requirements[build_name]
+
+    def get_link_requires(self, build_name: str) -> List[Dict]:
+        # Like get_transitive_requires but does not look through dynamic libraries. A dynamic library is linked
+        # against its own requirements, so the builds that use it only need to link against the dynamic library.
+        if not self.link_requirements:
+            self._compute_transitive_requirements()
+        return self.link_requirements[build_name]
+
+    def _compute_transitive_requirements(self):
+        # The topological order means the requirements of a build have always been computed before the build itself,
+        # so each build is only visited once.
+        for build in self.order:
+            transitive = []
+            link = []
+            for required in self.requirements[build["name"]]:
+                transitive += [required] + self.transitive_requirements[required["name"]]
+                link.append(required)
+                if required.get("buildRule") != "dynamicLibrary":
+                    link += self.link_requirements[required["name"]]
+
+            self.transitive_requirements[build["name"]] = remove_duplicates(transitive)
+            self.link_requirements[build["name"]] = remove_duplicates(link)
+
+    def topological_order(self) -> List[Dict]:
+        # Dependencies always come before the builds that require them.
+        return self.order
+
+    def _topological_order(self) -> List[Dict]:
+        # Iterative depth first search, as deep dependency chains can exceed Python's recursion limit.
+        visiting = set()
+        visited = set()
+        order = []
+
+        for build in self.builds:
+            if build["name"] in visited:
+                continue
+
+            stack = [(build, iter(self.requirements[build["name"]]))]
+            visiting.add(build["name"])
+
+            while stack:
+                current, requirements = stack[-1]
+                for required in requirements:
+                    required_name = required["name"]
+                    if required_name in visiting:
+                        names = [item["name"] for item, _ in stack]
+                        cycle = names[names.index(required_name):] + [required_name]
+                        raise RuntimeError(f"Circular dependency between builds: {' -> '.join(cycle)}")
+
+                    if required_name not in visited:
+                        visiting.add(required_name)
+                        stack.append((required, iter(self.requirements[required_name])))
+                        break
+                else:
+                    stack.pop()
+                    visiting.remove(current["name"])
+                    visited.add(current["name"])
+                    order.append(current)
+
+        return order
+
+
+def remove_duplicates(builds: List[Dict]) -> List[Dict]:
+    # Keeps the last occurrence of each build, so a build still comes after every build that requires it.
+    seen = set()
+    result = []
+    for build in reversed(builds):
+        if build["name"] not in seen:
+            seen.add(build["name"])
+            result.append(build)
+
+    result.reverse()
+    return result
+
+
+def get_build_graph(target_file: Dict) -> BuildGraph:
+    # The graph is cached on the target file, so every generator function shares the same one.
+    graph = target_file.get("build_graph", None)
+    if graph is None or graph.builds is not target_file["builds"]:
+        graph = BuildGraph(target_file["builds"])
+        target_file["build_graph"] = graph
+
+    return graph
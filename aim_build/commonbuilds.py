@@ -1,10 +1,21 @@
+import fnmatch
 from dataclasses import dataclass
 from enum import Enum, auto
-from pathlib import PurePosixPath, PurePath
+from pathlib import Path, PurePosixPath, PurePath
 from typing import Dict, Tuple, Callable, List
 
+from aim_build.buildgraph import get_build_graph
+from aim_build.fssnapshot import get_snapshot
 from aim_build.typedefs import StringList
-from aim_build.utils import prepend_paths, to_native_path, to_pure_posix_path, relpaths
+from aim_build.utils import (
+    prepend_paths,
+    to_native_path,
+    to_pure_posix_path,
+    relpaths,
+    to_path_root,
+    to_project_relative_path,
+    write_if_changed
+)
 
 
 class BuildTypes(Enum):
@@ -15,6 +26,9 @@ class BuildTypes(Enum):
     libraryReference = auto()
 
 
+BUILDABLE_RULES = ["staticLibrary", "dynamicLibrary", "executable"]
+
+
 @dataclass
 class LibraryInformation:
     name: str
@@ -37,6 +51,32 @@ def find_build(build_name: str, builds: Dict) -> Dict:
     raise RuntimeError(f"Failed to find build with name: {build_name}")
 
 
+def is_glob_pattern(pattern: str) -> bool:
+    return any(char in pattern for char in "*?[")
+
+
+def find_builds(patterns: StringList, builds: List[Dict], all_builds=False) -> List[Dict]:
+    # Patterns are build names or globs of build names. Globs and all_builds only match builds that are actually built,
+    # as headerOnly and libraryReference builds have nothing for ninja to do.
+    buildable = [build for build in builds if build["buildRule"] in BUILDABLE_RULES]
+    if all_builds:
+        return buildable
+
+    found = {}
+    for pattern in patterns:
+        if is_glob_pattern(pattern):
+            matches = [build for build in buildable if fnmatch.fnmatchcase(build["name"], pattern)]
+            if not matches:
+                raise RuntimeError(f"Failed to find any builds matching: {pattern}")
+        else:
+            matches = [find_build(pattern, builds)]
+
+        for build in matches:
+            found.setdefault(build["name"], build)
+
+    return list(found.values())
+
+
 def find_builds_of_type(build_type: str, builds: Dict) -> List[Dict]:
     return [build for build in builds if build["buildRule"] == build_type]
 
@@ -73,6 +113,24 @@ def get_toolchain_and_flags(build: Dict,
     return compiler, archiver, cxx_flags, defines, linker, linker_flags
 
 
+def get_compiler_launcher(build: Dict, target_file: Dict) -> str:
+    # Like compiler, a build's launcher replaces the global launcher. Aim's own object cache is only used when there
+    # isn't another launcher.
+    local_launcher = build.get("compilerLauncher", None)
+    if local_launcher:
+        return local_launcher
+
+    if "compilerLauncher" in target_file:
+        return target_file["compilerLauncher"]
+
+    if target_file.get("objectCache", False):
+        # Imported here, as commands that don't generate, such as "aim run", still import this module.
+        from aim_build import objcache
+        return objcache.get_launcher()
+
+    return ""
+
+
 def get_src_files(build: Dict, target_file: Dict) -> StringList:
     project_dir = get_project_dir(build, target_file)
     paths = build["sourceFiles"]
@@ -83,10 +141,13 @@ def get_src_files(build: Dict, target_file: Dict) -> StringList:
     abs_paths = [path for path in paths if path.is_absolute() is True]
     rel_paths = [path for path in paths if path.is_absolute() is False]
 
+    # The directories were already listed when target.py was validated, so the snapshot doesn't list them again.
+    snapshot = get_snapshot(target_file)
+
     src_paths = []
     for path in abs_paths:
         if path.stem == "*":
-            globbed_files = list(path.parent.glob(path.name))
+            globbed_files = snapshot.glob(path)
             src_paths += globbed_files
         else:
             src_paths.append(path)
@@ -95,7 +156,7 @@ def get_src_files(build: Dict, target_file: Dict) -> StringList:
     for path in rel_paths:
         path = project_dir / path
         if path.stem == "*":
-            globbed_files = list(path.parent.glob(path.name))
+            globbed_files = snapshot.glob(path)
 
             rel_paths = relpaths(globbed_files, build_path)
             src_paths += rel_paths
@@ -107,26 +168,182 @@ def get_src_files(build: Dict, target_file: Dict) -> StringList:
     return [str(file) for file in src_paths]
 
 
+def is_unity_excluded(src_file: PurePosixPath, project_root: PurePosixPath, excludes: StringList) -> bool:
+    # Excludes are globs that match either the file name or the path relative to the project root.
+    relative_path = str(to_project_relative_path(src_file, project_root))
+    for pattern in excludes:
+        if fnmatch.fnmatch(src_file.name, pattern) or fnmatch.fnmatch(relative_path, pattern):
+            return True
+    return False
+
+
+def get_unity_src_files(build: Dict, target_file: Dict, src_files: StringList) -> StringList:
+    # Combines the source files of a build into unity files, that each #include up to unityBatchSize source files, so
+    # common headers are only parsed once per batch. Sources are only batched with sources of the same file type.
+    #
+    # The unity files are written to <build>/unity and are only rewritten when their contents change, so incremental
+    # builds stay incremental.
+    build["unity_batches"] = {}
+    batch_size = build.get("unityBatchSize", None)
+    if not batch_size:
+        return src_files
+
+    build_name = build["name"]
+    project_root = PurePosixPath(target_file["projectRoot"])
+    excludes = build.get("unityExclude", [])
+
+    unity_dir = PurePosixPath(build_name) / "unity"
+    path_to_build_dir = to_path_root(unity_dir)
+
+    excluded = []
+    batches_by_suffix = {}
+    for src_file in src_files:
+        src_file = to_pure_posix_path(src_file)
+        if is_unity_excluded(src_file, project_root, excludes):
+            excluded.append(str(src_file))
+        else:
+            batches_by_suffix.setdefault(src_file.suffix, []).append(src_file)
+
+    abs_unity_dir = Path(build["build_dir"]) / unity_dir
+    abs_unity_dir.mkdir(parents=True, exist_ok=True)
+
+    unity_files = []
+    for suffix, files in batches_by_suffix.items():
+        for number, start in enumerate(range(0, len(files), batch_size)):
+            batch = files[start:start + batch_size]
+            if len(batch) == 1:
+                # There is nothing to gain from a unity file with a single source.
+                excluded.append(str(batch[0]))
+                continue
+
+            lines = ["// Generated by Aim. Do not edit."]
+            lines += [f'#include "{path_to_build_dir / path}"' for path in batch]
+
+            unity_name = f"unity_{suffix.lstrip('.')}_{number}{suffix}"
+            write_if_changed(abs_unity_dir / unity_name, "\n".join(lines) + "\n")
+            unity_files.append(unity_name)
+            build["unity_batches"][str(unity_dir / unity_name)] = [str(path) for path in batch]
+
+    # Remove unity files left over from previous generations, e.g. when the batch size was reduced.
+    for stale_file in abs_unity_dir.glob("unity_*"):
+        if stale_file.name not in unity_files:
+            stale_file.unlink()
+
+    return [str(unity_dir / unity_name) for unity_name in unity_files] + excluded
+
+
+def get_unity_batch(build: Dict, src_file: str) -> StringList:
+    # The sources that a unity file includes, or just the source itself if it isn't a unity file. Tools that read
+    # compile_commands.json need an entry for each of the real sources rather than the generated unity file.
+    return build.get("unity_batches", {}).get(str(to_pure_posix_path(src_file)), [src_file])
+
+
+def get_object_files(build: Dict, src_files: List[PurePath], to_object_files, project_root: PurePath) -> List:
+    # Unity files are generated in <build>/unity, so they are relative to the build directory rather than the project.
+    # Their objects go straight to obj/unity instead of mirroring the project.
+    unity_batches = build.get("unity_batches", {})
+    obj_files = []
+    for src_file in src_files:
+        posix_src_file = to_pure_posix_path(src_file)
+        if str(posix_src_file) in unity_batches:
+            obj_files += to_object_files([PurePosixPath("unity") / posix_src_file.name])
+        else:
+            obj_files += to_object_files([src_file], project_root)
+    return obj_files
+
+
+C_SOURCE_SUFFIXES = [".c"]
+CXX_SOURCE_SUFFIXES = [".cpp", ".cc", ".cxx", ".c++", ".C"]
+
+
+def get_precompiled_header_language(src_files: List[PurePath]) -> Tuple[str, List[str]]:
+    # A precompiled header can only be used by sources of the same language. Builds with any C++ sources precompile the
+    # header as C++, otherwise it is precompiled as C. Other source types, such as assembly, never use it.
+    if any(src_file.suffix in CXX_SOURCE_SUFFIXES for src_file in src_files):
+        return "c++-header", CXX_SOURCE_SUFFIXES
+    return "c-header", C_SOURCE_SUFFIXES
+
+
+def get_precompiled_header_path(build: Dict, target_file: Dict) -> PurePosixPath:
+    # Like include paths, the header is relative to the project root unless it is absolute.
+    header = PurePosixPath(build["precompiledHeader"].replace("\\", "/"))
+    return PurePosixPath(target_file["projectRoot"]) / header
+
+
+def write_precompiled_header_stub(build: Dict, header: PurePath, stub_name: str) -> PurePosixPath:
+    # The header is precompiled through a stub that includes it, so the header is never compiled as the main file.
+    # Note, compilers warn about #pragma once in the main file.
+    stub_file = PurePosixPath(build["name"]) / "pch" / stub_name
+    stub_path = Path(build["build_dir"]) / stub_file
+    stub_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if not header.is_absolute():
+        header = to_path_root(stub_file.parent) / header
+
+    write_if_changed(stub_path, f'#include "{header}"\n')
+    return stub_file
+
+
+def get_precompiled_header_key(variables: Dict, language: str) -> List:
+    # The precompiled header is only valid for compiles that use the same compiler, flags, defines and include paths.
+    # Include paths are relative to the build directory, which all builds share, so they can be compared directly.
+    return [variables["compiler"], language, list(variables["flags"]), list(variables["defines"]),
+            list(variables["includes"])]
+
+
+def find_reusable_precompiled_header(build: Dict, target_file: Dict, header: str, key: List) -> Dict:
+    # A build can use the precompiled header of a library it requires, if the library precompiled the same header with
+    # the same compiler, flags, defines and include paths. Note, builds are generated in dependency order, so the
+    # precompiled headers of requirements are always known by now.
+    graph = get_build_graph(target_file)
+    for the_dep in graph.get_requires(build["name"]):
+        pch_info = the_dep.get("precompiled_header", None)
+        if pch_info and pch_info["header"] == header and pch_info["key"] == key:
+            return pch_info
+
+    return None
+
+
+def check_object_collisions(build_name: str, src_files: StringList, obj_files: StringList, case_sensitive=True):
+    sources = {}
+    for src_file, obj_file in zip(src_files, obj_files):
+        key = obj_file if case_sensitive else obj_file.lower()
+        if key in sources:
+            raise RuntimeError(
+                f'Object file collision in build "{build_name}": '
+                f'"{sources[key]}" and "{src_file}" both compile to "{obj_file}".'
+            )
+        sources[key] = src_file
+
+
+def make_object_directories(build_dir: Path, obj_files: StringList):
+    # Ninja would create these directories itself, but only after checking each output's directory separately. Create
+    # every directory once when the ninja file is generated instead.
+    directories = {PurePosixPath(obj_file.replace("\\", "/")).parent for obj_file in obj_files}
+    for directory in directories:
+        (Path(build_dir) / directory).mkdir(parents=True, exist_ok=True)
+
+
 def get_required_library_information(build: Dict,
                                      parsed_toml: Dict) -> List[LibraryInformation]:
     requires = build.get("requires", [])
     if not requires:
         return []
 
-    build_names = []  # Used to prevent duplicates.
+    build_names = set()  # Used to prevent duplicates.
     result = []
 
     library_types = [BuildTypes.staticLibrary, BuildTypes.dynamicLibrary]
 
-    for required in requires:
-        the_dep = find_build(required, parsed_toml["builds"])
+    graph = get_build_graph(parsed_toml)
+    for the_dep in graph.get_link_requires(build["name"]):
         build_type = BuildTypes[the_dep["buildRule"]]
         if build_type not in library_types:
             continue
 
         build_name = the_dep["name"]
         if build_name not in build_names:
-            build_names.append(build_name)
+            build_names.add(build_name)
 
             # If we are going to dynamically load the library, then we don't want to generate linker flags for it.
             dynamic_loading = the_dep.get("dynamicLoading", False)
@@ -150,18 +367,18 @@ def get_reference_library_information(
     if not requires:
         return [], []
 
-    build_names = []  # Used to prevent duplicates.
+    build_names = set()  # Used to prevent duplicates.
     libraries = []
     library_paths = []
-    for required in requires:
-        the_dep = find_build(required, parsed_toml["builds"])
+    graph = get_build_graph(parsed_toml)
+    for the_dep in graph.get_link_requires(build["name"]):
         build_type = BuildTypes[the_dep["buildRule"]]
         if build_type != BuildTypes.libraryReference:
             continue
 
         build_name = the_dep["name"]
         if build_name not in build_names:
-            build_names.append(build_name)
+            build_names.add(build_name)
             libraries += the_dep.get("libraries", [])
             library_paths += the_dep.get("libraryPaths", [])
 
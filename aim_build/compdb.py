@@ -0,0 +1,92 @@
+import json
+import re
+from pathlib import Path
+from typing import Dict, List
+
+from aim_build.utils import write_if_changed
+
+COMPILE_COMMANDS_FILE_NAME = "compile_commands.json"
+
+NINJA_VARIABLE = re.compile(r"\$(\$|\w+|\{\w+\})")
+
+
+def expand_command(template: str, variables: Dict) -> str:
+    # Expands the variables of a ninja rule command in the same way ninja does, so the compilation database contains
+    # exactly what ninja will execute. Lists are joined with spaces, like ninja_syntax does when writing them.
+    def replace(match):
+        name = match.group(1)
+        if name == "$":
+            return "$"
+
+        value = variables.get(name.strip("{}"), "")
+        if isinstance(value, list):
+            value = " ".join(filter(None, value))
+        return str(value)
+
+    return NINJA_VARIABLE.sub(replace, template)
+
+
+def add_compile_command(build: Dict,
+                        template: str,
+                        variables: Dict,
+                        src_file: str,
+                        obj_file: str,
+                        include_launcher=False):
+    # Compile commands are collected on the build as the compile edges are written, and written to disk after the
+    # ninja file has been generated.
+    variables = dict(variables, **{"in": src_file, "out": obj_file})
+
+    # Most tools expect the compiler to be the first argument, so the compiler launcher is left out by default.
+    if not include_launcher:
+        variables["launcher"] = ""
+
+    entry = {
+        "directory": str(Path(build["build_dir"]).resolve()),
+        "command": expand_command(template, variables).strip(),
+        "file": src_file,
+        "output": obj_file,
+    }
+    build.setdefault("compile_commands", []).append(entry)
+
+
+def to_json(entries: List[Dict]) -> str:
+    return json.dumps(entries, indent=2) + "\n"
+
+
+def remove_stale_fragments(build_dir: Path, fragment_paths: List[Path]) -> bool:
+    # Fragments of builds that were removed, or no longer have any sources, would otherwise be left behind. Returns True
+    # if any fragment was removed.
+    removed = False
+    for path in build_dir.glob(f"*/{COMPILE_COMMANDS_FILE_NAME}"):
+        if path not in fragment_paths:
+            path.unlink()
+            removed = True
+    return removed
+
+
+def write_compile_commands(build_dir: Path, target_dict: Dict):
+    mode = target_dict.get("compileCommands", "merged")
+    if mode == "none":
+        return
+
+    compile_commands_path = build_dir / COMPILE_COMMANDS_FILE_NAME
+    builds = [build for build in target_dict["builds"] if build.get("compile_commands")]
+
+    if mode == "fragments":
+        # Each build has its own fragment, and the merged file is only rebuilt when a fragment was written or removed,
+        # so generating a target with many unchanged builds doesn't rewrite or even compare the merged file.
+        changed = False
+        fragment_paths = []
+        for build in builds:
+            fragment_path = build_dir / build["name"] / COMPILE_COMMANDS_FILE_NAME
+            changed |= write_if_changed(fragment_path, to_json(build["compile_commands"]))
+            fragment_paths.append(fragment_path)
+
+        changed |= remove_stale_fragments(build_dir, fragment_paths)
+        if not changed and compile_commands_path.exists():
+            return
+    else:
+        remove_stale_fragments(build_dir, [])
+
+    entries = [entry for build in builds for entry in build["compile_commands"]]
+    write_if_changed(compile_commands_path, to_json(entries))
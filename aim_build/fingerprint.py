@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from aim_build.fssnapshot import FileSystemSnapshot
+from aim_build.utils import to_native_path, write_if_changed
+from aim_build.version import __version__
+
+FINGERPRINT_FILE_NAME = ".aim_fingerprint.json"
+
+
+def get_glob_directories(target_dict: Dict, project_dir: Path) -> List[Path]:
+    # The parent directory of every sourceFiles glob. If a file is added to or removed from one of these directories
+    # then the result of the glob changes and build.ninja must be regenerated.
+    directories = set()
+    for build in target_dict["builds"]:
+        for path in build.get("sourceFiles", []):
+            path = to_native_path(path)
+            if path.stem != "*":
+                continue
+
+            parent = path.parent
+            if not parent.is_absolute():
+                parent = project_dir / parent
+
+            directories.add(Path(os.path.normpath(str(parent))))
+
+    return sorted(directories)
+
+
+def hash_file(file_path: Path) -> str:
+    return hashlib.sha256(file_path.read_bytes()).hexdigest()
+
+
+def hash_directory_listing(directory: Path, snapshot: Optional[FileSystemSnapshot] = None) -> str:
+    # Note, the listing always comes from a snapshot, so it is the same whether or not the snapshot is shared.
+    if snapshot is None:
+        snapshot = FileSystemSnapshot()
+
+    entries = snapshot.list_directory(directory)
+    if entries is None:
+        return "missing"
+    names = sorted(entries)
+
+    return hashlib.sha256("\n".join(names).encode("utf-8")).hexdigest()
+
+
+def compute_fingerprint(target_file_path: Path,
+                        frontend: str,
+                        directories: List[Path],
+                        snapshot: Optional[FileSystemSnapshot] = None) -> Dict:
+    return {
+        "version": __version__,
+        "target": hash_file(target_file_path),
+        "compilerFrontend": frontend,
+        "directories": {str(directory): hash_directory_listing(directory, snapshot) for directory in directories},
+    }
+
+
+def write_fingerprint(build_dir: Path, fingerprint: Dict):
+    fingerprint_path = build_dir / FINGERPRINT_FILE_NAME
+    write_if_changed(fingerprint_path, json.dumps(fingerprint, indent=2, sort_keys=True))
+
+
+def read_fingerprint(build_dir: Path) -> Dict:
+    fingerprint_path = build_dir / FINGERPRINT_FILE_NAME
+    try:
+        return json.loads(fingerprint_path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def is_up_to_date(build_dir: Path) -> bool:
+    # Note, the compiler frontend is read from target.py, so it can only change if the hash of target.py changes too.
+    # The stored frontend is reused here so we don't have to execute target.py to find out what it is.
+    stored = read_fingerprint(build_dir)
+    if not stored:
+        return False
+
+    if not (build_dir / "build.ninja").exists():
+        return False
+
+    directories = [Path(directory) for directory in stored.get("directories", {})]
+    current = compute_fingerprint(build_dir / "target.py", stored.get("compilerFrontend"), directories)
+    return current == stored
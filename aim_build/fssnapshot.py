@@ -0,0 +1,166 @@
+import fnmatch
+import json
+import os
+import stat
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from aim_build.utils import write_if_changed
+
+SNAPSHOT_FILE_NAME = ".aim_filesystem.json"
+
+# The key that the snapshot is stored under in the target file, so that every generator function shares it.
+SNAPSHOT_KEY = "filesystem_snapshot"
+
+# A directory that changed less than this long before it was listed could change again without its mtime changing, as
+# some file systems only store mtimes to the nearest second or two. Listings of such directories are not persisted.
+RACY_INTERVAL_NS = 2 * 10 ** 9
+
+DIRECTORY = "directory"
+FILE = "file"
+OTHER = "other"
+
+
+class FileSystemSnapshot:
+    # Lists each directory at most once per invocation, using os.scandir, and answers the globs and existence checks of
+    # validation and generation from the listings. Listings can be persisted between runs, in which case a listing is
+    # reused for as long as the mtime of its directory doesn't change.
+    def __init__(self, persisted: Optional[Dict] = None):
+        self.persisted = persisted if persisted else {}
+        self.listings = {}
+        self.kinds = {}
+
+    def list_directory(self, directory: Path) -> Optional[Dict[str, str]]:
+        # Returns the names in the directory and their kinds, or None if it isn't a directory.
+        listing = self.get_listing(os.path.abspath(str(directory)))
+        return listing["entries"] if listing else None
+
+    def get_listing(self, key: str) -> Optional[Dict]:
+        # Note, keys are absolute paths.
+        if key not in self.listings:
+            self.listings[key] = self.read_directory(key)
+        return self.listings[key]
+
+    def read_directory(self, key: str) -> Optional[Dict]:
+        try:
+            mtime = os.stat(key).st_mtime_ns
+        except OSError:
+            return None
+
+        persisted = self.persisted.get(key, None)
+        if persisted and persisted["mtime"] == mtime:
+            return persisted
+
+        scanned = time.time_ns()
+        entries = {}
+        try:
+            with os.scandir(key) as directory_entries:
+                for entry in directory_entries:
+                    kind = get_entry_kind(entry)
+                    if kind:
+                        entries[entry.name] = kind
+        except OSError:
+            return None
+
+        return {"mtime": mtime, "scanned": scanned, "entries": entries}
+
+    def get_directory_mtime(self, directory: Path) -> Optional[int]:
+        listing = self.get_listing(os.path.abspath(str(directory)))
+        return listing["mtime"] if listing else None
+
+    def get_kind(self, path: Path) -> Optional[str]:
+        key = os.path.abspath(str(path))
+        parent, name = os.path.split(key)
+        if name:
+            listing = self.get_listing(parent)
+            if not listing:
+                return None
+
+            kind = listing["entries"].get(name, None)
+            if kind:
+                return kind
+
+            # The listing matches names exactly, but on file systems that ignore case, such as the defaults on Windows
+            # and macOS, the name may still exist with a different case. So a miss is checked with the file system.
+            return self.stat_kind(key)
+
+        # The root of a file system isn't in any listing.
+        return self.stat_kind(key)
+
+    def stat_kind(self, key: str) -> Optional[str]:
+        if key not in self.kinds:
+            try:
+                mode = os.stat(key).st_mode
+            except OSError:
+                mode = None
+
+            if mode is None:
+                self.kinds[key] = None
+            elif stat.S_ISDIR(mode):
+                self.kinds[key] = DIRECTORY
+            elif stat.S_ISREG(mode):
+                self.kinds[key] = FILE
+            else:
+                self.kinds[key] = OTHER
+        return self.kinds[key]
+
+    def exists(self, path: Path) -> bool:
+        return self.get_kind(path) is not None
+
+    def is_dir(self, path: Path) -> bool:
+        return self.get_kind(path) == DIRECTORY
+
+    def is_file(self, path: Path) -> bool:
+        return self.get_kind(path) == FILE
+
+    def glob(self, path: Path) -> List[Path]:
+        # The same as list(path.parent.glob(path.name)) for a pattern without any directories in it. The matches are in
+        # the order that the directory was listed in, just like Path.glob.
+        entries = self.list_directory(path.parent)
+        if not entries:
+            return []
+
+        return [path.parent / name for name in entries if fnmatch.fnmatch(name, path.name)]
+
+    def get_persistable_listings(self) -> Dict[str, Dict]:
+        # Only the directories that were used by this run are kept, so directories that are no longer used drop out.
+        return {
+            key: listing
+            for key, listing in self.listings.items()
+            if listing and listing["scanned"] - listing["mtime"] > RACY_INTERVAL_NS
+        }
+
+
+def get_entry_kind(entry: os.DirEntry) -> Optional[str]:
+    # Symbolic links are followed, like Path.is_dir and Path.is_file. Broken links don't exist.
+    try:
+        if entry.is_dir():
+            return DIRECTORY
+        elif entry.is_file():
+            return FILE
+        elif entry.is_symlink() and not os.path.exists(entry.path):
+            return None
+    except OSError:
+        return None
+    return OTHER
+
+
+def get_snapshot(target_file: Dict) -> FileSystemSnapshot:
+    snapshot = target_file.get(SNAPSHOT_KEY, None)
+    if snapshot is None:
+        snapshot = FileSystemSnapshot()
+        target_file[SNAPSHOT_KEY] = snapshot
+    return snapshot
+
+
+def load_snapshot(build_dir: Path) -> FileSystemSnapshot:
+    try:
+        persisted = json.loads((build_dir / SNAPSHOT_FILE_NAME).read_text())
+    except (OSError, ValueError):
+        persisted = {}
+    return FileSystemSnapshot(persisted)
+
+
+def save_snapshot(build_dir: Path, snapshot: FileSystemSnapshot):
+    write_if_changed(build_dir / SNAPSHOT_FILE_NAME, json.dumps(snapshot.get_persistable_listings()))
@@ -5,6 +5,9 @@ from typing import Dict, Tuple, Callable, List
 from ninja_syntax import Writer
 
 from aim_build import commonbuilds
+from aim_build import compdb
+from aim_build import phases
+from aim_build.buildgraph import get_build_graph
 from aim_build.commonbuilds import BuildTypes
 from aim_build.typedefs import StringList, PurePathList
 from aim_build.utils import (
@@ -25,15 +28,32 @@ PrefixLibrary = functools.partial(prefix, "-l")
 PrefixHashDefine = functools.partial(prefix, "-D")
 ToObjectFiles = src_to_o
 
+# Note, every object file needs its own depfile. Otherwise parallel compiles overwrite each other's depfile before
+# ninja has read it.
+#
+# The compiler launcher, such as ccache, only wraps compiles and never links.
+COMPILE_COMMAND = "$launcher $compiler $defines $flags -MMD -MF $out.d $includes -c $in -o $out"
+PCH_COMMAND = "$launcher $compiler $defines $flags -x $language -MMD -MF $out.d $includes -c $in -o $out"
+
 
 def add_compile(nfw: Writer):
-    command = "$compiler $defines $flags -MMD -MF deps.d $includes -c $in -o $out"
     nfw.rule(
         name="compile",
         description="Compiles source files into object files",
         deps="gcc",
-        depfile="deps.d",
-        command=command,
+        depfile="$out.d",
+        command=COMPILE_COMMAND,
+    )
+    nfw.newline()
+
+
+def add_pch(nfw: Writer):
+    nfw.rule(
+        name="pch",
+        description="Precompiles a header",
+        deps="gcc",
+        depfile="$out.d",
+        command=PCH_COMMAND,
     )
     nfw.newline()
 
@@ -47,16 +67,16 @@ def add_ar(nfw: Writer):
     nfw.newline()
 
 
-def add_exe(nfw: Writer):
+def add_exe(nfw: Writer, pool: str = None):
     # TODO: origin should only really be added when we need to link against an so.
     command = "$compiler $defines $flags $includes $in -o $out $linker_args"
-    nfw.rule(name="exe", description="Builds an executable.", command=command)
+    nfw.rule(name="exe", description="Builds an executable.", command=command, pool=pool)
     nfw.newline()
 
 
-def add_shared(nfw: Writer):
+def add_shared(nfw: Writer, pool: str = None):
     command = "$compiler $defines -shared $visibility -fPIC $flags $includes $in -o $out $linker_args"
-    nfw.rule(name="shared", description="Builds a shared library.", command=command)
+    nfw.rule(name="shared", description="Builds a shared library.", command=command, pool=pool)
     nfw.newline()
 
 
@@ -93,7 +113,8 @@ def convert_strings_to_paths(paths):
 
 
 def get_includes_for_build(build: Dict, parsed_toml: Dict) -> StringList:
-    requires = [build["name"]] + build.get("requires", [])
+    graph = get_build_graph(parsed_toml)
+    requires = [build] + graph.get_transitive_requires(build["name"])
 
     include_paths = set()
     system_include_paths = set()
@@ -101,9 +122,7 @@ def get_includes_for_build(build: Dict, parsed_toml: Dict) -> StringList:
 
     project_root = PurePosixPath(parsed_toml["projectRoot"])
 
-    for required in requires:
-        the_dep = commonbuilds.find_build(required, parsed_toml["builds"])
-
+    for the_dep in requires:
         includes = the_dep.get("includePaths", [])
         includes = convert_strings_to_paths(includes)
         includes = commonbuilds.get_include_paths(includes, project_root)
@@ -183,37 +202,98 @@ def add_compile_rule(
         cxx_flags = extra_flags + cxx_flags
 
     src_files = get_src_for_build(build, target_file)
-    obj_files = ToObjectFiles(src_files)
+    phases.count("source files", len(src_files))
+    src_files = convert_strings_to_paths(commonbuilds.get_unity_src_files(build, target_file, to_str(src_files)))
+    project_root = PurePosixPath(target_file["projectRoot"])
+    obj_files = commonbuilds.get_object_files(build, src_files, ToObjectFiles, project_root)
     obj_files = prepend_paths(Path(build_name), obj_files)
 
+    commonbuilds.check_object_collisions(build_name, to_str(src_files), to_str(obj_files))
+    commonbuilds.make_object_directories(build["build_dir"], to_str(obj_files))
+
     file_pairs = zip(to_str(src_files), to_str(obj_files))
+    variables = {
+        "launcher": commonbuilds.get_compiler_launcher(build, target_file),
+        "compiler": compiler,
+        "includes": includes,
+        "flags": cxx_flags,
+        "defines": defines,
+    }
+
+    include_launcher = target_file.get("compileCommandsLauncher", False)
+    pch_info, pch_suffixes = add_precompiled_header_rule(writer, build, target_file, variables, src_files)
+
     for src_file, obj_file in file_pairs:
+        implicit = []
+        edge_variables = variables
+        compdb_variables = variables
+
+        if pch_info and PurePosixPath(src_file).suffix in pch_suffixes:
+            # The -include finds the .gch next to the stub header. Tools that read compile_commands.json can't use the
+            # .gch, so they are given the actual header instead.
+            implicit = [pch_info["output"]]
+            edge_variables = dict(variables, flags=["-Winvalid-pch", f'-include "{pch_info["include"]}"'] + cxx_flags)
+            compdb_variables = dict(variables, flags=[f'-include "{pch_info["header"]}"'] + cxx_flags)
+
         writer.build(
             outputs=obj_file,
             rule="compile",
             inputs=src_file,
-            variables={
-                "compiler": compiler,
-                "includes": includes,
-                "flags": cxx_flags,
-                "defines": defines,
-            },
+            implicit=implicit,
+            variables=edge_variables,
         )
         writer.newline()
 
+        for compdb_src_file in commonbuilds.get_unity_batch(build, src_file):
+            compdb.add_compile_command(build,
+                                       COMPILE_COMMAND,
+                                       compdb_variables,
+                                       compdb_src_file,
+                                       obj_file,
+                                       include_launcher)
+
     return obj_files
 
 
+def add_precompiled_header_rule(writer: Writer,
+                                build: Dict,
+                                target_file: Dict,
+                                variables: Dict,
+                                src_files: List[PurePosixPath]) -> Tuple[Dict, StringList]:
+    if not build.get("precompiledHeader", None):
+        return None, []
+
+    header_path = commonbuilds.get_precompiled_header_path(build, target_file)
+    header = str(header_path)
+    language, suffixes = commonbuilds.get_precompiled_header_language(src_files)
+
+    key = commonbuilds.get_precompiled_header_key(variables, language)
+    pch_info = commonbuilds.find_reusable_precompiled_header(build, target_file, header, key)
+
+    if pch_info is None:
+        include = str(commonbuilds.write_precompiled_header_stub(build, header_path, header_path.name))
+        output = include + ".gch"
+        writer.build(
+            outputs=output,
+            rule="pch",
+            inputs=include,
+            implicit=[header],
+            variables=dict(variables, language=language),
+        )
+        writer.newline()
+        pch_info = {"header": header, "key": key, "include": include, "output": output}
+
+    build["precompiled_header"] = pch_info
+    return pch_info, suffixes
+
+
 def get_rpath(build: Dict, parsed_toml: Dict) -> str:
     # Good blog post about rpath:
     # https://medium.com/@nehckl0/creating-relocatable-linux-executables-by-setting-rpath-with-origin-45de573a2e98
-    requires = build.get("requires", [])
     library_names = set()
 
-    # find_build_types("dynamicLib", parsed_toml["builds"])
-    # TODO: replace the below with the above.
-    for required in requires:
-        the_dep = commonbuilds.find_build(required, parsed_toml["builds"])
+    graph = get_build_graph(parsed_toml)
+    for the_dep in graph.get_transitive_requires(build["name"]):
         build_type = BuildTypes[the_dep["buildRule"]]
         if build_type == BuildTypes.dynamicLibrary:
             library_names.update([the_dep["name"]])
@@ -290,6 +370,7 @@ def run_build(build: Dict, parsed_toml: Dict, ninja_writer: Writer, args):
     build_path.mkdir(parents=True, exist_ok=True)
 
     build["buildPath"] = build_path
+    build["compile_commands"] = []
 
     if the_build == BuildTypes.staticLibrary:
         build_static_library(
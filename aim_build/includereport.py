@@ -0,0 +1,138 @@
+import posixpath
+import re
+import subprocess
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Set, Tuple
+
+from aim_build import ninjalog
+from aim_build.commonbuilds import C_SOURCE_SUFFIXES, CXX_SOURCE_SUFFIXES
+
+SOURCE_SUFFIXES = C_SOURCE_SUFFIXES + CXX_SOURCE_SUFFIXES
+
+DEPS_HEADER = re.compile(r"^(\S.*): #deps \d+")
+
+INCLUDE_DIRECTIVE = re.compile(r'^\s*#\s*include(?:_next)?\s*([<"])([^>"]+)[>"]', re.MULTILINE)
+
+
+def parse_ninja_deps(output: str) -> Dict[str, List[str]]:
+    # The output of "ninja -t deps" is of the form:
+    #   <output>: #deps 3, deps mtime 123 (VALID)
+    #       ../../src/file.cpp
+    #       ../../include/file.h
+    deps = {}
+    current = None
+    for line in output.splitlines():
+        match = DEPS_HEADER.match(line)
+        if match:
+            current = match.group(1)
+            deps[current] = []
+        elif line.strip() and current:
+            deps[current].append(line.strip())
+
+    return deps
+
+
+def read_ninja_deps(build_dir: Path) -> Dict[str, List[str]]:
+    command = ["ninja", "-C", str(build_dir), "-t", "deps"]
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    except (OSError, subprocess.CalledProcessError) as exception:
+        raise RuntimeError(f"Failed to read ninja's deps log: {exception}")
+
+    return parse_ninja_deps(result.stdout.decode("utf-8", errors="replace"))
+
+
+def get_headers(deps: List[str]) -> List[str]:
+    # Source files are left out, including the files that a unity file includes.
+    return [dep for dep in deps if PurePosixPath(dep).suffix not in SOURCE_SUFFIXES]
+
+
+def read_include_directives(path: Path) -> List[Tuple[bool, str]]:
+    # Returns whether each include is quoted, and the name it includes. Headers that can't be read include nothing.
+    try:
+        text = path.read_text(errors="replace")
+    except OSError:
+        return []
+    return [(quote == '"', name) for quote, name in INCLUDE_DIRECTIVE.findall(text)]
+
+
+def resolve_include(header: str, quoted: bool, name: str, candidates: Set[str], headers_by_name: Dict) -> List[str]:
+    # The deps log has every header a compile read, so an include is resolved to the headers of the deps log that it
+    # could name. Only headers that are included by every output that includes the header are candidates, as a header
+    # it includes must have been read by all of them.
+    if quoted:
+        relative = posixpath.normpath(posixpath.join(posixpath.dirname(header), name))
+        if relative in candidates:
+            return [relative]
+
+    name = posixpath.normpath(name)
+    return [
+        other for other in headers_by_name.get(posixpath.basename(name), [])
+        if other in candidates and (other == name or other.endswith("/" + name))
+    ]
+
+
+def get_include_graph(build_dir: Path, includers: Dict[str, List[str]], header_sets: Dict[str, Set[str]]) -> Dict:
+    # The deps log only has the flattened includes of each output, so the headers that each header includes directly
+    # are found by reading its include directives.
+    headers_by_name = {}
+    for header in includers:
+        headers_by_name.setdefault(posixpath.basename(header), []).append(header)
+
+    graph = {}
+    for header, outputs in includers.items():
+        candidates = set.intersection(*[header_sets[output] for output in outputs])
+        candidates.discard(header)
+
+        includes = set()
+        for quoted, name in read_include_directives(build_dir / header):
+            includes.update(resolve_include(header, quoted, name, candidates, headers_by_name))
+        graph[header] = includes
+
+    return graph
+
+
+def get_transitive_includes(header: str, graph: Dict[str, Set[str]]) -> Set[str]:
+    visited = set()
+    stack = [header]
+    while stack:
+        for included in graph.get(stack.pop(), ()):
+            if included not in visited:
+                visited.add(included)
+                stack.append(included)
+
+    visited.discard(header)
+    return visited
+
+
+def make_include_report(build_dir: Path, deps: Dict[str, List[str]], compile_times: Dict[str, float]) -> List[Dict]:
+    includers = {}
+    for output, output_deps in deps.items():
+        for header in get_headers(output_deps):
+            includers.setdefault(header, []).append(output)
+
+    header_sets = {output: set(get_headers(output_deps)) for output, output_deps in deps.items()}
+    graph = get_include_graph(build_dir, includers, header_sets)
+
+    report = []
+    for header, outputs in includers.items():
+        report.append({
+            "header": header,
+            "fanIn": len(outputs),
+            "rebuildCost": round(sum(compile_times.get(output, 0.0) for output in outputs), 3),
+            "pulledIn": len(get_transitive_includes(header, graph)),
+        })
+
+    return report
+
+
+def read_include_report(build_dir: Path) -> List[Dict]:
+    deps = read_ninja_deps(build_dir)
+
+    # The most recent time of every output, from any run, as a header may not have changed in the last run.
+    compile_times = {}
+    if (build_dir / ninjalog.NINJA_LOG_FILE_NAME).exists():
+        latest = ninjalog.get_latest_entries(ninjalog.read_entries(build_dir))
+        compile_times = {output: entry.duration for output, entry in latest.items()}
+
+    return make_include_report(build_dir, deps, compile_times)
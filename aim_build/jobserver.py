@@ -0,0 +1,63 @@
+import os
+import re
+import subprocess
+import tempfile
+from typing import Dict, Optional, Tuple
+
+# The first version of ninja that can take its jobs from a GNU make style jobserver.
+MIN_NINJA_VERSION = (1, 13)
+
+TOKEN = b"+"
+
+
+def get_ninja_version() -> Optional[Tuple[int, int]]:
+    try:
+        result = subprocess.run(["ninja", "--version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    match = re.match(r"(\d+)\.(\d+)", result.stdout.decode("utf-8", errors="replace"))
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def is_supported() -> bool:
+    # Note, ninja uses a named semaphore rather than a named pipe on Windows, which isn't supported yet.
+    if os.name != "posix":
+        return False
+
+    version = get_ninja_version()
+    return version is not None and version >= MIN_NINJA_VERSION
+
+
+class JobServer:
+    # A jobserver is a named pipe with one token in it for every job that may run. Several ninja runs take tokens from
+    # the same pipe, so the jobs of a run that finishes early are used by the runs that are still going. Every client
+    # also has one job of its own that doesn't need a token, so the pipe holds the jobs that are left over.
+    def __init__(self, job_count: int, client_count: int):
+        self.job_count = job_count
+        self.directory = tempfile.mkdtemp(prefix="aim-jobserver-")
+        self.path = os.path.join(self.directory, "fifo")
+        os.mkfifo(self.path)
+
+        # Opening the pipe for reading and writing doesn't block, and keeps it open while the clients come and go.
+        self.fd = os.open(self.path, os.O_RDWR)
+        os.write(self.fd, TOKEN * max(job_count - client_count, 0))
+
+    def get_environment(self) -> Dict[str, str]:
+        # Note, ninja only uses the jobserver if -j isn't passed to it.
+        return dict(os.environ, MAKEFLAGS=f"-j{self.job_count} --jobserver-auth=fifo:{self.path}")
+
+    def release_client_job(self):
+        # A client that has finished no longer needs its own job, so it is handed to the clients that are still running.
+        os.write(self.fd, TOKEN)
+
+    def close(self):
+        os.close(self.fd)
+        os.remove(self.path)
+        os.rmdir(self.directory)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
@@ -1,44 +1,131 @@
+# Note, only the modules that every command needs are imported here. Commands import the rest of what they need, so that
+# quick commands such as "aim version" and "aim run" don't pay for importing cerberus, ninja_syntax, tabulate or the
+# frontends. tests/test_startup.py checks this.
+from __future__ import annotations
+
 import argparse
 import os
-import shutil
 import subprocess
 import sys
-import zipfile
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from ninja_syntax import Writer
-from tabulate import tabulate
-
-from aim_build import gccbuilds
-from aim_build import msvcbuilds
-from aim_build.common import DEMO_ZIP_FILE_NAME
-from aim_build.commonbuilds import find_build, BuildTypes
-from aim_build.schema import target_schema
 from aim_build.version import __version__
 
+if TYPE_CHECKING:
+    import zipfile
+    from ninja_syntax import Writer
+
+
+LINK_POOL_NAME = "link_pool"
 
-def run_ninja(working_dir, build_name):
-    command = ["ninja", "-C", str(working_dir), "-v", build_name]
+# The number of lines that can be waiting to be written before the readers stop reading from ninja.
+OUTPUT_QUEUE_SIZE = 1024
+
+
+def run_ninja(working_dir, build_names, output_handler=None, ninja_args=None, env=None):
+    ninja_args = ninja_args if ninja_args else []
+    command = ["ninja", "-C", str(working_dir), "-v"] + ninja_args + build_names
     # command_str = " ".join(command)
     # print(f'Executing "{command_str}"')
 
-    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
-        for line in iter(process.stdout.readline, b""):
-            sys.stdout.write(line.decode("utf-8"))
-        for line in iter(process.stderr.readline, b""):
-            sys.stderr.write(line.decode("utf-8"))
+    if output_handler is None:
+        # Nothing needs to look at the output, so ninja writes straight to our stdout and stderr. This also lets ninja
+        # see the terminal, so it can use colours and its smart terminal status line.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        with subprocess.Popen(command, env=env) as process:
+            return process.wait()
+
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env) as process:
+        stream_lines(process, output_handler)
+        return process.wait()
+
+
+def stream_lines(process, output_handler):
+    import queue
+    import threading
+
+    # Both streams are read at the same time by their own thread, so a full stderr pipe can't block ninja while we are
+    # waiting for stdout. The lines are handled on this thread in the order they arrive. The queue is bounded, so a slow
+    # output handler applies back pressure to ninja rather than buffering the whole build log in memory.
+    lines = queue.Queue(maxsize=OUTPUT_QUEUE_SIZE)
+
+    def read_stream(stream, stream_name):
+        for line in iter(stream.readline, b""):
+            lines.put((stream_name, line))
+        lines.put((stream_name, None))
+
+    readers = [
+        threading.Thread(target=read_stream, args=(process.stdout, "stdout"), daemon=True),
+        threading.Thread(target=read_stream, args=(process.stderr, "stderr"), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    open_streams = len(readers)
+    while open_streams:
+        stream_name, line = lines.get()
+        if line is None:
+            open_streams -= 1
+        else:
+            output_handler(stream_name, line)
 
-        ret_code = process.returncode
+    for reader in readers:
+        reader.join()
 
-    return ret_code
 
+def get_ninja_args(args, jobs=None, include_jobs=True):
+    jobs = jobs if jobs is not None else args.jobs
 
-def entry():
-    script_path = Path(__file__).parent
+    ninja_args = []
+    if jobs is not None and include_jobs:
+        ninja_args += ["-j", str(jobs)]
+    if args.load_average is not None:
+        ninja_args += ["-l", str(args.load_average)]
+    if args.keep_going is not None:
+        ninja_args += ["-k", str(args.keep_going)]
+    return ninja_args
+
+
+def add_ninja_arguments(parser):
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Run N jobs in parallel. Defaults to ninja's default",
+        metavar="N",
+    )
+
+    parser.add_argument(
+        "-l",
+        "--load-average",
+        type=float,
+        help="Do not start new jobs if the load average is greater than N",
+        metavar="N",
+    )
 
+    parser.add_argument(
+        "-k",
+        "--keep-going",
+        type=int,
+        help="Keep going until N jobs fail (0 means infinity). Defaults to 1",
+        metavar="N",
+    )
+
+
+def make_parser():
     # TODO: Get version automatically from the pyproject.toml file.
     parser = argparse.ArgumentParser(prog="aim", description=f"Version {__version__}")
 
+    parser.add_argument("--profile",
+                        help="Prints how long each phase of Aim took",
+                        action="store_true")
+
+    parser.add_argument("--profile-output",
+                        help="Also writes a cProfile stats file of Aim to FILE. Implies --profile",
+                        metavar="FILE")
+
     subparsers = parser.add_subparsers(dest="command", help="Commands")
     subparsers.add_parser(name="version", help="Displays the version number")
 
@@ -73,9 +160,17 @@ def entry():
         build_parser.add_argument("path",
                                   help="The directorty containing target.py")
 
-        build_parser.add_argument("build",
+        build_parser.add_argument("builds",
                                   type=str,
-                                  help="The name of the build to execute")
+                                  nargs="*",
+                                  help="The names of the builds to execute. Globs, such as \"lib*\", are allowed")
+
+        build_parser.add_argument(
+            "-a",
+            "--all",
+            help="Execute all builds",
+            action="store_true",
+        )
 
         build_parser.add_argument(
             "-s",
@@ -84,6 +179,45 @@ def entry():
             action="store_true",
         )
 
+        build_parser.add_argument(
+            "-r",
+            "--regenerate",
+            help="Always regenerate build.ninja, even if nothing has changed",
+            action="store_true",
+        )
+
+        build_parser.add_argument(
+            "--revalidate",
+            help="Always validate target.py, even if it was validated before. Implies --regenerate",
+            action="store_true",
+        )
+
+        build_parser.add_argument("--trace",
+                                  help="Writes a Chrome trace of the build to the file",
+                                  metavar="FILE")
+
+        add_ninja_arguments(build_parser)
+
+    def make_generate_command(_subparsers):
+        generate_parser = _subparsers.add_parser(name="generate",
+                                                 help="Generates the build.ninja file without building")
+
+        generate_parser.add_argument("path",
+                                     help="The directorty containing target.py")
+
+        generate_parser.add_argument(
+            "-r",
+            "--regenerate",
+            help="Always regenerate build.ninja, even if nothing has changed",
+            action="store_true",
+        )
+
+        generate_parser.add_argument(
+            "--revalidate",
+            help="Always validate target.py, even if it was validated before. Implies --regenerate",
+            action="store_true",
+        )
+
     def make_run_command(_subparsers):
         run_parser = _subparsers.add_parser(name="run",
                                             help="Launches executable")
@@ -108,7 +242,8 @@ def entry():
 
         exec_parser.add_argument("build",
                                 type=str,
-                                help="The name of the build to execute")
+                                help="The name of the build to execute. Globs, such as \"lib*\", are allowed when "
+                                     "building but not when running")
 
         exec_parser.add_argument(
             "-s",
@@ -117,6 +252,15 @@ def entry():
             action="store_true",
         )
 
+        exec_parser.add_argument(
+            "-r",
+            "--regenerate",
+            help="Always regenerate build.ninja, even if nothing has changed",
+            action="store_true",
+        )
+
+        add_ninja_arguments(exec_parser)
+
         exec_parser.add_argument("operations",
                                  nargs="*",
                                  choices=["clobber", "list", "build", "run"],
@@ -126,17 +270,153 @@ def entry():
                                 nargs=argparse.REMAINDER,
                                 help="arguments forwarded to the executable")
 
+    def make_matrix_command(_subparsers):
+        matrix_parser = _subparsers.add_parser(name="matrix",
+                                               help="Executes builds for several targets at the same time")
+
+        matrix_parser.add_argument("paths",
+                                   nargs="+",
+                                   help="The directories containing target.py")
+
+        matrix_parser.add_argument("-b",
+                                   "--builds",
+                                   nargs="+",
+                                   help="The names of the builds to execute. Globs are allowed. Defaults to all builds")
+
+        matrix_parser.add_argument(
+            "-r",
+            "--regenerate",
+            help="Always regenerate build.ninja, even if nothing has changed",
+            action="store_true",
+        )
+
+        matrix_parser.add_argument(
+            "--revalidate",
+            help="Always validate target.py, even if it was validated before. Implies --regenerate",
+            action="store_true",
+        )
+
+        add_ninja_arguments(matrix_parser)
+
+    def make_cache_command(_subparsers):
+        cache_parser = _subparsers.add_parser(name="cache",
+                                              help="Manages the object cache")
+
+        cache_parser.add_argument("operation",
+                                  choices=["stats", "prune", "clear"],
+                                  help="Shows statistics, evicts entries until the cache fits its size limit, or "
+                                       "deletes everything in the cache")
+
+    def make_include_report_command(_subparsers):
+        report_parser = _subparsers.add_parser(name="include-report",
+                                               help="Reports the cost of each header from ninja's deps log")
+
+        report_parser.add_argument("path",
+                                   help="The directorty containing target.py")
+
+        report_parser.add_argument("-n",
+                                   "--count",
+                                   type=int,
+                                   default=20,
+                                   help="The number of headers to report. Defaults to 20")
+
+        report_parser.add_argument("--sort",
+                                   choices=["cost", "fan-in", "pulled-in"],
+                                   default="cost",
+                                   help="Sorts headers by rebuild cost, fan-in or pulled in headers. Defaults to cost")
+
+        report_parser.add_argument("--json",
+                                   help="Prints the report as JSON",
+                                   action="store_true")
+
+    def make_trace_command(_subparsers):
+        trace_parser = _subparsers.add_parser(name="trace",
+                                              help="Writes a Chrome trace of the last build")
+
+        trace_parser.add_argument("path",
+                                  help="The directorty containing target.py")
+
+        trace_parser.add_argument("-o",
+                                  "--output",
+                                  default="trace.json",
+                                  help="The trace file to write. Defaults to trace.json")
+
+    def make_stats_command(_subparsers):
+        stats_parser = _subparsers.add_parser(name="stats",
+                                              help="Reports the timings of the last build from the ninja log")
+
+        stats_parser.add_argument("path",
+                                  help="The directorty containing target.py")
+
+        stats_parser.add_argument("-n",
+                                  "--count",
+                                  type=int,
+                                  default=10,
+                                  help="The number of slowest compiles to report. Defaults to 10")
+
+        stats_parser.add_argument("--json",
+                                  help="Prints the report as JSON",
+                                  action="store_true")
+
+        stats_parser.add_argument("--save",
+                                  help="Saves the report as JSON to the file",
+                                  metavar="FILE")
+
+        stats_parser.add_argument("--compare",
+                                  help="Compares the time of each build with a saved report",
+                                  metavar="FILE")
+
+        stats_parser.add_argument("--threshold",
+                                  type=float,
+                                  help="Fails if a build is more than PERCENT slower than in the compared report",
+                                  metavar="PERCENT")
+
     make_init_command(subparsers)
     make_clobber_command(subparsers)
     make_list_command(subparsers)
     make_build_command(subparsers)
+    make_generate_command(subparsers)
     make_run_command(subparsers)
     make_exec_command(subparsers)
+    make_matrix_command(subparsers)
+    make_cache_command(subparsers)
+    make_stats_command(subparsers)
+    make_trace_command(subparsers)
+    make_include_report_command(subparsers)
+    return parser
+
 
-    args = parser.parse_args()
+def parse_arguments(parser, argv=None):
+    # The names of the builds are positional, so argparse stops collecting them at the first option. The names that
+    # follow an option, e.g. aim build <path> -s <build>, are left over and are added to the builds here.
+    args, extra_args = parser.parse_known_args(argv)
+    if args.command == "build" and not any(arg.startswith("-") for arg in extra_args):
+        args.builds += extra_args
+    elif extra_args:
+        parser.error(f"unrecognized arguments: {' '.join(extra_args)}")
+    return args
+
+
+def entry():
+    script_path = Path(__file__).parent
+    parser = make_parser()
+    args = parse_arguments(parser)
+    if args.profile or args.profile_output:
+        run_profiled(parser, args, script_path)
+    else:
+        run_command(parser, args, script_path)
+
+
+def run_command(parser, args, script_path):
     command = args.command
 
-    if command == "init":
+    if command == "version":
+        print(__version__)
+
+    elif command == "init":
+        import zipfile
+        from aim_build.common import DEMO_ZIP_FILE_NAME
+
         if args.demo_files:
             print("Initialising from demo project...")
             relative_dir = "demo/Calculator"
@@ -156,8 +436,42 @@ def entry():
         run_list(args.path)
 
     elif command == "build":
+        if not args.builds and not args.all:
+            parser.error("the following arguments are required: builds, or --all")
+
         forwarding_args = []
-        ret_code = run_build(args.build, args.path, args.skip_ninja, forwarding_args)
+        ret_code = run_build(args.builds,
+                             args.path,
+                             args.skip_ninja,
+                             forwarding_args,
+                             args.regenerate,
+                             get_ninja_args(args),
+                             args.all,
+                             args.revalidate)
+        if args.trace:
+            run_trace(args.path, args.trace)
+        sys.exit(ret_code)
+
+    elif command == "generate":
+        run_generate(args.path, [], args.regenerate, revalidate=args.revalidate)
+
+    elif command == "include-report":
+        ret_code = run_include_report(args.path, args)
+        sys.exit(ret_code)
+
+    elif command == "trace":
+        ret_code = run_trace(args.path, args.output)
+        sys.exit(ret_code)
+
+    elif command == "stats":
+        ret_code = run_stats(args.path, args)
+        sys.exit(ret_code)
+
+    elif command == "cache":
+        run_cache(args.operation)
+
+    elif command == "matrix":
+        ret_code = run_matrix(args.paths, args.builds, args.regenerate, args, args.revalidate)
         sys.exit(ret_code)
 
     elif command == "run":
@@ -176,7 +490,12 @@ def entry():
             elif "build" == command:
                 # TODO: forwardarding build args.
                 forwarding_args = []
-                ret_code = run_build(args.build, args.path, args.skip_ninja, forwarding_args)
+                ret_code = run_build([args.build],
+                                     args.path,
+                                     args.skip_ninja,
+                                     forwarding_args,
+                                     args.regenerate,
+                                     get_ninja_args(args))
                 if ret_code:
                     sys.exit(ret_code)
 
@@ -189,22 +508,68 @@ def entry():
         parser.print_help(sys.stdout)
 
 
+def run_profiled(parser, args, script_path):
+    import cProfile
+    import time
+    from aim_build import phases
+
+    # Note, most commands end by calling sys.exit, so the report is printed on the way out.
+    profiler = cProfile.Profile() if args.profile_output else None
+    phases.reset()
+    phases.reset_counts()
+    start = time.perf_counter()
+    try:
+        if profiler:
+            profiler.runcall(run_command, parser, args, script_path)
+        else:
+            run_command(parser, args, script_path)
+    finally:
+        total_time = time.perf_counter() - start
+        print_profile(total_time)
+        if profiler:
+            profiler.dump_stats(args.profile_output)
+            print(f"Profile written to {args.profile_output}. View it with: python -m pstats {args.profile_output}")
+
+
+def print_profile(total_time):
+    from tabulate import tabulate
+    from aim_build import phases
+
+    timings = {}
+    for phase in phases.get_phases():
+        count, duration = timings.get(phase["name"], (0, 0.0))
+        timings[phase["name"]] = (count + 1, duration + phase["duration"])
+
+    table = [[name, count, f"{duration * 1000:.1f}"] for name, (count, duration) in timings.items()]
+    table.append(["total", "", f"{total_time * 1000:.1f}"])
+
+    print()
+    print(tabulate(table, ["Phase", "Count", "Time (ms)"]))
+
+    counts = phases.get_counts()
+    if counts:
+        print()
+        print(tabulate([[name, value] for name, value in counts.items()], ["Counter", "Value"]))
+
+
 def run_run(path, args, unknown):
-    target_file = load_target_file(path)
+    from aim_build import manifest
+
+    build_dir = make_build_path(path)
+    the_manifest = manifest.get_manifest(build_dir, lambda: load_target_file(path))
 
-    the_build = find_build(args.build, target_file["builds"])
+    try:
+        the_build = manifest.find_manifest_build(args.build, the_manifest)
+    except RuntimeError as exception:
+        print(f"Error: {exception.args[0]}")
+        sys.exit(-1)
 
     build_type = the_build["buildRule"]
     if build_type != "executable":
         print(f"Error: {args.build} is not executable")
         exit(-1)
-    name = the_build["outputName"]
 
-    build_dir = make_build_path(path)
-    if target_file["compilerFrontend"] == "msvc":
-        command = build_dir / name
-    else:
-        command = build_dir / args.build / name
+    command = build_dir / the_build["output"]
     # forward_args = args.args if args.args else []
     forward_args = unknown
     str_repr = " ".join(forward_args)
@@ -244,29 +609,51 @@ def run_init(demo_zip: zipfile.ZipFile, subdir_name):
 
 
 def generate_flat_ninja_file(target_dict, project_dir, build_dir, args):
+    import io
+    from ninja_syntax import Writer
+    from aim_build import gccbuilds
+    from aim_build import msvcbuilds
+    from aim_build import phases
+    from aim_build.buildgraph import get_build_graph
+    from aim_build.utils import write_if_changed
+
     frontend = target_dict["compilerFrontend"]
     project_ninja = build_dir / "build.ninja"
 
-    builds = target_dict["builds"]
-
-    with project_ninja.open("w+") as project_fd:
+    # Rendered into memory first, so build.ninja is only replaced when it has actually changed.
+    with io.StringIO() as project_fd:
         project_writer = Writer(project_fd)
         # project_writer.include(str(build_dir / "rules.ninja"))
+
+        # Linking can use a lot more memory than compiling, so the number of links that run at the same time can be
+        # limited separately from the number of jobs.
+        link_pool = None
+        if "linkPool" in target_dict:
+            link_pool = LINK_POOL_NAME
+            project_writer.pool(link_pool, target_dict["linkPool"])
+            project_writer.newline()
+
         if frontend == "msvc":
             msvcbuilds.add_compile(project_writer)
+            msvcbuilds.add_pch(project_writer)
             msvcbuilds.add_ar(project_writer)
-            msvcbuilds.add_exe(project_writer)
-            msvcbuilds.add_shared(project_writer)
+            msvcbuilds.add_exe(project_writer, link_pool)
+            msvcbuilds.add_shared(project_writer, link_pool)
         elif frontend == "osx":
             # builder = osxbuilds.OsxBuilds()
             assert False, "OSX frontend is currently not supported."
         else:
             gccbuilds.add_compile(project_writer)
+            gccbuilds.add_pch(project_writer)
             gccbuilds.add_ar(project_writer)
-            gccbuilds.add_exe(project_writer)
-            gccbuilds.add_shared(project_writer)
+            gccbuilds.add_exe(project_writer, link_pool)
+            gccbuilds.add_shared(project_writer, link_pool)
+
+        add_regenerate_rule(project_writer, target_dict, project_dir, build_dir)
 
-        for build_info in builds:
+        # Builds are generated in dependency order, so the outputs of a build's requirements, such as precompiled
+        # headers, are known when the build is generated.
+        for build_info in get_build_graph(target_dict).topological_order():
             current_build = build_info
             current_build["directory"] = project_dir
             current_build["build_dir"] = build_dir
@@ -283,6 +670,41 @@ def generate_flat_ninja_file(target_dict, project_dir, build_dir, args):
 
             builder(build_info, target_dict, project_writer, args)
 
+        content = project_fd.getvalue()
+        phases.count("builds", len(target_dict["builds"]))
+        phases.count("ninja edges", sum(1 for line in content.splitlines() if line.startswith("build ")))
+        return write_if_changed(project_ninja, content)
+
+
+def add_regenerate_rule(writer: Writer, target_dict, project_dir, build_dir):
+    from aim_build import fingerprint
+
+    # Lets ninja decide when build.ninja is out of date, so running ninja directly, without Aim, is still correct.
+    # The command is run from the build directory, so everything is relative to it. restat stops ninja from reloading
+    # the manifest when Aim decides that nothing has changed and leaves build.ninja alone.
+    command = f'"{sys.executable}" -m aim_build.main generate .'
+    writer.rule(
+        name="aim_regen",
+        description="Regenerating build.ninja",
+        command=command,
+        generator=True,
+        restat=True,
+    )
+    writer.newline()
+
+    glob_directories = fingerprint.get_glob_directories(target_dict, project_dir)
+    inputs = ["target.py"] + [relative_to_build_dir(directory, build_dir) for directory in glob_directories]
+    writer.build(outputs="build.ninja", rule="aim_regen", inputs=inputs)
+    writer.newline()
+
+
+def relative_to_build_dir(path: Path, build_dir: Path) -> str:
+    try:
+        return os.path.relpath(str(path), str(build_dir)).replace("\\", "/")
+    except ValueError:
+        # On Windows, there is no relative path between different drives.
+        return str(path)
+
 
 def make_build_path(target_path: Path):
     target_path = Path(target_path)
@@ -338,7 +760,19 @@ def convert_target_module_to_dict(target_module):
     return the_dict
 
 
-def run_build(build_name, target_path, skip_ninja_regen, args):
+def run_build(build_names,
+              target_path,
+              skip_ninja_regen,
+              args,
+              force_regen=False,
+              ninja_args=None,
+              all_builds=False,
+              revalidate=False):
+    from aim_build import ninjalog
+    from aim_build import phases
+    from aim_build import trace
+    from aim_build.commonbuilds import find_builds, is_glob_pattern
+
     print("Running build...")
 
     build_dir = make_build_path(target_path)
@@ -347,46 +781,298 @@ def run_build(build_name, target_path, skip_ninja_regen, args):
     completed_path = (Path().cwd() / file_path).resolve()
     assert file_path.exists(), f"Error: Could not find target.py at {str(completed_path)}"
 
-    target_module = load_target_py_file(file_path)
-    target_dict = convert_target_module_to_dict(target_module)
+    if skip_ninja_regen:
+        target_dict, _ = load_and_validate_target_file(build_dir, revalidate)
+    else:
+        target_dict = run_generate(target_path, args, force_regen, update_ninja_log=True, revalidate=revalidate)
 
-    builds = target_dict["builds"]
-    the_build = find_build(build_name, builds)
+    # Note, when generation is skipped the target file is only loaded if it is needed to expand globs. Otherwise, ninja
+    # reports an error if a build name does not exist.
+    if target_dict is None and (all_builds or any(is_glob_pattern(name) for name in build_names)):
+        target_dict = load_target_file(target_path)
 
-    project_dir = make_project_path(target_dict["projectRoot"], build_dir)
+    if target_dict:
+        try:
+            build_names = [build["name"] for build in find_builds(build_names, target_dict["builds"], all_builds)]
+        except RuntimeError as exception:
+            print(f"Error: {exception.args[0]}")
+            sys.exit(-1)
+
+    # Lets "aim stats" and "aim trace" find the entries that this run adds to the ninja log.
+    ninjalog.mark_log(build_dir)
+
+    # All the builds are passed to one ninja run, so ninja can schedule their jobs together.
+    with phases.phase(trace.NINJA_PHASE_NAME):
+        ret_code = run_ninja(build_dir, build_names, ninja_args=ninja_args)
+
+    phases.save_phases(build_dir)
+    return ret_code
+
+
+def split_jobs(job_count, target_count):
+    # Each target gets an equal share of the jobs, and at least one job.
+    shares = [job_count // target_count] * target_count
+    for index in range(job_count % target_count):
+        shares[index] += 1
+    return [max(share, 1) for share in shares]
+
+
+def get_unique_target_paths(target_paths):
+    # Two ninja runs in the same build directory would fight over its files, so each build directory is only built once.
+    unique = {}
+    for target_path in target_paths:
+        unique.setdefault(make_build_path(target_path).resolve(), target_path)
+    return list(unique.values())
+
+
+def generate_matrix_target(target_path, build_patterns, force_regen, revalidate=False):
+    from aim_build import phases
+    from aim_build.commonbuilds import find_builds
+
+    # Runs in a worker process, so only the names of the builds are returned. A worker can generate several targets, so
+    # the phases of the previous target are cleared first.
+    phases.reset()
+    target_dict = run_generate(target_path, [], force_regen, update_ninja_log=True, revalidate=revalidate)
+    if target_dict is None:
+        target_dict = load_target_file(target_path)
+
+    try:
+        builds = find_builds(build_patterns if build_patterns else [], target_dict["builds"], not build_patterns)
+    except RuntimeError as exception:
+        print(f"Error: {target_path}: {exception.args[0]}")
+        sys.exit(-1)
+
+    return [build["name"] for build in builds]
+
+
+def describe_jobs(jobs):
+    if jobs is None:
+        return "shared"
+    elif jobs == 0:
+        return "unlimited"
+    return jobs
+
+
+def run_matrix(target_paths, build_patterns, force_regen, args, revalidate=False):
+    import concurrent.futures
+    import threading
+    import time
+    from tabulate import tabulate
+    from aim_build import jobserver
+    from aim_build import ninjalog
+    from aim_build import phases
+    from aim_build import trace
+
+    print("Running matrix...")
+
+    target_paths = get_unique_target_paths(target_paths)
+
+    # Targets are independent of each other, so they are generated at the same time.
+    build_names = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=len(target_paths)) as executor:
+        futures = {
+            target_path: executor.submit(generate_matrix_target, target_path, build_patterns, force_regen, revalidate)
+            for target_path in target_paths
+        }
+        for target_path, future in futures.items():
+            try:
+                build_names[target_path] = future.result()
+            except SystemExit:
+                return -1
+
+    # All the ninja runs share one job budget, rather than each run using every core. The runs take their jobs from a
+    # jobserver when ninja supports it, so a run that finishes early hands its jobs to the others. Otherwise, each run
+    # gets a fixed share of the jobs. Note, -j 0 means there is no limit, so there is nothing to share.
+    job_count = args.jobs if args.jobs is not None else os.cpu_count() + 2
+    job_server = None
+    if job_count == 0:
+        job_shares = [0] * len(target_paths)
+    elif jobserver.is_supported():
+        job_server = jobserver.JobServer(job_count, len(target_paths))
+        job_shares = [None] * len(target_paths)
+    else:
+        job_shares = split_jobs(job_count, len(target_paths))
+
+    output_lock = threading.Lock()
+    results = {}
+
+    def build_target(target_path, jobs):
+        def write_prefixed(stream_name, line):
+            stream = sys.stdout if stream_name == "stdout" else sys.stderr
+            with output_lock:
+                stream.buffer.write(f"[{target_path}] ".encode("utf-8") + line)
+                stream.buffer.flush()
+
+        build_dir = make_build_path(target_path)
+        ninja_args = get_ninja_args(args, jobs, include_jobs=jobs is not None)
+        env = job_server.get_environment() if job_server else None
+        ninjalog.mark_log(build_dir)
+
+        start = time.time()
+        counter_start = time.perf_counter()
+        try:
+            ret_code = run_ninja(build_dir,
+                                 build_names[target_path],
+                                 output_handler=write_prefixed,
+                                 ninja_args=ninja_args,
+                                 env=env)
+        finally:
+            if job_server:
+                job_server.release_client_job()
+        duration = time.perf_counter() - counter_start
+
+        # The phases of the generation were saved by the worker process, so the ninja run is added to them.
+        phases.append_saved_phase(build_dir, trace.NINJA_PHASE_NAME, start, duration)
+        results[target_path] = (ret_code, duration)
+
+    threads = [
+        threading.Thread(target=build_target, args=(target_path, jobs))
+        for target_path, jobs in zip(target_paths, job_shares)
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if job_server:
+            job_server.close()
+
+    table = []
+    for target_path, jobs in zip(target_paths, job_shares):
+        ret_code, duration = results[target_path]
+        result = "ok" if ret_code == 0 else f"failed ({ret_code})"
+        table.append([target_path, len(build_names[target_path]), describe_jobs(jobs), result, f"{duration:.1f}"])
+
+    print()
+    print(tabulate(table, ["Target", "Builds", "Jobs", "Result", "Time (s)"]))
+
+    failed = [results[target_path][0] for target_path in target_paths if results[target_path][0] != 0]
+    return failed[0] if failed else 0
+
+
+def run_generate(target_path, args, force_regen=False, update_ninja_log=False, revalidate=False):
+    from aim_build import compdb
+    from aim_build import fingerprint
+    from aim_build import fssnapshot
+    from aim_build import manifest
+    from aim_build import phases
 
+    build_dir = make_build_path(target_path)
+    file_path = build_dir / "target.py"
+
+    # Nothing that affects build.ninja has changed since it was last generated, so there is no need to load, validate
+    # or generate anything.
+    with phases.phase("fingerprint"):
+        up_to_date = not force_regen and not revalidate and fingerprint.is_up_to_date(build_dir)
+
+    if up_to_date:
+        print("build.ninja is up to date.")
+        if update_ninja_log:
+            directories = [Path(directory) for directory in fingerprint.read_fingerprint(build_dir)["directories"]]
+            restat_ninja_file(build_dir, directories, ninja_file_changed=False)
+        phases.save_phases(build_dir)
+        return None
+
+    target_dict, project_dir = load_and_validate_target_file(build_dir, revalidate)
+
+    # Note, the fingerprint is computed before generating so that changes made during generation are not missed.
+    glob_directories = fingerprint.get_glob_directories(target_dict, project_dir)
+    the_fingerprint = fingerprint.compute_fingerprint(file_path,
+                                                      target_dict["compilerFrontend"],
+                                                      glob_directories,
+                                                      fssnapshot.get_snapshot(target_dict))
+
+    print("Generating ninja files...")
     try:
-        target_schema(target_dict, project_dir)
+        with phases.phase("generate ninja"):
+            ninja_file_changed = generate_flat_ninja_file(target_dict, project_dir, build_dir, args)
     except RuntimeError as exception:
         print(f"Error: {exception.args[0]}")
         sys.exit(-1)
 
-    if not skip_ninja_regen:
-        print("Generating ninja files...")
-        generate_flat_ninja_file(target_dict, project_dir, build_dir, args)
-        COMPILE_COMMANDS = True
-        if COMPILE_COMMANDS:
-            with (build_dir.resolve() / "compile_commands.json").open("w+") as cc_json:
-                command = ["ninja", "-C", str(build_dir.resolve()), "-t", "compdb"]
-                subprocess.run(command, stdout=cc_json, check=True)
-
-    return run_ninja(build_dir, the_build["name"])
-
-
-def add_naming_convention(
-        output_name: str,
-        build_type: BuildTypes,
-        static_convention_func,
-        dynamic_convention_func,
-):
-    if build_type == BuildTypes.staticLibrary:
-        new_name = static_convention_func(output_name)
-    elif build_type == BuildTypes.dynamicLibrary:
-        new_name = dynamic_convention_func(output_name)
+    if update_ninja_log:
+        restat_ninja_file(build_dir, glob_directories, ninja_file_changed)
+
+    with phases.phase("compile commands"):
+        compdb.write_compile_commands(build_dir, target_dict)
+
+    # Lets "aim run" and "aim list" find the outputs of the builds without executing target.py.
+    manifest.write_manifest(build_dir, manifest.make_manifest(target_dict, file_path))
+
+    if target_dict.get("fileSystemCache", False):
+        fssnapshot.save_snapshot(build_dir, fssnapshot.get_snapshot(target_dict))
+
+    fingerprint.write_fingerprint(build_dir, the_fingerprint)
+    phases.save_phases(build_dir)
+    return target_dict
+
+
+def get_newest_mtime(paths) -> int:
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.stat(str(path)).st_mtime_ns)
+        except OSError:
+            pass
+    return max(mtimes, default=0)
+
+
+def restat_ninja_file(build_dir: Path, glob_directories, ninja_file_changed: bool):
+    # Ninja remembers the mtime of build.ninja in .ninja_log, because the aim_regen rule uses restat. When Aim rewrites
+    # build.ninja itself, that mtime is out of date and ninja would run aim_regen again for nothing. Note, this must not
+    # be done when ninja is running the aim_regen rule, as ninja has the log open.
+    ninja_file = build_dir / "build.ninja"
+    if not (build_dir / ".ninja_log").exists() or not ninja_file.exists():
+        return
+
+    if not ninja_file_changed:
+        # build.ninja was left alone, but its inputs can still be newer than it, e.g. when target.py was saved without
+        # any changes. A restat alone doesn't help then, as ninja compares the inputs with the mtime of build.ninja, so
+        # build.ninja is touched first.
+        inputs = [build_dir / "target.py"] + list(glob_directories)
+        if os.stat(str(ninja_file)).st_mtime_ns >= get_newest_mtime(inputs):
+            return
+        os.utime(str(ninja_file))
+
+    command = ["ninja", "-C", str(build_dir), "-t", "restat", "build.ninja"]
+    subprocess.run(command, stdout=subprocess.DEVNULL, check=False)
+
+
+def load_and_validate_target_file(build_dir: Path, revalidate=False):
+    from aim_build import fssnapshot
+    from aim_build import phases
+    from aim_build.buildgraph import get_build_graph
+    from aim_build.validationcache import validate_target
+
+    file_path = build_dir / "target.py"
+    completed_path = (Path().cwd() / file_path).resolve()
+    assert file_path.exists(), f"Error: Could not find target.py at {str(completed_path)}"
+
+    with phases.phase("load target.py"):
+        target_module = load_target_py_file(file_path)
+        target_dict = convert_target_module_to_dict(target_module)
+
+    project_dir = make_project_path(target_dict["projectRoot"], build_dir)
+
+    # Validation and generation share one snapshot of the file system, so each directory is only listed once.
+    if target_dict.get("fileSystemCache", False):
+        snapshot = fssnapshot.load_snapshot(build_dir)
     else:
-        assert False, f"Error Invalid build type: {build_type}"
+        snapshot = fssnapshot.FileSystemSnapshot()
 
-    return new_name
+    try:
+        with phases.phase("validate"):
+            validate_target(target_dict, project_dir, build_dir, revalidate, snapshot)
+            get_build_graph(target_dict)
+    except RuntimeError as exception:
+        print(f"Error: {exception.args[0]}")
+        sys.exit(-1)
+
+    # Note, the snapshot is added after validation, as it isn't part of the target.
+    target_dict[fssnapshot.SNAPSHOT_KEY] = snapshot
+
+    return target_dict, project_dir
 
 
 def load_target_file(target_path):
@@ -404,47 +1090,17 @@ def load_target_file(target_path):
 
 
 def run_list(target_path):
-    target_dict = load_target_file(target_path)
-    builds = target_dict["builds"]
-
-    frontend = target_dict["compilerFrontend"]
+    from tabulate import tabulate
+    from aim_build import manifest
 
-    if frontend == "msvc":
-        static_convention_func = (
-            msvcbuilds.windows_add_static_library_naming_convention
-        )
-        dynamic_convection_func = (
-            msvcbuilds.windows_add_dynamic_library_naming_convention
-        )
-    elif frontend == "osx":
-        assert False, "OSX frontend is currently not supported."
-    elif frontend == "gcc":
-        static_convention_func = (
-            gccbuilds.linux_add_static_library_naming_convention
-        )
-        dynamic_convection_func = (
-            gccbuilds.linux_add_dynamic_library_naming_convention
-        )
-    else:
-        assert False, f"Error: Unknown compiler frontend: {frontend}"
+    build_dir = make_build_path(target_path)
+    the_manifest = manifest.get_manifest(build_dir, lambda: load_target_file(target_path))
 
     header = ["Item", "Name", "Build Rule", "Output Name"]
     table = []
 
-    for number, build in enumerate(builds):
-        build_type = BuildTypes[build["buildRule"]]
-        if build_type in [BuildTypes.libraryReference, BuildTypes.headerOnly]:
-            output_name = "n.a."
-        elif build_type in [BuildTypes.staticLibrary, BuildTypes.dynamicLibrary]:
-            output_name = add_naming_convention(
-                build["outputName"],
-                build_type,
-                static_convention_func,
-                dynamic_convection_func,
-            )
-        else:
-            output_name = build["outputName"]
-
+    output_names = manifest.get_output_names(the_manifest)
+    for number, (build, output_name) in enumerate(zip(the_manifest["builds"], output_names)):
         row = [number, build["name"], build["buildRule"], output_name]
         table.append(row)
 
@@ -453,7 +1109,161 @@ def run_list(target_path):
     print()
 
 
+def run_include_report(target_path, args):
+    import json
+    from tabulate import tabulate
+    from aim_build import includereport
+
+    build_dir = make_build_path(target_path)
+
+    try:
+        report = includereport.read_include_report(build_dir)
+    except RuntimeError as exception:
+        print(f"Error: {exception.args[0]}")
+        return -1
+
+    sort_keys = {"cost": "rebuildCost", "fan-in": "fanIn", "pulled-in": "pulledIn"}
+    report = sorted(report, key=lambda item: item[sort_keys[args.sort]], reverse=True)[:args.count]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    table = [[item["header"], item["fanIn"], f"{item['rebuildCost']:.1f}", item["pulledIn"]] for item in report]
+    print(tabulate(table, ["Header", "Fan-in", "Rebuild cost (s)", "Pulled in"]))
+    return 0
+
+
+def run_trace(target_path, output_path):
+    import json
+    from aim_build import ninjalog
+    from aim_build import phases
+    from aim_build import trace
+
+    build_dir = make_build_path(target_path)
+
+    try:
+        entries = ninjalog.read_last_run(build_dir)
+    except RuntimeError as exception:
+        print(f"Error: {exception.args[0]}")
+        return -1
+
+    the_trace = trace.make_trace(phases.load_phases(build_dir), entries)
+    Path(output_path).write_text(json.dumps(the_trace))
+    print(f"Trace written to {output_path}. Open it with chrome://tracing or https://ui.perfetto.dev.")
+    return 0
+
+
+def run_stats(target_path, args):
+    import json
+    from aim_build import ninjalog
+    from aim_build.utils import write_if_changed
+
+    build_dir = make_build_path(target_path)
+
+    try:
+        report = ninjalog.make_report(ninjalog.read_last_run(build_dir), args.count)
+        previous = ninjalog.load_report(args.compare) if args.compare else None
+    except RuntimeError as exception:
+        print(f"Error: {exception.args[0]}")
+        return -1
+
+    if args.save:
+        write_if_changed(Path(args.save), json.dumps(report, indent=2) + "\n")
+
+    comparison = ninjalog.compare_reports(previous, report) if previous else []
+    regressions = [
+        item for item in comparison
+        if args.threshold is not None and item["change"] is not None and item["change"] > args.threshold
+    ]
+
+    if args.json:
+        if previous:
+            report = dict(report, comparison=comparison)
+        print(json.dumps(report, indent=2))
+    else:
+        print_stats_report(report, comparison)
+
+    for item in regressions:
+        print(f"Error: {item['build']} is {item['change']:.1f}% slower than in {args.compare}.")
+
+    return 1 if regressions else 0
+
+
+def print_stats_report(report, comparison):
+    from tabulate import tabulate
+
+    print(f"Edges: {report['edges']}")
+    print(f"Wall time: {report['wallTime']:.1f}s")
+    print(f"CPU time: {report['cpuTime']:.1f}s")
+    print(f"Parallelism: {report['parallelism']:.2f}")
+    if report["generatorTime"]:
+        print(f"Regenerating build.ninja: {report['generatorTime']:.1f}s")
+    print()
+
+    table = [[name, build["edges"], f"{build['compile']:.1f}", f"{build['archive']:.1f}", f"{build['link']:.1f}"]
+             for name, build in report["builds"].items()]
+    print(tabulate(table, ["Build", "Edges", "Compile (s)", "Archive (s)", "Link (s)"]))
+    print()
+
+    table = [[item["output"], f"{item['time']:.2f}"] for item in report["slowestCompiles"]]
+    print(tabulate(table, ["Slowest compiles", "Time (s)"]))
+    print()
+
+    table = [[item["output"], f"{item['time']:.2f}"] for item in report["archives"]]
+    print(tabulate(table, ["Archives", "Time (s)"]))
+    print()
+
+    table = [[item["output"], f"{item['time']:.2f}"] for item in report["links"]]
+    print(tabulate(table, ["Links", "Time (s)"]))
+    print()
+
+    if comparison:
+        table = [
+            [item["build"],
+             f"{item['previous']:.1f}",
+             f"{item['current']:.1f}",
+             f"{item['change']:+.1f}%" if item["change"] is not None else "new"]
+            for item in comparison
+        ]
+        print(tabulate(table, ["Build", "Previous (s)", "Current (s)", "Change"]))
+        print()
+
+
+def run_cache(operation):
+    from tabulate import tabulate
+    from aim_build import objcache
+
+    cache_dir = objcache.get_cache_dir()
+
+    if operation == "stats":
+        stats = objcache.get_stats(cache_dir)
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = f"{100 * stats['hits'] / lookups:.1f}%" if lookups else "-"
+        table = [
+            ["Directory", str(cache_dir)],
+            ["Hits", stats["hits"]],
+            ["Misses", stats["misses"]],
+            ["Hit rate", hit_rate],
+            ["Entries", stats["entries"]],
+            ["Size (MB)", f"{stats['size'] / 1024 ** 2:.1f}"],
+            ["Max size (MB)", f"{stats['maxSize'] / 1024 ** 2:.1f}"],
+        ]
+        print(tabulate(table))
+
+    elif operation == "prune":
+        removed_count, removed_size = objcache.prune(cache_dir, objcache.get_max_size())
+        print(f"Removed {removed_count} entries ({removed_size / 1024 ** 2:.1f} MB).")
+
+    elif operation == "clear":
+        print(f"Clearing {str(cache_dir)}...")
+        objcache.clear(cache_dir)
+
+
 def run_clobber(target_path):
+    import shutil
+
+    # Note, the object cache is not part of the build directory, so a clobbered build can still use it.
     build_dir = Path().cwd()
 
     if target_path:
@@ -0,0 +1,109 @@
+import json
+import os
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional
+
+from aim_build.fingerprint import hash_file
+from aim_build.utils import write_if_changed
+from aim_build.version import __version__
+
+MANIFEST_FILE_NAME = ".aim_manifest.json"
+
+
+def get_library_naming_conventions(frontend: str):
+    from aim_build import gccbuilds
+    from aim_build import msvcbuilds
+
+    if frontend == "msvc":
+        return (msvcbuilds.windows_add_static_library_naming_convention,
+                msvcbuilds.windows_add_dynamic_library_naming_convention)
+    elif frontend == "osx":
+        assert False, "OSX frontend is currently not supported."
+    elif frontend == "gcc":
+        return (gccbuilds.linux_add_static_library_naming_convention,
+                gccbuilds.linux_add_dynamic_library_naming_convention)
+    else:
+        assert False, f"Error: Unknown compiler frontend: {frontend}"
+
+
+def get_output(build: Dict, frontend: str) -> Optional[str]:
+    # The path of the file that a build outputs, relative to the build directory. Note, MSVC executables are written
+    # to the build directory itself so they can find the DLLs they use.
+    build_rule = build["buildRule"]
+    if build_rule == "executable":
+        if frontend == "msvc":
+            return build["outputName"]
+        return str(PurePosixPath(build["name"]) / build["outputName"])
+
+    # Note, the frontends are only imported for libraries, so running an executable stays quick without a manifest.
+    if build_rule == "staticLibrary":
+        static_convention_func, _ = get_library_naming_conventions(frontend)
+        return str(PurePosixPath(build["name"]) / static_convention_func(build["outputName"]))
+    elif build_rule == "dynamicLibrary":
+        _, dynamic_convention_func = get_library_naming_conventions(frontend)
+        return str(PurePosixPath(build["name"]) / dynamic_convention_func(build["outputName"]))
+
+    # headerOnly and libraryReference builds don't output anything.
+    return None
+
+
+def make_manifest(target_dict: Dict, target_file_path: Path) -> Dict:
+    frontend = target_dict["compilerFrontend"]
+    return {
+        "version": __version__,
+        "target": hash_file(target_file_path),
+        "compilerFrontend": frontend,
+        "builds": [
+            {
+                "name": build["name"],
+                "buildRule": build["buildRule"],
+                "output": get_output(build, frontend),
+            } for build in target_dict["builds"]
+        ],
+    }
+
+
+def write_manifest(build_dir: Path, manifest: Dict):
+    write_if_changed(build_dir / MANIFEST_FILE_NAME, json.dumps(manifest, indent=2))
+
+
+def read_manifest(build_dir: Path) -> Optional[Dict]:
+    # Returns None if there is no manifest or it is out of date, in which case target.py has to be loaded instead.
+    manifest_path = build_dir / MANIFEST_FILE_NAME
+    target_file_path = build_dir / "target.py"
+    try:
+        manifest_mtime = os.stat(str(manifest_path)).st_mtime_ns
+        target_mtime = os.stat(str(target_file_path)).st_mtime_ns
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("version") != __version__:
+        return None
+
+    # The manifest is only rewritten when it changes, so it can be older than a target.py that was saved without any
+    # changes. In that case the hash of target.py decides.
+    if manifest_mtime < target_mtime and manifest.get("target") != hash_file(target_file_path):
+        return None
+
+    return manifest
+
+
+def find_manifest_build(build_name: str, manifest: Dict) -> Dict:
+    for build in manifest["builds"]:
+        if build["name"] == build_name:
+            return build
+
+    raise RuntimeError(f"Failed to find build with name: {build_name}")
+
+
+def get_manifest(build_dir: Path, target_dict_loader) -> Dict:
+    # Uses the manifest written by the last generation if it is up to date, otherwise it is made from target.py.
+    manifest = read_manifest(build_dir)
+    if manifest is None:
+        manifest = make_manifest(target_dict_loader(), build_dir / "target.py")
+    return manifest
+
+
+def get_output_names(manifest: Dict) -> List[str]:
+    return [PurePosixPath(build["output"]).name if build["output"] else "n.a." for build in manifest["builds"]]
@@ -1,14 +1,25 @@
 import functools
-from pathlib import PureWindowsPath, PurePosixPath
+from pathlib import Path, PureWindowsPath, PurePosixPath
 from typing import Callable
 from typing import Dict, Tuple, List, Union
 
 from ninja_syntax import Writer
 
 from aim_build import commonbuilds
+from aim_build import compdb
+from aim_build import phases
+from aim_build.buildgraph import get_build_graph
 from aim_build.commonbuilds import BuildTypes, LibraryInformation
 from aim_build.typedefs import StringList, PathList
-from aim_build.utils import prefix, postfix, src_to_obj, prepend_paths, to_str, to_native_path, wrap_quotes
+from aim_build.utils import (
+    prefix,
+    postfix,
+    src_to_obj,
+    prepend_paths,
+    to_str,
+    to_native_path,
+    wrap_quotes
+)
 
 USING_RELATIVE_OUTPUTS = False
 
@@ -19,16 +30,28 @@ PrefixHashDefine = functools.partial(prefix, "/D")
 PostFixLib = functools.partial(postfix, ".lib")
 ToObjectFiles = src_to_obj
 
+# Note, there cannot be a space between /Fo and $out. The compiler launcher, such as sccache, only wraps compiles and
+# never links.
+COMPILE_COMMAND = "$launcher $compiler $flags $defines $includes /showIncludes /c $in /Fo$out"
+PCH_COMMAND = "$compiler $flags $defines $includes /showIncludes /c $in /Yc$header /Fp$out /Fo$pch_object"
+
 
 def add_compile(nfw):
-    # Note, there cannot be a space between /Fo and $out
-    command = "$compiler $flags $defines $includes /showIncludes /c $in /Fo$out"
     nfw.rule(
         name="compile",
         description="Compile source files to object files",
         deps="msvc",
-        depfile="deps.d",
-        command=command,
+        command=COMPILE_COMMAND,
+    )
+    nfw.newline()
+
+
+def add_pch(nfw):
+    nfw.rule(
+        name="pch",
+        description="Precompiles a header",
+        deps="msvc",
+        command=PCH_COMMAND,
     )
     nfw.newline()
 
@@ -42,17 +65,17 @@ def add_ar(nfw):
     nfw.newline()
 
 
-def add_exe(nfw):
+def add_exe(nfw, pool=None):
     command = (
         "$compiler $flags $defines $includes $in /link /out:$exe_name $linker_args"
     )
-    nfw.rule(name="exe", description="Build an executable.", command=command)
+    nfw.rule(name="exe", description="Build an executable.", command=command, pool=pool)
     nfw.newline()
 
 
-def add_shared(nfw):
+def add_shared(nfw, pool=None):
     command = "$compiler $flags $defines $includes $in /link /DLL /out:$lib_name $linker_args"
-    nfw.rule(name="shared", description="Build a shared library.", command=command)
+    nfw.rule(name="shared", description="Build a shared library.", command=command, pool=pool)
     nfw.newline()
 
 
@@ -128,15 +151,14 @@ def get_library_information(lib_infos: List[LibraryInformation]) -> Tuple[List,
 
 
 def get_includes_for_build(build: Dict, parsed_toml: Dict) -> StringList:
-    requires = [build["name"]] + build.get("requires", [])
+    graph = get_build_graph(parsed_toml)
+    requires = [build] + graph.get_transitive_requires(build["name"])
 
     include_paths = set()
 
     project_root = PureWindowsPath(parsed_toml["projectRoot"])
 
-    for required in requires:
-        the_dep = commonbuilds.find_build(required, parsed_toml["builds"])
-
+    for the_dep in requires:
         includes = the_dep.get("includePaths", [])
         includes = windows_convert_strings_to_paths(includes)
         includes = commonbuilds.get_include_paths(includes, project_root)
@@ -173,28 +195,109 @@ def add_compile_rule(writer: Writer,
         cxx_flags = extra_flags + cxx_flags
 
     src_files = get_src_for_build(build, target_file)
-    obj_files = src_to_obj(src_files)
+    phases.count("source files", len(src_files))
+    src_files = commonbuilds.get_unity_src_files(build, target_file, to_str(src_files))
+    src_files = windows_convert_strings_to_paths(src_files)
+    project_root = PureWindowsPath(target_file["projectRoot"])
+    obj_files = commonbuilds.get_object_files(build, src_files, src_to_obj, project_root)
     obj_files = prepend_paths(PureWindowsPath(build_name), obj_files)
     obj_files = convert_posix_to_windows(obj_files)
 
+    # Note, Windows file systems are case insensitive.
+    commonbuilds.check_object_collisions(build_name, to_str(src_files), obj_files, case_sensitive=False)
+    commonbuilds.make_object_directories(build["build_dir"], obj_files)
+
     file_pairs = zip(to_str(src_files), to_str(obj_files))
+    variables = {
+        "launcher": commonbuilds.get_compiler_launcher(build, target_file),
+        "compiler": compiler,
+        "includes": includes,
+        "flags": cxx_flags,
+        "defines": defines,
+    }
+
+    include_launcher = target_file.get("compileCommandsLauncher", False)
+    pch_info, pch_suffixes = add_precompiled_header_rule(writer, build, target_file, variables, src_files)
+
     for src_file, obj_file in file_pairs:
+        implicit = []
+        edge_variables = variables
+        compdb_variables = variables
+
+        if pch_info and PureWindowsPath(src_file).suffix in pch_suffixes:
+            # Tools that read compile_commands.json can't use the .pch, so they are only given the forced include.
+            header = f'"{pch_info["header"]}"'
+            implicit = [pch_info["output"]]
+            pch_flags = [f"/Yu{header}", f"/FI{header}", f"/Fp{pch_info['output']}"]
+            edge_variables = dict(variables, flags=pch_flags + cxx_flags)
+            compdb_variables = dict(variables, flags=[f"/FI{header}"] + cxx_flags)
+
         writer.build(
             outputs=obj_file,
             rule="compile",
             inputs=src_file,
-            variables={
-                "compiler": compiler,
-                "includes": includes,
-                "flags": cxx_flags,
-                "defines": defines,
-            },
+            implicit=implicit,
+            variables=edge_variables,
         )
         writer.newline()
 
+        for compdb_src_file in commonbuilds.get_unity_batch(build, src_file):
+            compdb.add_compile_command(build,
+                                       COMPILE_COMMAND,
+                                       compdb_variables,
+                                       str(PureWindowsPath(compdb_src_file)),
+                                       obj_file,
+                                       include_launcher)
+
+    # The object file created with the precompiled header has to be linked, so it is added to the build's objects.
+    if pch_info and pch_info["build"] == build_name:
+        obj_files.append(pch_info["object"])
+
     return obj_files
 
 
+def add_precompiled_header_rule(writer: Writer,
+                                build: Dict,
+                                target_file: Dict,
+                                variables: Dict,
+                                src_files: List[PureWindowsPath]) -> Tuple[Dict, StringList]:
+    if not build.get("precompiledHeader", None):
+        return None, []
+
+    build_name = build["name"]
+    build_dir = build["build_dir"]
+
+    # /Yc, /Yu and /FI must all name the header in the same way, so the absolute path is used.
+    header_path = commonbuilds.get_precompiled_header_path(build, target_file)
+    header_path = Path(build_dir, header_path).resolve()
+    header = str(PureWindowsPath(header_path))
+    language, suffixes = commonbuilds.get_precompiled_header_language(src_files)
+
+    key = commonbuilds.get_precompiled_header_key(variables, language)
+    pch_info = commonbuilds.find_reusable_precompiled_header(build, target_file, header, key)
+
+    if pch_info is None:
+        # MSVC creates the precompiled header by compiling a source file that includes the header.
+        stub_name = header_path.name + (".cpp" if language == "c++-header" else ".c")
+        stub_file = PureWindowsPath(commonbuilds.write_precompiled_header_stub(build, header_path, stub_name))
+
+        output = str(stub_file.with_suffix(".pch"))
+        pch_object = str(stub_file) + ".obj"
+        writer.build(
+            outputs=output,
+            rule="pch",
+            inputs=str(stub_file),
+            implicit=[header],
+            implicit_outputs=[pch_object],
+            variables=dict(variables, header=f'"{header}"', pch_object=pch_object),
+        )
+        writer.newline()
+        pch_info = {"build": build_name, "header": header, "key": key, "output": output, "object": pch_object}
+
+    build["precompiled_header"] = pch_info
+    return pch_info, suffixes
+
+
 def generate_linker_args(build: Dict, parsed_toml: Dict):
     lib_infos = commonbuilds.get_required_library_information(build, parsed_toml)
 
@@ -252,6 +355,7 @@ def run_build(build: Dict, parsed_toml: Dict, ninja_writer: Writer, args):
     build_path.mkdir(parents=True, exist_ok=True)
 
     build["buildPath"] = build_path
+    build["compile_commands"] = []
 
     if the_build == BuildTypes.staticLibrary:
         build_static_library(
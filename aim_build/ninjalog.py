@@ -0,0 +1,217 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Set
+
+from aim_build.utils import write_if_changed
+
+NINJA_LOG_FILE_NAME = ".ninja_log"
+
+# The entries that were in the ninja log just before Aim last ran ninja.
+LOG_MARK_FILE_NAME = ".aim_ninja_log_mark.json"
+
+COMPILE_SUFFIXES = [".o", ".obj", ".gch", ".pch"]
+ARCHIVE_SUFFIXES = [".a", ".lib"]
+
+# The outputs that Aim regenerates itself rather than any build.
+GENERATOR_OUTPUTS = ["build.ninja"]
+
+COMPILE = "compile"
+ARCHIVE = "archive"
+LINK = "link"
+GENERATOR = "generator"
+
+
+@dataclass
+class LogEntry:
+    start: int
+    end: int
+    output: str
+    mtime: int = 0
+    command_hash: str = ""
+
+    @property
+    def duration(self) -> float:
+        return (self.end - self.start) / 1000
+
+
+def parse_ninja_log(text: str) -> List[LogEntry]:
+    # Each line is: <start ms> <end ms> <mtime> <output> <command hash>, separated by tabs. The format of the lines is
+    # the same for log versions 5 to 7.
+    lines = text.splitlines()
+    if not lines or not lines[0].startswith("# ninja log v"):
+        raise RuntimeError("The ninja log is not in a supported format.")
+
+    entries = []
+    for line in lines[1:]:
+        fields = line.split("\t")
+        if len(fields) != 5:
+            continue
+        entries.append(LogEntry(int(fields[0]), int(fields[1]), fields[3], int(fields[2]), fields[4]))
+
+    return entries
+
+
+def get_entry_key(entry: LogEntry) -> str:
+    # Times are relative to the start of each run, so an entry that was written again by a later run almost always has
+    # different times, and a different mtime if its output changed.
+    line = f"{entry.start}\t{entry.end}\t{entry.mtime}\t{entry.output}"
+    return hashlib.sha1(line.encode("utf-8")).hexdigest()[:16]
+
+
+def get_last_run(entries: List[LogEntry], marked_keys: Set[str]) -> List[LogEntry]:
+    # The last run is every entry that was added or rewritten since the log was marked. The order of the log can't be
+    # used to find the start of the last run, as "ninja -t restat" and ninja's recompaction of the log rewrite it.
+    new_entries = [entry for entry in entries if get_entry_key(entry) not in marked_keys]
+
+    # An output that is built several times, such as build.ninja, is only counted once.
+    return list(get_latest_entries(new_entries).values())
+
+
+def get_latest_entries(entries: List[LogEntry]) -> Dict[str, LogEntry]:
+    latest = {}
+    for entry in entries:
+        latest[entry.output] = entry
+    return latest
+
+
+def read_entries(build_dir: Path) -> List[LogEntry]:
+    log_path = build_dir / NINJA_LOG_FILE_NAME
+    if not log_path.exists():
+        raise RuntimeError(f"Failed to find {str(log_path)}. Has the target been built?")
+
+    return parse_ninja_log(log_path.read_text())
+
+
+def mark_log(build_dir: Path):
+    # Records the entries of the log just before running ninja, so the entries of the run can be told apart later.
+    log_path = build_dir / NINJA_LOG_FILE_NAME
+    try:
+        entries = parse_ninja_log(log_path.read_text())
+    except (OSError, RuntimeError):
+        entries = []
+
+    keys = sorted({get_entry_key(entry) for entry in entries})
+    write_if_changed(build_dir / LOG_MARK_FILE_NAME, json.dumps(keys))
+
+
+def read_log_mark(build_dir: Path) -> Set[str]:
+    mark_path = build_dir / LOG_MARK_FILE_NAME
+    try:
+        return set(json.loads(mark_path.read_text()))
+    except OSError:
+        raise RuntimeError(f"Failed to find {str(mark_path)}. Has the target been built with aim build?")
+    except ValueError as exception:
+        raise RuntimeError(f"Failed to read {str(mark_path)}: {exception}")
+
+
+def read_last_run(build_dir: Path) -> List[LogEntry]:
+    return get_last_run(read_entries(build_dir), read_log_mark(build_dir))
+
+
+def is_compile(output: str) -> bool:
+    return PurePosixPath(output).suffix in COMPILE_SUFFIXES
+
+
+def get_edges(entries: List[LogEntry]) -> List[List[LogEntry]]:
+    # Ninja logs each output of an edge separately, with the same times and command hash, e.g. the .dll, .lib and .exp
+    # of a Windows dynamic library. The first output of an edge is its explicit output.
+    edges = {}
+    for entry in entries:
+        edges.setdefault((entry.start, entry.end, entry.command_hash), []).append(entry)
+    return list(edges.values())
+
+
+def get_edge_kind(outputs: List[str]) -> str:
+    if any(output in GENERATOR_OUTPUTS or get_build_name(output) == "(none)" for output in outputs):
+        return GENERATOR
+    if any(is_compile(output) for output in outputs):
+        return COMPILE
+    if all(PurePosixPath(output).suffix in ARCHIVE_SUFFIXES for output in outputs):
+        return ARCHIVE
+    return LINK
+
+
+def get_build_name(output: str) -> str:
+    # Aim writes every output of a build to a directory named after the build.
+    parts = PurePosixPath(output).parts
+    return parts[0] if len(parts) > 1 else "(none)"
+
+
+def make_report(entries: List[LogEntry], count: int) -> Dict:
+    # Each edge is counted once, under the kind of step it is. Regenerating build.ninja doesn't belong to any build, so
+    # it is only reported as the generator time.
+    kinds = {}
+    generator_time = 0.0
+    for edge in get_edges(entries):
+        kind = get_edge_kind([entry.output for entry in edge])
+        if kind == GENERATOR:
+            generator_time += edge[0].duration
+        else:
+            kinds[edge[0].output] = kind
+    entries = [entry for entry in entries if kinds.get(entry.output, None)]
+
+    wall_time = 0.0
+    if entries:
+        wall_time = (max(entry.end for entry in entries) - min(entry.start for entry in entries)) / 1000
+
+    cpu_time = sum(entry.duration for entry in entries)
+
+    builds = {}
+    for entry in entries:
+        build = builds.setdefault(get_build_name(entry.output), {COMPILE: 0.0, ARCHIVE: 0.0, LINK: 0.0, "edges": 0})
+        build[kinds[entry.output]] += entry.duration
+        build["edges"] += 1
+
+    by_duration = sorted(entries, key=lambda entry: entry.duration, reverse=True)
+
+    def get_slowest(kind):
+        return [
+            {"output": entry.output, "time": entry.duration} for entry in by_duration if kinds[entry.output] == kind
+        ]
+
+    return {
+        "edges": len(entries),
+        "wallTime": round(wall_time, 3),
+        "cpuTime": round(cpu_time, 3),
+        "parallelism": round(cpu_time / wall_time, 2) if wall_time else 0.0,
+        "builds": {
+            name: {key: round(value, 3) for key, value in build.items()} for name, build in sorted(builds.items())
+        },
+        "generatorTime": round(generator_time, 3),
+        "slowestCompiles": get_slowest(COMPILE)[:count],
+        "archives": get_slowest(ARCHIVE),
+        "links": get_slowest(LINK),
+    }
+
+
+def compare_reports(previous: Dict, current: Dict) -> List[Dict]:
+    # Compares the total time of each build. Builds that only exist in one of the reports count as zero in the other.
+    names = sorted(set(previous["builds"]) | set(current["builds"]))
+
+    def total(report, name):
+        build = report["builds"].get(name, None)
+        # Note, reports saved before archives were reported separately counted them as links.
+        return build["compile"] + build.get("archive", 0.0) + build["link"] if build else 0.0
+
+    comparison = []
+    for name in names:
+        old_time = total(previous, name)
+        new_time = total(current, name)
+        change = 100 * (new_time - old_time) / old_time if old_time else None
+        comparison.append({
+            "build": name,
+            "previous": round(old_time, 3),
+            "current": round(new_time, 3),
+            "change": change,
+        })
+
+    return comparison
+
+
+def load_report(path: Path) -> Dict:
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError) as exception:
+        raise RuntimeError(f"Failed to read the report {str(path)}: {exception}")
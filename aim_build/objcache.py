@@ -0,0 +1,317 @@
+"""
+A local object file cache that Aim uses as a compiler launcher.
+
+Usage:
+    python -m aim_build.objcache <compiler> <compiler arguments>
+
+The cache key is the compiler's identity, the full list of arguments and the preprocessed source. A cache entry stores
+the object file, the depfile and the compiler's output, so ninja sees exactly what it would have seen if the compiler
+had been run. Compiles that can't be cached, such as creating or using an MSVC precompiled header, run the compiler
+as normal.
+"""
+import hashlib
+import marshal
+import os
+import random
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from aim_build.utils import atomic_write
+
+CACHE_DIR_VARIABLE = "AIM_CACHE_DIR"
+CACHE_SIZE_VARIABLE = "AIM_CACHE_SIZE"
+DEFAULT_CACHE_SIZE = 5 * 1024 ** 3
+
+# Increment when the format of the entries changes, so old entries are never used.
+CACHE_VERSION = "1"
+
+STATS_FILE_NAME = "stats"
+HIT = b"h"
+MISS = b"m"
+
+# Checking the size of the cache means looking at every entry, so it is only done after some of the stores.
+PRUNE_PROBABILITY = 1 / 64
+
+SIZE_SUFFIXES = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def get_cache_dir() -> Path:
+    cache_dir = os.environ.get(CACHE_DIR_VARIABLE, None)
+    if cache_dir:
+        return Path(cache_dir)
+    return Path.home() / ".cache" / "aim"
+
+
+def parse_size(size: str) -> int:
+    # Sizes are in bytes, or use a K, M or G suffix, e.g. "10G".
+    size = size.strip().upper()
+    if size and size[-1] in SIZE_SUFFIXES:
+        return int(float(size[:-1]) * SIZE_SUFFIXES[size[-1]])
+    return int(size)
+
+
+def get_max_size() -> int:
+    size = os.environ.get(CACHE_SIZE_VARIABLE, None)
+    return parse_size(size) if size else DEFAULT_CACHE_SIZE
+
+
+def get_launcher() -> str:
+    return f'"{sys.executable}" -m aim_build.objcache'
+
+
+class GccCommand:
+    # Understands the compile commands of gccbuilds: <compiler> ... -MMD -MF <depfile> ... -c <src> -o <obj>
+    def __init__(self, args: List[str]):
+        self.args = args
+        self.output = None
+        self.depfile = None
+
+        index = 0
+        while index < len(args):
+            arg = args[index]
+            if arg == "-o" and index + 1 < len(args):
+                self.output = args[index + 1]
+                index += 1
+            elif arg == "-MF" and index + 1 < len(args):
+                self.depfile = args[index + 1]
+                index += 1
+            index += 1
+
+    def is_cacheable(self) -> bool:
+        # Precompiling a header produces a .gch rather than an object file.
+        return self.output is not None and "-c" in self.args and "-x" not in self.args
+
+    def preprocess_args(self) -> List[str]:
+        args = []
+        skip = False
+        for arg in self.args:
+            if skip:
+                skip = False
+            elif arg in ["-o", "-MF"]:
+                skip = True
+            elif arg not in ["-c", "-MMD", "-MD"]:
+                args.append(arg)
+        return args + ["-E"]
+
+
+class MsvcCommand:
+    # Understands the compile commands of msvcbuilds: <compiler> ... /showIncludes /c <src> /Fo<obj>
+    def __init__(self, args: List[str]):
+        self.args = args
+        self.depfile = None
+        self.output = None
+
+        for arg in args:
+            if arg.startswith("/Fo"):
+                self.output = arg[3:]
+
+    def is_cacheable(self) -> bool:
+        # The state of an MSVC precompiled header can't be captured by preprocessing, so compiles that create or use
+        # one are not cached.
+        uses_pch = any(arg.startswith("/Yc") or arg.startswith("/Yu") for arg in self.args)
+        return self.output is not None and "/c" in self.args and not uses_pch
+
+    def preprocess_args(self) -> List[str]:
+        # Note, /showIncludes is kept out, as the includes are replayed from the stored output on a cache hit.
+        args = [arg for arg in self.args if arg not in ["/c", "/showIncludes"] and not arg.startswith("/Fo")]
+        return args + ["/E"]
+
+
+def parse_command(args: List[str]):
+    if any(arg.startswith("/Fo") for arg in args):
+        return MsvcCommand(args)
+    return GccCommand(args)
+
+
+def get_compiler_identity(compiler: str) -> str:
+    # The compiler is identified by its path, size and modification time, so upgrading the compiler invalidates the
+    # cache without having to run it.
+    path = shutil.which(compiler) or compiler
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return path
+    return f"{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def compute_key(compiler: str, args: List[str], preprocessed: bytes) -> str:
+    hasher = hashlib.sha256()
+    hasher.update(CACHE_VERSION.encode("utf-8"))
+    hasher.update(b"\0")
+    hasher.update(get_compiler_identity(compiler).encode("utf-8"))
+    for arg in args:
+        hasher.update(b"\0")
+        hasher.update(arg.encode("utf-8"))
+    hasher.update(b"\0")
+    hasher.update(preprocessed)
+    return hasher.hexdigest()
+
+
+def get_entry_path(cache_dir: Path, key: str) -> Path:
+    return cache_dir / key[:2] / key
+
+
+def write_entry_file(path: Path, content: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, content)
+
+
+def read_entry(entry_path: Path) -> Optional[Dict]:
+    try:
+        entry = marshal.loads(entry_path.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    # The modification time of an entry is its last use, which is used to evict the least recently used entries.
+    try:
+        os.utime(str(entry_path))
+    except OSError:
+        pass
+    return entry
+
+
+def record(cache_dir: Path, result: bytes):
+    # Every compile appends one byte, which is atomic for small appends, so concurrent compiles don't need a lock.
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(str(cache_dir / STATS_FILE_NAME), "ab") as stats_file:
+            stats_file.write(result)
+    except OSError:
+        pass
+
+
+def run_compiler(args: List[str]) -> Tuple[int, bytes, bytes]:
+    result = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return result.returncode, result.stdout, result.stderr
+
+
+def write_output(stdout: bytes, stderr: bytes):
+    sys.stdout.buffer.write(stdout)
+    sys.stdout.buffer.flush()
+    sys.stderr.buffer.write(stderr)
+    sys.stderr.buffer.flush()
+
+
+def compile_with_cache(args: List[str], cache_dir: Path) -> int:
+    compiler = args[0]
+    command = parse_command(args[1:])
+
+    if not command.is_cacheable():
+        return subprocess.call(args)
+
+    ret_code, preprocessed, _ = run_compiler([compiler] + command.preprocess_args())
+    if ret_code != 0:
+        # Let the compiler report the error.
+        return subprocess.call(args)
+
+    key = compute_key(compiler, args[1:], preprocessed)
+    entry_path = get_entry_path(cache_dir, key)
+
+    entry = read_entry(entry_path)
+    if entry is not None:
+        write_entry_file(Path(command.output), entry["object"])
+        if command.depfile and entry["depfile"] is not None:
+            write_entry_file(Path(command.depfile), entry["depfile"])
+        write_output(entry["stdout"], entry["stderr"])
+        record(cache_dir, HIT)
+        return 0
+
+    ret_code, stdout, stderr = run_compiler(args)
+    write_output(stdout, stderr)
+    record(cache_dir, MISS)
+    if ret_code != 0:
+        return ret_code
+
+    depfile = None
+    if command.depfile:
+        depfile = Path(command.depfile).read_bytes()
+
+    entry = {
+        "object": Path(command.output).read_bytes(),
+        "depfile": depfile,
+        "stdout": stdout,
+        "stderr": stderr,
+    }
+    write_entry_file(entry_path, marshal.dumps(entry))
+
+    if random.random() < PRUNE_PROBABILITY:
+        prune(cache_dir, get_max_size())
+
+    return 0
+
+
+def get_entries(cache_dir: Path) -> List[Tuple[float, int, Path]]:
+    entries = []
+    if not cache_dir.is_dir():
+        return entries
+
+    for sub_dir in os.scandir(str(cache_dir)):
+        if not sub_dir.is_dir():
+            continue
+        for entry in os.scandir(sub_dir.path):
+            if entry.name.startswith("."):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+
+    return entries
+
+
+def prune(cache_dir: Path, max_size: int) -> Tuple[int, int]:
+    # Evicts the least recently used entries until the cache is no larger than max_size.
+    entries = sorted(get_entries(cache_dir))
+    total_size = sum(size for _, size, _ in entries)
+
+    removed_count = 0
+    removed_size = 0
+    for _, size, path in entries:
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(str(path))
+        except OSError:
+            continue
+        total_size -= size
+        removed_count += 1
+        removed_size += size
+
+    return removed_count, removed_size
+
+
+def clear(cache_dir: Path):
+    if cache_dir.is_dir():
+        shutil.rmtree(str(cache_dir))
+
+
+def get_stats(cache_dir: Path) -> Dict:
+    try:
+        results = (cache_dir / STATS_FILE_NAME).read_bytes()
+    except OSError:
+        results = b""
+
+    entries = get_entries(cache_dir)
+    return {
+        "hits": results.count(HIT),
+        "misses": results.count(MISS),
+        "entries": len(entries),
+        "size": sum(size for _, size, _ in entries),
+        "maxSize": get_max_size(),
+    }
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python -m aim_build.objcache <compiler> <compiler arguments>")
+        sys.exit(-1)
+
+    sys.exit(compile_with_cache(sys.argv[1:], get_cache_dir()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import contextlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from aim_build.utils import write_if_changed
+
+PHASES_FILE_NAME = ".aim_phases.json"
+
+# The phases of the current Aim command, in the order they finished.
+recorded_phases = []
+
+# Counts of the things Aim processed, such as builds and source files, for profiling.
+recorded_counts = {}
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    # Start times are wall clock times, so the phases can be lined up with ninja's edges later on.
+    start = time.time()
+    counter_start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorded_phases.append({"name": name, "start": start, "duration": time.perf_counter() - counter_start})
+
+
+def get_phases() -> List[Dict]:
+    return list(recorded_phases)
+
+
+def reset():
+    recorded_phases.clear()
+
+
+def count(name: str, value: int):
+    recorded_counts[name] = recorded_counts.get(name, 0) + value
+
+
+def get_counts() -> Dict[str, int]:
+    return dict(recorded_counts)
+
+
+def reset_counts():
+    recorded_counts.clear()
+
+
+def save_phases(build_dir: Path):
+    write_if_changed(build_dir / PHASES_FILE_NAME, json.dumps(get_phases(), indent=2) + "\n")
+
+
+def append_saved_phase(build_dir: Path, name: str, start: float, duration: float):
+    # Adds a phase to the phases that were saved by another process, such as the worker that generated a target.
+    saved_phases = load_phases(build_dir) + [{"name": name, "start": start, "duration": duration}]
+    write_if_changed(build_dir / PHASES_FILE_NAME, json.dumps(saved_phases, indent=2) + "\n")
+
+
+def load_phases(build_dir: Path) -> List[Dict]:
+    try:
+        return json.loads((build_dir / PHASES_FILE_NAME).read_text())
+    except (OSError, ValueError):
+        return []
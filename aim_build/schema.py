@@ -1,17 +1,19 @@
 import pprint
 import sys
 from pathlib import Path
-from typing import Union, List
+from collections.abc import Mapping, Sequence, Sized
+from typing import Dict, List, Optional, Set, Union
 
 import cerberus
 
 from aim_build.commonbuilds import BuildTypes
+from aim_build.fssnapshot import FileSystemSnapshot
 from aim_build.utils import to_native_path
 
 
 class UniqueNameChecker:
     def __init__(self):
-        self.name_lookup = []
+        self.name_lookup = set()
 
     def check(self, field, value, error):
         if value in self.name_lookup:
@@ -20,7 +22,7 @@ class UniqueNameChecker:
                 f'The build name must be unique. "{value}" has already been used.',
             )
         else:
-            self.name_lookup.append(value)
+            self.name_lookup.add(value)
 
 
 # TODO: Can DefinesPrefixChecker be a function?
@@ -37,20 +39,24 @@ class DefinesPrefixChecker:
 class RequiresExistChecker:
     def __init__(self, document):
         self.doc = document
+        self.build_names = None
 
     def check(self, field, requires, error):
-        builds = self.doc["builds"]
+        # The names are indexed on first use, so each requirement is a set lookup rather than a scan of the builds.
+        if self.build_names is None:
+            builds = [build for build in self.doc["builds"] if isinstance(build, dict)]
+            self.build_names = {build["name"] for build in builds if isinstance(build.get("name", None), str)}
+
         for value in requires:
-            for build in builds:
-                if value == build["name"]:
-                    break
-            else:
+            if value not in self.build_names:
                 error(field, f"Build name does not exist: {value}")
 
 
 class DirectoryPathChecker:
-    def __init__(self, project_dir):
+    def __init__(self, project_dir, touched_paths: Set[Path], snapshot: FileSystemSnapshot):
         self.project_dir = project_dir
+        self.touched_paths = touched_paths
+        self.snapshot = snapshot
 
     def check(self, field, paths, error):
         abs_paths = [Path(path) for path in paths if Path(path).is_absolute() is True]
@@ -60,18 +66,37 @@ class DirectoryPathChecker:
         all_paths = abs_paths + rel_paths
 
         for path in all_paths:
-            if not path.is_dir():
+            self.touched_paths.add(path)
+            if not self.snapshot.is_dir(path):
                 error(field, f'Path is not a directory: "{str(path)}"')
                 break
 
-            if not path.exists():
+            if not self.snapshot.exists(path):
                 error(field, f'Path does not exist: "{str(path)}"')
                 break
 
 
+class FilePathChecker:
+    def __init__(self, project_dir, touched_paths: Set[Path], snapshot: FileSystemSnapshot):
+        self.project_dir = project_dir
+        self.touched_paths = touched_paths
+        self.snapshot = snapshot
+
+    def check(self, field, path, error):
+        path = to_native_path(path)
+        if not path.is_absolute():
+            path = self.project_dir / path
+
+        self.touched_paths.add(path)
+        if not self.snapshot.is_file(path):
+            error(field, f'Path is not a file: "{str(path)}"')
+
+
 class SrcPathsChecker:
-    def __init__(self, project_dir):
+    def __init__(self, project_dir, touched_paths: Set[Path], snapshot: FileSystemSnapshot):
         self.project_dir = project_dir
+        self.touched_paths = touched_paths
+        self.snapshot = snapshot
 
     def check(self, field, paths, error):
         paths = [to_native_path(path) for path in paths]
@@ -95,27 +120,71 @@ class SrcPathsChecker:
 
             elif path.stem == "*":
                 parent = path.parent
-                if not parent.exists():
+                self.touched_paths.add(path)
+                if not self.snapshot.exists(parent):
                     error(field, f'The parent glob directory does not exist: "{str(parent)}"')
                     break
 
-                if len(list(parent.glob(path.name))) == 0:
+                if len(self.snapshot.glob(path)) == 0:
                     error(field, f'The glob does not match any files: "{str(path)}"')
                     break
 
-            elif path.is_dir():
-                error(field, f'Src path is a directory. Src paths should be a glob or a specific file.: "{str(path)}"')
-                break
+            else:
+                self.touched_paths.add(path)
+                if self.snapshot.is_dir(path):
+                    error(field,
+                          f'Src path is a directory. Src paths should be a glob or a specific file.: "{str(path)}"')
+                    break
 
-            elif not path.exists():
-                error(field, f'Path does not exist: "{str(path)}"')
-                break
+                elif not self.snapshot.exists(path):
+                    error(field, f'Path does not exist: "{str(path)}"')
+                    break
+
+
+def check_output_naming_convention(build, field, value: Union[str, list], error):
+    # Only check the convention when building libraries. Exes need more flexibility when building for Arduino etc.
+
+    library_types = [BuildTypes.staticLibrary.name, BuildTypes.dynamicLibrary.name]
+    if build.get("buildRule", None) not in library_types:
+        return
+
+    def check_convention(_field, _value):
+        the_errors = []
+        if _value.startswith("lib"):
+            the_error_str = f"Unnecessary 'lib' prefix in {_value}. Aim will add this automatically."
+            the_errors.append(the_error_str)
+
+        suffix = Path(_value).suffix
+        if suffix:
+            the_error_str = (
+                f'Unecessary suffix "{suffix}". Aim will add this automatically.'
+            )
+            the_errors.append(the_error_str)
+
+        return the_errors
+
+    # Bit of a hack so strings go through the same code path as lists.
+    if isinstance(value, str):
+        value = [value]
+
+    for item in value:
+        errors = check_convention(field, item)
+
+        if errors:
+            plural = ""
+            if len(errors) > 1:
+                plural = "s"
+
+            error_str = f"Naming convention error{plural}: {item}. " + " ".join(
+                errors
+            )
+            error(field, error_str)
 
 
 class AimCustomValidator(cerberus.Validator):
     def __init__(self, *args, **kwargs):
         super(AimCustomValidator, self).__init__(*args, **kwargs)
-        self.name_lookup = []
+        self.name_lookup = set()
 
     def check_output_is_unique(self, field, value):
         if value in self.name_lookup:
@@ -124,56 +193,357 @@ class AimCustomValidator(cerberus.Validator):
                 f'The output name must be unique. "{value}" has already been used.',
             )
         else:
-            self.name_lookup.append(value)
-
-    def _check_with_output_naming_convention(self, field, value: Union[str, list]):
-        # Only check the convention when building libraries. Exes need more flexibility when building for Arduino etc.
-
-        library_types = [BuildTypes.staticLibrary.name, BuildTypes.dynamicLibrary.name]
-        if self.document["buildRule"] not in library_types:
-            return
-
-        def check_convention(_field, _value):
-            the_errors = []
-            if _value.startswith("lib"):
-                the_error_str = f"Unnecessary 'lib' prefix in {_value}. Aim will add this automatically."
-                the_errors.append(the_error_str)
-
-            suffix = Path(_value).suffix
-            if suffix:
-                the_error_str = (
-                    f'Unecessary suffix "{suffix}". Aim will add this automatically.'
-                )
-                the_errors.append(the_error_str)
+            self.name_lookup.add(value)
+
+
+# The types of the rules below, with the same meaning as in cerberus. Note, cerberus treats bools as integers too.
+TYPE_CHECKS = {
+    "string": lambda value: isinstance(value, str),
+    "boolean": lambda value: isinstance(value, bool),
+    "integer": lambda value: isinstance(value, int),
+    "list": lambda value: isinstance(value, Sequence) and not isinstance(value, str),
+    "dict": lambda value: isinstance(value, Mapping),
+}
+
+# The schema of a build. The rules mean the same as they do in cerberus, but the builds are validated by
+# BuildsValidator rather than cerberus, as cerberus is slow on targets with thousands of builds. Fields that start with
+# ^ in dependencies refer to the top level of the target, rather than the build.
+BUILD_SCHEMA = {
+    "name": {
+        "required": True,
+        "type": "string",
+        "check_with": "unique_name",
+    },
+    "buildRule": {
+        "required": True,
+        "type": "string",
+
+        # Validates if exactly one of the provided constraints applies.
+        "oneof": [
+            {
+                # No output, so exclude output name.
+                # Not a dynamic library so exclude visibility and dynamicLoading
+                "excludes": ["outputName", "visibility", "dynamicLoading"],
+                "allowed": ["headerOnly", "libraryReference"],
+            },
+            {
+                # Generates an output so make outputName required.
+                # Not a dynamic library so exclude visibility and dynamicLoading.
+                "excludes": ["visibility", "dynamicLoading"],
+                "dependencies": ["outputName"],
+                "allowed": ["executable", "staticLibrary"],
+            },
+            {
+                # Generates an output so make outputName required.
+                # Allows visibility if frontend is gcc or osx.
+                "dependencies": ["outputName"],
+                "allowed": ["dynamicLibrary"],
+            },
+        ],
+    },
+    "visibility": {
+        "required": False,
+        "type": "string",
+        "allowed": [
+            "hidden",
+            "default"
+        ],
+        "dependencies": {"^compilerFrontend": ["gcc", "osx"]},
+    },
+    "dynamicLoading": {
+        "required": False,
+        "type": "boolean",
+    },
+    "compiler": {
+        "required": False,
+        "type": "string",
+        "dependencies": {
+            "buildRule": ["executable", "staticLibrary", "dynamicLibrary"]
+        },
+    },
+    "linker": {
+        "required": False,
+        "type": "string",
+        "dependencies": {
+            "buildRule": ["executable"]
+        },
+    },
+    "linker_flags": {
+        "required": False,
+        "type": "list",
+        "dependencies": {
+            "buildRule": ["executable"]
+        },
+    },
+    "defines": {
+        "type": "list",
+        "schema": {"type": "string"},
+        "empty": False,
+        "check_with": "defines_prefix",
+        "dependencies": {
+            "buildRule": ["executable", "staticLibrary", "dynamicLibrary"]
+        },
+    },
+    "flags": {
+        "type": "list",
+        "schema": {"type": "string"},
+        "empty": False,
+        "dependencies": {
+            "buildRule": ["executable", "staticLibrary", "dynamicLibrary"]
+        },
+    },
+    "requires": {
+        "type": "list",
+        "empty": False,
+        "schema": {"type": "string"},
+        "check_with": "requires_exist",
+        "dependencies": {
+            "buildRule": ["executable", "staticLibrary", "dynamicLibrary"]
+        },
+    },
+    # Required but the requirement is handled by build rule.
+    "outputName": {
+        "type": "string",
+        "empty": False,
+        "check_with": "output_naming_convention",
+    },
+    "sourceFiles": {
+        "required": False,
+        "empty": False,
+        "type": "list",
+        "schema": {"type": "string"},
+        "check_with": "source_paths",
+        "dependencies": {
+            "buildRule": ["executable", "staticLibrary", "dynamicLibrary"]
+        },
+    },
+    "unityBatchSize": {
+        "required": False,
+        "type": "integer",
+        "min": 1,
+        "dependencies": {
+            "buildRule": ["executable", "staticLibrary", "dynamicLibrary"]
+        },
+    },
+    "unityExclude": {
+        "type": "list",
+        "empty": False,
+        "schema": {"type": "string"},
+        "dependencies": ["unityBatchSize"],
+    },
+    "compilerLauncher": {
+        "type": "string",
+        "empty": False,
+        "dependencies": {
+            "buildRule": ["executable", "staticLibrary", "dynamicLibrary"]
+        },
+    },
+    "precompiledHeader": {
+        "type": "string",
+        "empty": False,
+        "check_with": "file_path",
+        "dependencies": {
+            "buildRule": ["executable", "staticLibrary", "dynamicLibrary"]
+        },
+    },
+    "includePaths": {
+        "type": "list",
+        "empty": False,
+        "schema": {"type": "string"},
+        "check_with": "directory_paths",
+    },
+    "systemIncludePaths": {
+        "type": "list",
+        "empty": False,
+        "schema": {"type": "string"},
+        "check_with": "directory_paths",
+        "dependencies": {"compilerFrontend": "gcc"},
+    },
+    "localIncludePaths": {
+        "type": "list",
+        "empty": False,
+        "schema": {"type": "string"},
+        "check_with": "directory_paths",
+        "dependencies": {"compilerFrontend": "gcc"},
+    },
+    "libraryPaths": {
+        "type": "list",
+        "empty": False,
+        "schema": {"type": "string"},
+        # you can't check the library dirs as they may not exist if the project not built before.
+        # "check_with": path_checker.check,
+        "dependencies": {
+            "buildRule": ["executable", "dynamicLibrary", "libraryReference"]
+        },
+    },
+    "libraries": {
+        "type": "list",
+        "empty": False,
+        "schema": {"type": "string"},
+        "check_with": "output_naming_convention",
+        "dependencies": {
+            "buildRule": ["executable", "dynamicLibrary", "libraryReference"]
+        },
+    },
+}
+
+
+class BuildsValidator:
+    # Validates every build in one pass. The checks that compare builds use sets, so the time taken grows linearly with
+    # the number of builds. The errors have the same messages and layout as cerberus errors, so they are reported in the
+    # same way as the errors of the top level fields.
+    def __init__(self, document, project_dir, touched_paths: Set[Path], snapshot: FileSystemSnapshot):
+        self.document = document
+        self.checkers = {
+            "unique_name": UniqueNameChecker().check,
+            "requires_exist": RequiresExistChecker(document).check,
+            "source_paths": SrcPathsChecker(project_dir, touched_paths, snapshot).check,
+            "directory_paths": DirectoryPathChecker(project_dir, touched_paths, snapshot).check,
+            "file_path": FilePathChecker(project_dir, touched_paths, snapshot).check,
+            "defines_prefix": DefinesPrefixChecker().check,
+        }
+
+    def validate(self, builds: List) -> Dict[int, List]:
+        errors = {}
+        for index, build in enumerate(builds):
+            if not TYPE_CHECKS["dict"](build):
+                errors[index] = ["must be of dict type"]
+                continue
+
+            build_errors = self.validate_build(build)
+            if build_errors:
+                errors[index] = [build_errors]
+
+        return errors
+
+    def validate_build(self, build: Dict) -> Dict[str, List]:
+        errors = {}
+        for field, value in build.items():
+            if field not in BUILD_SCHEMA:
+                errors[field] = ["unknown field"]
+                continue
+
+            field_errors = self.validate_field(build, field, value, BUILD_SCHEMA[field])
+            if field_errors:
+                errors[field] = field_errors
+
+        for field, rules in BUILD_SCHEMA.items():
+            if rules.get("required", False) and field not in build:
+                errors[field] = ["required field"]
+
+        return errors
+
+    def validate_field(self, build: Dict, field: str, value, rules: Dict) -> List:
+        # Each error is stored with the rule that raised it, as cerberus orders the errors of a field by rule name.
+        errors = []
+
+        def add_error(rule, message):
+            errors.append((rule, message))
+
+        if value is None:
+            return ["null value not allowed"]
+
+        if "type" in rules and not TYPE_CHECKS[rules["type"]](value):
+            return [f"must be of {rules['type']} type"]
+
+        skipped_rules = set()
+        if "empty" in rules and isinstance(value, Sized) and len(value) == 0:
+            skipped_rules.update(["allowed", "check_with"])
+            if not rules["empty"]:
+                add_error("empty", "empty values not allowed")
+
+        for rule, constraint in rules.items():
+            if rule in skipped_rules:
+                continue
+
+            if rule == "allowed" and value not in constraint:
+                add_error(rule, f"unallowed value {value}")
+
+            elif rule == "min" and value < constraint:
+                add_error(rule, f"min value is {constraint}")
+
+            elif rule == "excludes" and any(excluded in build for excluded in constraint):
+                exclusion_str = ", ".join(f"'{excluded}'" for excluded in constraint)
+                add_error(rule, f"{exclusion_str} must not be present with '{field}'")
+
+            elif rule == "dependencies":
+                for message in self.check_dependencies(build, constraint):
+                    add_error(rule, message)
+
+            elif rule == "schema":
+                item_errors = {
+                    index: [f"must be of {constraint['type']} type"]
+                    for index, item in enumerate(value) if not TYPE_CHECKS[constraint["type"]](item)
+                }
+                if item_errors:
+                    add_error(rule, item_errors)
+                    # Note, the checkers expect items of the right type.
+                    skipped_rules.add("check_with")
+
+            elif rule == "check_with":
+                def error(_field, message):
+                    add_error("check_with", message)
+
+                if constraint == "output_naming_convention":
+                    check_output_naming_convention(build, field, value, error)
+                else:
+                    self.checkers[constraint](field, value, error)
+
+            elif rule == "oneof":
+                self.check_oneof(build, field, value, rules, constraint, add_error)
+
+        # Messages come before the nested errors of list items and oneof definitions, as they do in cerberus.
+        errors.sort(key=lambda item: (isinstance(item[1], dict), item[0]))
+        return [message for _, message in errors]
+
+    def check_dependencies(self, build: Dict, dependencies) -> List[str]:
+        if isinstance(dependencies, list):
+            return [f"field '{dependency}' is required" for dependency in dependencies if dependency not in build]
+
+        for dependency, values in dependencies.items():
+            if dependency.startswith("^"):
+                dependency_value = self.document.get(dependency[1:], None)
+            else:
+                dependency_value = build.get(dependency, None)
 
-            return the_errors
+            if not isinstance(values, list):
+                values = [values]
 
-        # Bit of a hack so strings go through the same code path as lists.
-        if isinstance(value, str):
-            value = [value]
+            if dependency_value not in values:
+                return [f"depends on these values: {dependencies}"]
 
-        for item in value:
-            # self.check_output_is_unique(field, item)
-            errors = check_convention(field, item)
+        return []
 
+    def check_oneof(self, build: Dict, field: str, value, rules: Dict, definitions: List[Dict], add_error):
+        valid_count = 0
+        definition_errors = {}
+        for index, definition in enumerate(definitions):
+            definition = dict(definition, type=rules["type"]) if "type" in rules else definition
+            errors = self.validate_field(build, field, value, definition)
             if errors:
-                plural = ""
-                if len(errors) > 1:
-                    plural = "s"
+                definition_errors[f"oneof definition {index}"] = errors
+            else:
+                valid_count += 1
+
+        if valid_count != 1:
+            add_error("oneof", "none or more than one rule validate")
+            add_error("oneof", definition_errors)
 
-                error_str = f"Naming convention error{plural}: {item}. " + " ".join(
-                    errors
-                )
-                self._error(field, error_str)
 
+def target_schema(document,
+                  project_dir,
+                  touched_paths: Optional[Set[Path]] = None,
+                  snapshot: Optional[FileSystemSnapshot] = None):
+    # The paths and globs that the checkers look at are added to touched_paths, so the result of the validation can be
+    # cached. The checkers look at the file system through the snapshot, which can be shared with generation.
+    if touched_paths is None:
+        touched_paths = set()
+    if snapshot is None:
+        snapshot = FileSystemSnapshot()
 
-def target_schema(document, project_dir):
-    unique_name_checker = UniqueNameChecker()
-    requires_exist_checker = RequiresExistChecker(document)
-    source_path_checker = SrcPathsChecker(project_dir)
-    directory_path_checker = DirectoryPathChecker(project_dir)
     defines_checker = DefinesPrefixChecker()
 
+    # Note, cerberus only validates the top level fields. The builds are validated by BuildsValidator.
     schema = {
         "compiler": {"required": True, "type": "string"},
         "archiver": {"required": True, "type": "string"},
@@ -193,6 +563,27 @@ def target_schema(document, project_dir):
             "empty": False,
             "check_with": defines_checker.check,
         },
+        "compilerLauncher": {
+            "type": "string",
+            "empty": False,
+        },
+        "objectCache": {
+            "type": "boolean",
+        },
+        "compileCommandsLauncher": {
+            "type": "boolean",
+        },
+        "fileSystemCache": {
+            "type": "boolean",
+        },
+        "linkPool": {
+            "type": "integer",
+            "min": 1,
+        },
+        "compileCommands": {
+            "type": "string",
+            "allowed": ["merged", "fragments", "none"],
+        },
         "projectRoot": {
             "required": True,
             "type": "string",
@@ -201,186 +592,34 @@ def target_schema(document, project_dir):
         "builds": {
             "required": True,
             "type": "list",
-            "schema": {
-                "type": "dict",
-                "schema": {
-                    "name": {
-                        "required": True,
-                        "type": "string",
-                        "check_with": unique_name_checker.check,
-                    },
-                    "buildRule": {
-                        "required": True,
-                        "type": "string",
-
-                        # Validates if exactly one of the provided constraints applies.
-                        "oneof": [
-                            {
-                                # No output, so exclude output name.
-                                # Not a dynamic library so exclude visibility and dynamicLoading
-                                "excludes": ["outputName", "visibility", "dynamicLoading"],
-                                "allowed": ["headerOnly", "libraryReference"],
-                            },
-                            {
-                                # Generates an output so make outputName required.
-                                # Not a dynamic library so exclude visibility and dynamicLoading.
-                                "excludes": ["visibility", "dynamicLoading"],
-                                "dependencies": ["outputName"],
-                                "allowed": ["executable", "staticLibrary"],
-                            },
-                            {
-                                # Generates an output so make outputName required.
-                                # Allows visibility if frontend is gcc or osx.
-                                "dependencies": ["outputName"],
-                                "allowed": ["dynamicLibrary"],
-                            },
-                        ],
-                    },
-                    "visibility": {
-                        "required": False,
-                        "type": "string",
-                        "allowed": [
-                            "hidden",
-                            "default"
-                        ],
-                        "dependencies": {"^compilerFrontend": ["gcc", "osx"]},
-                    },
-                    "dynamicLoading": {
-                        "required": False,
-                        "type": "boolean",
-                    },
-                    "compiler": {
-                        "required": False,
-                        "type": "string",
-                        "dependencies": {
-                            "buildRule": ["executable", "staticLibrary", "dynamicLibrary"]
-                        },
-                    },
-                    "linker": {
-                        "required": False,
-                        "type": "string",
-                        "dependencies": {
-                            "buildRule": ["executable"]
-                        },
-                    },
-                    "linker_flags": {
-                        "required": False,
-                        "type": "list",
-                        "dependencies": {
-                            "buildRule": ["executable"]
-                        },
-                    },
-                    "defines": {
-                        "type": "list",
-                        "schema": {"type": "string"},
-                        "empty": False,
-                        "check_with": defines_checker.check,
-                        "dependencies": {
-                            "buildRule": ["executable", "staticLibrary", "dynamicLibrary"]
-                        },
-                    },
-                    "flags": {
-                        "type": "list",
-                        "schema": {"type": "string"},
-                        "empty": False,
-                        "dependencies": {
-                            "buildRule": ["executable", "staticLibrary", "dynamicLibrary"]
-                        },
-                    },
-                    "requires": {
-                        "type": "list",
-                        "empty": False,
-                        "schema": {"type": "string"},
-                        "check_with": requires_exist_checker.check,
-                        "dependencies": {
-                            "buildRule": ["executable", "staticLibrary", "dynamicLibrary"]
-                        },
-                    },
-                    # Required but the requirement is handled by build rule.
-                    "outputName": {
-                        "type": "string",
-                        "empty": False,
-                        "check_with": "output_naming_convention",
-                    },
-                    "sourceFiles": {
-                        "required": False,
-                        "empty": False,
-                        "type": "list",
-                        "schema": {"type": "string"},
-                        "check_with": source_path_checker.check,
-                        "dependencies": {
-                            "buildRule": ["executable", "staticLibrary", "dynamicLibrary"]
-                        },
-                    },
-                    "includePaths": {
-                        "type": "list",
-                        "empty": False,
-                        "schema": {"type": "string"},
-                        "check_with": directory_path_checker.check,
-                    },
-                    "systemIncludePaths": {
-                        "type": "list",
-                        "empty": False,
-                        "schema": {"type": "string"},
-                        "check_with": directory_path_checker.check,
-                        "dependencies": {"compilerFrontend": "gcc"},
-                    },
-                    "localIncludePaths": {
-                        "type": "list",
-                        "empty": False,
-                        "schema": {"type": "string"},
-                        "check_with": directory_path_checker.check,
-                        "dependencies": {"compilerFrontend": "gcc"},
-                    },
-                    "libraryPaths": {
-                        "type": "list",
-                        "empty": False,
-                        "schema": {"type": "string"},
-                        # you can't check the library dirs as they may not exist if the project not built before.
-                        # "check_with": path_checker.check,
-                        "dependencies": {
-                            "buildRule": ["executable", "dynamicLibrary", "libraryReference"]
-                        },
-                    },
-                    "libraries": {
-                        "type": "list",
-                        "empty": False,
-                        "schema": {"type": "string"},
-                        "check_with": "output_naming_convention",
-                        "dependencies": {
-                            "buildRule": ["executable", "dynamicLibrary", "libraryReference"]
-                        },
-                    },
-                },
-            },
         },
     }
 
     validator = AimCustomValidator()
     validator.validate(document, schema)
 
+    builds_errors = {}
+    if "builds" not in validator.errors:
+        builds_errors = BuildsValidator(document, project_dir, touched_paths, snapshot).validate(document["builds"])
+
     pretty = pprint.PrettyPrinter(indent=2, width=100)
 
     # TODO: Handle schema errors. https://docs.python-cerberus.org/en/stable/errors.html
-    if validator.errors:
+    if validator.errors or builds_errors:
         for key, value in validator.errors.items():
-            if key != "builds":
-                print(f'Error for field "{key}"')
-                pretty.pprint(f"{value}")
-                print()
-
-        builds_errors = validator.errors.get("builds", {})
-        if builds_errors:
-            assert len(builds_errors) == 1, "Build error list size is greater than 1."
-            for key, value in builds_errors[0].items():
-                builds = document["builds"]
-                the_build = builds[key]
-                the_build_name = the_build["name"]
-
-                print(f'Error in build: "{the_build_name}"')
-                assert (
-                        len(value) == 1
-                ), "Length is not 1. Not sure if it can ever be more than."
-                pretty.pprint(value[0])
-                print()
+            print(f'Error for field "{key}"')
+            pretty.pprint(f"{value}")
+            print()
+
+        for key, value in builds_errors.items():
+            builds = document["builds"]
+            the_build = builds[key]
+            the_build_name = the_build.get("name", key) if isinstance(the_build, dict) else key
+
+            print(f'Error in build: "{the_build_name}"')
+            assert (
+                    len(value) == 1
+            ), "Length is not 1. Not sure if it can ever be more than."
+            pretty.pprint(value[0])
+            print()
         sys.exit(-1)
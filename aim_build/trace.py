@@ -0,0 +1,81 @@
+import heapq
+from typing import Dict, List
+
+from aim_build.ninjalog import LogEntry, get_build_name
+
+AIM_PROCESS_ID = 0
+NINJA_PROCESS_ID = 1
+
+# The name of the phase that runs ninja. The times in the ninja log are relative to the start of this phase.
+NINJA_PHASE_NAME = "ninja"
+
+
+def to_microseconds(seconds: float) -> int:
+    return int(round(seconds * 1e6))
+
+
+def assign_slots(entries: List[LogEntry]) -> List[int]:
+    # Ninja doesn't record which job slot ran an edge, so each edge is given the lowest slot that is free when it
+    # starts. The number of slots in use at any time then matches the number of jobs that were running.
+    order = sorted(range(len(entries)), key=lambda index: (entries[index].start, entries[index].end))
+    slots = [0] * len(entries)
+    busy = []
+    free = []
+    slot_count = 0
+
+    for index in order:
+        entry = entries[index]
+        while busy and busy[0][0] <= entry.start:
+            _, slot = heapq.heappop(busy)
+            heapq.heappush(free, slot)
+
+        if free:
+            slot = heapq.heappop(free)
+        else:
+            slot = slot_count
+            slot_count += 1
+
+        slots[index] = slot
+        heapq.heappush(busy, (entry.end, slot))
+
+    return slots
+
+
+def make_metadata_event(process_id: int, name: str) -> Dict:
+    return {"name": "process_name", "ph": "M", "pid": process_id, "tid": 0, "args": {"name": name}}
+
+
+def make_trace(phases: List[Dict], entries: List[LogEntry]) -> Dict:
+    # Produces the Chrome trace event format, which can be opened with chrome://tracing or https://ui.perfetto.dev.
+    # Times are relative to the first phase.
+    events = [make_metadata_event(AIM_PROCESS_ID, "aim"), make_metadata_event(NINJA_PROCESS_ID, "ninja")]
+
+    origin = min(phase["start"] for phase in phases) if phases else 0.0
+    ninja_start = 0.0
+    for phase in phases:
+        start = phase["start"] - origin
+        if phase["name"] == NINJA_PHASE_NAME:
+            ninja_start = start
+
+        events.append({
+            "name": phase["name"],
+            "cat": "aim",
+            "ph": "X",
+            "ts": to_microseconds(start),
+            "dur": to_microseconds(phase["duration"]),
+            "pid": AIM_PROCESS_ID,
+            "tid": 0,
+        })
+
+    for entry, slot in zip(entries, assign_slots(entries)):
+        events.append({
+            "name": entry.output,
+            "cat": get_build_name(entry.output),
+            "ph": "X",
+            "ts": to_microseconds(ninja_start + entry.start / 1000),
+            "dur": to_microseconds(entry.duration),
+            "pid": NINJA_PROCESS_ID,
+            "tid": slot,
+        })
+
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
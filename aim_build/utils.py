@@ -1,17 +1,51 @@
 import itertools
 import os
+import posixpath
+import secrets
 from pathlib import Path, PurePath, PurePosixPath
 from typing import List, Union, Iterable
 
 from aim_build.typedefs import PathList, PurePathList, StringList, T
 
 
-def src_to_obj(files) -> StringList:
-    return [x.stem + ".obj" for x in files]
+def to_project_relative_path(src_file: PurePath, project_root: PurePath) -> PurePosixPath:
+    # The location of a source file relative to the project root, without any .. parts. Sources outside the project
+    # root replace each .. with __, and absolute sources drop their root or drive.
+    src_file = to_pure_posix_path(src_file)
+    project_root = to_pure_posix_path(project_root)
 
+    if src_file.is_absolute() or ":" in src_file.parts[0]:
+        parts = [part.replace(":", "").strip("/") for part in src_file.parts]
+    else:
+        # Note, this is done without os.path.relpath, as the result must not depend on the current working directory.
+        src_parts = PurePosixPath(posixpath.normpath(str(src_file))).parts
+        root_parts = PurePosixPath(posixpath.normpath(str(project_root))).parts
 
-def src_to_o(files) -> StringList:
-    return [x.stem + ".o" for x in files]
+        common = 0
+        for src_part, root_part in zip(src_parts, root_parts):
+            if src_part != root_part:
+                break
+            common += 1
+
+        parts = [".."] * (len(root_parts) - common) + list(src_parts[common:])
+
+    parts = ["__" if part == ".." else part for part in parts if part and part != "."]
+    return PurePosixPath(*parts)
+
+
+def src_to_object_path(src_file: PurePath, project_root: PurePath, suffix: str) -> PurePosixPath:
+    # Object files mirror the location of the source file in the project, so sources with the same name in different
+    # directories don't collide. For example, ../../net/util.cpp becomes obj/net/util.cpp.o.
+    relative_path = to_project_relative_path(src_file, project_root)
+    return PurePosixPath("obj") / relative_path.parent / (relative_path.name + suffix)
+
+
+def src_to_obj(files, project_root: PurePath = PurePosixPath()) -> List[PurePosixPath]:
+    return [src_to_object_path(x, project_root, ".obj") for x in files]
+
+
+def src_to_o(files, project_root: PurePath = PurePosixPath()) -> List[PurePosixPath]:
+    return [src_to_object_path(x, project_root, ".o") for x in files]
 
 
 def to_str(paths) -> StringList:
@@ -97,3 +131,42 @@ def to_native_path(path: PurePath) -> Path:
 def to_pure_posix_path(path: PurePath) -> PurePosixPath:
     # This function handles some common errors when converting from Windows paths back to PurePosixPaths.
     return PurePosixPath(str(path).replace("\\", "/"))
+
+
+def atomic_write(path: Path, content: bytes):
+    # The contents are written to a temporary file in the same directory and renamed over the original, so readers
+    # never see a partially written file. The temporary file is created with the same mode as open() would use, so the
+    # umask applies to it. Note, mkstemp would restrict it to its owner.
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+    while True:
+        tmp_name = str(path.parent / f".{path.name}.{secrets.token_hex(8)}.tmp")
+        try:
+            fd = os.open(tmp_name, flags, 0o666)
+            break
+        except FileExistsError:
+            continue
+
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(content)
+        os.replace(tmp_name, str(path))
+    except BaseException:
+        os.remove(tmp_name)
+        raise
+
+
+def write_if_changed(path: Path, content: Union[str, bytes]) -> bool:
+    # Files such as build.ninja and compile_commands.json are watched by ninja and IDE indexers. Only replace the file
+    # when its contents have changed, so its mtime is left alone otherwise.
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    path = Path(path)
+    try:
+        if path.read_bytes() == content:
+            return False
+    except OSError:
+        pass
+
+    atomic_write(path, content)
+    return True
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from aim_build.fssnapshot import DIRECTORY, FileSystemSnapshot
+from aim_build.utils import write_if_changed
+from aim_build.version import __version__
+
+VALIDATION_CACHE_FILE_NAME = ".aim_validation.json"
+
+
+def hash_document(document: Dict, project_dir: Path) -> str:
+    # Note, values that aren't JSON, such as paths, are hashed using their repr.
+    content = json.dumps({"version": __version__, "projectDir": str(project_dir), "document": document},
+                         sort_keys=True,
+                         default=repr)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def get_path_state(path: str, snapshot: FileSystemSnapshot) -> str:
+    # The checkers only care whether a path exists and what type it is, so editing a file or adding a header to an
+    # include directory doesn't invalidate the cache. Globs also store the mtime of their directory, which changes when
+    # a file is added to or removed from it, as that can change whether the glob matches anything.
+    if Path(path).stem == "*":
+        mtime = snapshot.get_directory_mtime(Path(path).parent)
+        return f"glob:{mtime}" if mtime is not None else "missing"
+
+    kind = snapshot.get_kind(Path(path))
+    if kind is None:
+        return "missing"
+    elif kind == DIRECTORY:
+        return "directory"
+    return "file"
+
+
+def get_path_states(paths: Iterable[Path], snapshot: FileSystemSnapshot) -> Dict[str, str]:
+    # Paths are made absolute, so the cache is still correct if Aim is run from another directory.
+    absolute_paths = sorted({os.path.abspath(str(path)) for path in paths})
+    return {path: get_path_state(path, snapshot) for path in absolute_paths}
+
+
+def read_cache(build_dir: Path) -> Dict:
+    try:
+        return json.loads((build_dir / VALIDATION_CACHE_FILE_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def is_cached(build_dir: Path, key: str, snapshot: FileSystemSnapshot) -> bool:
+    cache = read_cache(build_dir)
+    if cache.get("key") != key:
+        return False
+
+    paths = cache.get("paths", {})
+    return all(get_path_state(path, snapshot) == state for path, state in paths.items())
+
+
+def write_cache(build_dir: Path, key: str, touched_paths: Iterable[Path], snapshot: FileSystemSnapshot):
+    cache = {"key": key, "paths": get_path_states(touched_paths, snapshot)}
+    write_if_changed(build_dir / VALIDATION_CACHE_FILE_NAME, json.dumps(cache, indent=2))
+
+
+def validate_target(document: Dict,
+                    project_dir: Path,
+                    build_dir: Path,
+                    revalidate=False,
+                    snapshot: Optional[FileSystemSnapshot] = None) -> bool:
+    # Skips the schema if target.py was successfully validated before and neither the target nor any of the paths
+    # that were checked have changed since. Returns True if the cached result was used.
+    if snapshot is None:
+        snapshot = FileSystemSnapshot()
+
+    key = hash_document(document, project_dir)
+    if not revalidate and is_cached(build_dir, key, snapshot):
+        return True
+
+    # Note, cerberus is only imported when the target actually has to be validated.
+    from aim_build.schema import target_schema
+
+    touched_paths = set()
+    target_schema(document, project_dir, touched_paths, snapshot)
+    write_cache(build_dir, key, touched_paths, snapshot)
+    return False
@@ -0,0 +1,120 @@
+"""
+Measures how generating the dependency information of every build scales with the number of builds.
+
+Run from the Aim root directory:
+    poetry run python benchmarks/buildgraph_benchmark.py
+
+Every build requires the previous few builds, so the builds form one long chain and the transitive requirements of the
+last build include every other build. The "find_build" column repeats the lookups that the generators used to do, one
+linear scan of the builds list per requirement. The "BuildGraph" column does the same lookups using the graph,
+including the time to build it. The "Generation" column generates the include and linker arguments for every build
+using the graph, which grows quadratically with the length of the chain. The "Generation in stacks" column does the
+same for a target whose builds are split into independent stacks of STACK_SIZE builds, so the transitive requirements
+of a build are bounded and generation should grow linearly.
+"""
+import time
+from pathlib import Path
+from typing import Optional
+
+from tabulate import tabulate
+
+from aim_build import gccbuilds
+from aim_build.buildgraph import get_build_graph
+from aim_build.commonbuilds import find_build
+
+BUILD_COUNTS = [625, 1250, 2500, 5000]
+REQUIRES_PER_BUILD = 4
+
+# The size of the independent library stacks of the bounded case.
+STACK_SIZE = 25
+
+# Generating the chain took 8.7s for 625 builds, 33s for 1250 and 143s for 2500 here. It grows about four times with
+# each doubling, so 5000 builds would take close to ten minutes, and it is only measured up to this many builds.
+MAX_CHAIN_GENERATION_BUILD_COUNT = 2500
+
+
+def make_target_file(build_count: int, stack_size: Optional[int] = None):
+    builds = []
+    for index in range(build_count):
+        stack_start = index - index % stack_size if stack_size else 0
+        requires = [
+            f"lib{index - offset}" for offset in range(1, REQUIRES_PER_BUILD + 1) if index - offset >= stack_start
+        ]
+        build = {
+            "name": f"lib{index}",
+            "buildRule": "staticLibrary",
+            "outputName": f"Lib{index}",
+            "includePaths": [f"lib{index}/include"],
+            "build_dir": Path("builds/linux"),
+            "directory": Path("."),
+        }
+        if requires:
+            build["requires"] = requires
+        builds.append(build)
+
+    return {"projectRoot": "../..", "builds": builds}
+
+
+def linear_lookups(target_file):
+    builds = target_file["builds"]
+    for build in builds:
+        for required in build.get("requires", []):
+            find_build(required, builds)
+
+
+def graph_lookups(target_file):
+    graph = get_build_graph(target_file)
+    for build in target_file["builds"]:
+        graph.get_requires(build["name"])
+
+
+def graph_generation(target_file):
+    get_build_graph(target_file)
+    for build in target_file["builds"]:
+        gccbuilds.get_includes_for_build(build, target_file)
+        gccbuilds.generate_linker_args(build, target_file)
+
+
+def measure(func, target_file) -> float:
+    start = time.perf_counter()
+    func(target_file)
+    return time.perf_counter() - start
+
+
+def main():
+    table = []
+    for build_count in BUILD_COUNTS:
+        linear_time = measure(linear_lookups, make_target_file(build_count))
+        graph_time = measure(graph_lookups, make_target_file(build_count))
+        stacks_time = measure(graph_generation, make_target_file(build_count, STACK_SIZE))
+
+        generation_time = "-"
+        generation_per_build = "-"
+        if build_count <= MAX_CHAIN_GENERATION_BUILD_COUNT:
+            chain_time = measure(graph_generation, make_target_file(build_count))
+            generation_time = f"{chain_time:.3f}"
+            generation_per_build = f"{chain_time / build_count * 1e6:.1f}"
+
+        table.append([
+            build_count,
+            f"{linear_time:.3f}",
+            f"{graph_time:.3f}",
+            generation_time,
+            generation_per_build,
+            f"{stacks_time:.3f}",
+            f"{stacks_time / build_count * 1e6:.1f}",
+        ])
+
+    print(tabulate(table, [
+        "Builds",
+        "find_build (s)",
+        "BuildGraph (s)",
+        "Generation (s)",
+        "Generation per build (us)",
+        "Generation in stacks (s)",
+        "Generation in stacks per build (us)",
+    ]))
+
+
+if __name__ == "__main__":
+    main()
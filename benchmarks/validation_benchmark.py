@@ -0,0 +1,114 @@
+"""
+Measures how validating target.py scales with the number of builds.
+
+Run from the Aim root directory:
+    poetry run python benchmarks/validation_benchmark.py
+
+Every build has a source glob, an include path and up to four requirements, so the time includes the path checks.
+The "Validation per build" column should stay roughly flat as the number of builds grows. The "Cerberus" column
+validates the builds the way they were validated before, with cerberus and the same build schema and checkers.
+"""
+import tempfile
+import time
+from pathlib import Path
+
+from tabulate import tabulate
+
+from aim_build.fssnapshot import FileSystemSnapshot
+from aim_build.schema import (
+    AimCustomValidator,
+    BUILD_SCHEMA,
+    BuildsValidator,
+    check_output_naming_convention,
+    target_schema,
+)
+
+BUILD_COUNTS = [1250, 2500, 5000, 10000]
+REQUIRES_PER_BUILD = 4
+
+
+def make_project(root: Path):
+    (root / "src").mkdir()
+    (root / "include").mkdir()
+    (root / "src" / "lib.cpp").write_text("")
+
+
+def make_target_file(build_count: int):
+    builds = []
+    for index in range(build_count):
+        build = {
+            "name": f"lib{index}",
+            "buildRule": "staticLibrary",
+            "outputName": f"Lib{index}",
+            "sourceFiles": ["src/*.cpp"],
+            "includePaths": ["include"],
+        }
+        requires = [f"lib{index - offset}" for offset in range(1, REQUIRES_PER_BUILD + 1) if index - offset >= 0]
+        if requires:
+            build["requires"] = requires
+        builds.append(build)
+
+    return {
+        "projectRoot": "../..",
+        "compilerFrontend": "gcc",
+        "compiler": "g++",
+        "archiver": "ar",
+        "builds": builds,
+    }
+
+
+class CerberusBuildsValidator(AimCustomValidator):
+    def _check_with_output_naming_convention(self, field, value):
+        check_output_naming_convention(self.document, field, value, self._error)
+
+
+def to_cerberus_schema(rules, checkers):
+    # The checkers of BUILD_SCHEMA are named by string. Cerberus is given the checkers themselves, except for the output
+    # naming convention, which it finds on the validator by name.
+    if isinstance(rules, dict):
+        return {
+            key: checkers.get(value, value) if key == "check_with" else to_cerberus_schema(value, checkers)
+            for key, value in rules.items()
+        }
+    if isinstance(rules, list):
+        return [to_cerberus_schema(value, checkers) for value in rules]
+    return rules
+
+
+def cerberus_validation(target_file, project_dir):
+    checkers = BuildsValidator(target_file, project_dir, set(), FileSystemSnapshot()).checkers
+    build_schema = to_cerberus_schema(BUILD_SCHEMA, checkers)
+    schema = {"builds": {"type": "list", "schema": {"type": "dict", "schema": build_schema}}}
+    CerberusBuildsValidator().validate({"builds": target_file["builds"]}, schema)
+
+
+def measure(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        project_dir = Path(tmp_dir)
+        make_project(project_dir)
+
+        table = []
+        for build_count in BUILD_COUNTS:
+            target_file = make_target_file(build_count)
+            validation_time = measure(target_schema, target_file, project_dir)
+
+            cerberus_time = measure(cerberus_validation, target_file, project_dir)
+
+            table.append([
+                build_count,
+                f"{validation_time:.3f}",
+                f"{validation_time / build_count * 1e6:.1f}",
+                f"{cerberus_time:.3f}",
+            ])
+
+    print(tabulate(table, ["Builds", "Validation (s)", "Validation per build (us)", "Cerberus (s)"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+from unittest import TestCase
+
+from aim_build.buildgraph import BuildGraph, get_build_graph
+
+
+def make_builds():
+    return [
+        {"name": "app", "requires": ["b", "a"]},
+        {"name": "b", "requires": ["a"]},
+        {"name": "a"},
+        {"name": "standalone"},
+    ]
+
+
+class TestBuildGraph(TestCase):
+    def test_find(self):
+        graph = BuildGraph(make_builds())
+
+        self.assertEqual(graph.find("b")["name"], "b")
+        with self.assertRaises(RuntimeError):
+            graph.find("missing")
+
+    def test_requires(self):
+        graph = BuildGraph(make_builds())
+
+        names = [build["name"] for build in graph.get_requires("app")]
+        self.assertEqual(names, ["b", "a"])
+        self.assertEqual(graph.get_requires("a"), [])
+
+    def test_topological_order(self):
+        graph = BuildGraph(make_builds())
+
+        names = [build["name"] for build in graph.topological_order()]
+        self.assertEqual(len(names), 4)
+        self.assertLess(names.index("a"), names.index("b"))
+        self.assertLess(names.index("b"), names.index("app"))
+
+    def test_transitive_requires(self):
+        builds = [
+            {"name": "app", "requires": ["net", "db"]},
+            {"name": "net", "requires": ["core"]},
+            {"name": "db", "requires": ["core", "sqlite"]},
+            {"name": "core"},
+            {"name": "sqlite"},
+        ]
+        graph = BuildGraph(builds)
+
+        # Every build comes before the builds it requires, without duplicates.
+        names = [build["name"] for build in graph.get_transitive_requires("app")]
+        self.assertEqual(names, ["net", "db", "core", "sqlite"])
+
+        names = [build["name"] for build in graph.get_transitive_requires("net")]
+        self.assertEqual(names, ["core"])
+
+    def test_link_requires_stop_at_dynamic_libraries(self):
+        builds = [
+            {"name": "app", "buildRule": "executable", "requires": ["shared"]},
+            {"name": "shared", "buildRule": "dynamicLibrary", "requires": ["static"]},
+            {"name": "static", "buildRule": "staticLibrary"},
+        ]
+        graph = BuildGraph(builds)
+
+        names = [build["name"] for build in graph.get_link_requires("app")]
+        self.assertEqual(names, ["shared"])
+
+        names = [build["name"] for build in graph.get_link_requires("shared")]
+        self.assertEqual(names, ["static"])
+
+        names = [build["name"] for build in graph.get_transitive_requires("app")]
+        self.assertEqual(names, ["shared", "static"])
+
+    def test_cycle(self):
+        builds = [
+            {"name": "app", "requires": ["x"]},
+            {"name": "x", "requires": ["y"]},
+            {"name": "y", "requires": ["x"]},
+        ]
+
+        with self.assertRaises(RuntimeError) as context:
+            BuildGraph(builds)
+
+        self.assertEqual(context.exception.args[0], "Circular dependency between builds: x -> y -> x")
+
+    def test_graph_is_cached_on_target_file(self):
+        target_file = {"builds": make_builds()}
+
+        graph = get_build_graph(target_file)
+        self.assertIs(get_build_graph(target_file), graph)
+
+        target_file["builds"] = make_builds()
+        self.assertIsNot(get_build_graph(target_file), graph)
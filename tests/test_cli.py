@@ -0,0 +1,76 @@
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from aim_build.main import entry, make_parser, parse_arguments
+
+TARGET_FILE = """
+projectRoot = "../.."
+compilerFrontend = "gcc"
+compiler = "gcc"
+archiver = "ar"
+
+builds = [
+    {
+        "name": "lib",
+        "buildRule": "staticLibrary",
+        "outputName": "Lib",
+        "sourceFiles": ["src/lib.c"],
+    },
+    {
+        "name": "other",
+        "buildRule": "staticLibrary",
+        "outputName": "Other",
+        "sourceFiles": ["src/other.c"],
+    },
+]
+"""
+
+
+class TestCommandLine(TestCase):
+    def test_builds_after_options(self):
+        parser = make_parser()
+
+        args = parse_arguments(parser, ["build", "builds/linux-gcc", "calculatorapp"])
+        self.assertEqual(args.builds, ["calculatorapp"])
+
+        args = parse_arguments(parser, ["build", "builds/linux-gcc", "-s", "calculatorapp"])
+        self.assertEqual(args.builds, ["calculatorapp"])
+        self.assertTrue(args.skip_ninja)
+
+        args = parse_arguments(parser, ["build", "builds/linux-gcc", "-r", "a", "-j", "4", "b*"])
+        self.assertEqual(args.builds, ["a", "b*"])
+        self.assertTrue(args.regenerate)
+        self.assertEqual(args.jobs, 4)
+
+        args = parse_arguments(parser, ["build", "builds/linux-gcc", "a", "-r", "b"])
+        self.assertEqual(args.builds, ["a", "b"])
+
+        # Unknown options are still rejected, and other commands don't take extra arguments.
+        with patch("sys.stderr"), self.assertRaises(SystemExit):
+            parse_arguments(parser, ["build", "builds/linux-gcc", "-r", "a", "--unknown"])
+        with patch("sys.stderr"), self.assertRaises(SystemExit):
+            parse_arguments(parser, ["generate", "builds/linux-gcc", "-r", "a"])
+
+    @skipUnless(shutil.which("ninja") and shutil.which("gcc"), "Requires ninja and gcc")
+    def test_build_after_regenerate_option(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            (root / "src").mkdir()
+            (root / "src" / "lib.c").write_text("int lib(void) { return 0; }\n")
+            (root / "src" / "other.c").write_text("int other(void) { return 1; }\n")
+
+            build_dir = root / "builds" / "linux"
+            build_dir.mkdir(parents=True)
+            (build_dir / "target.py").write_text(TARGET_FILE)
+
+            with patch.object(sys, "argv", ["aim", "build", str(build_dir), "-r", "lib"]), \
+                    patch("sys.stdout"), self.assertRaises(SystemExit) as context:
+                entry()
+
+            self.assertEqual(context.exception.code, 0)
+            self.assertTrue((build_dir / "lib" / "libLib.a").exists())
+            self.assertFalse((build_dir / "other" / "libOther.a").exists())
@@ -0,0 +1,135 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from aim_build import compdb
+from aim_build.gccbuilds import COMPILE_COMMAND
+from aim_build.main import run_generate
+
+UNITY_TARGET_FILE = """
+projectRoot = "../.."
+compilerFrontend = "gcc"
+compiler = "gcc"
+archiver = "ar"
+
+builds = [
+    {
+        "name": "lib",
+        "buildRule": "staticLibrary",
+        "outputName": "Lib",
+        "sourceFiles": ["src/*.c"],
+        "unityBatchSize": 2,
+    },
+]
+"""
+
+
+def make_target_file(build_dir: Path, mode: str):
+    build = {"name": "a", "build_dir": build_dir}
+    compdb.add_compile_command(build,
+                               COMPILE_COMMAND,
+                               {
+                                   "compiler": "g++",
+                                   "defines": ["-DEnableFeature"],
+                                   "flags": ["-std=c++17", "", "-Wall"],
+                                   "includes": ['-I"../../a/include"'],
+                               },
+                               "../../a/src/file_0.cpp",
+                               "a/file_0.o")
+    (build_dir / "a").mkdir(exist_ok=True)
+    return {"compileCommands": mode, "builds": [build, {"name": "i"}]}
+
+
+class TestCompileCommands(TestCase):
+    def test_expand_command(self):
+        result = compdb.expand_command("$compiler ${flags} -o $out $$ORIGIN", {
+            "compiler": "g++",
+            "flags": ["-O3", "-g"],
+            "out": "a/file_0.o",
+        })
+        self.assertEqual(result, "g++ -O3 -g -o a/file_0.o $ORIGIN")
+
+    def test_launcher(self):
+        build = {"name": "a", "build_dir": Path(".")}
+        variables = {"launcher": "ccache", "compiler": "g++"}
+
+        compdb.add_compile_command(build, COMPILE_COMMAND, variables, "file_0.cpp", "a/file_0.o")
+        compdb.add_compile_command(build, COMPILE_COMMAND, variables, "file_0.cpp", "a/file_0.o", include_launcher=True)
+
+        commands = [entry["command"] for entry in build["compile_commands"]]
+        self.assertTrue(commands[0].startswith("g++ "))
+        self.assertTrue(commands[1].startswith("ccache g++ "))
+
+    def test_merged(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            build_dir = Path(tmp_dir)
+            target_file = make_target_file(build_dir, "merged")
+            compdb.write_compile_commands(build_dir, target_file)
+
+            entries = json.loads((build_dir / "compile_commands.json").read_text())
+            self.assertEqual(len(entries), 1)
+            self.assertEqual(entries[0]["command"],
+                             'g++ -DEnableFeature -std=c++17 -Wall -MMD -MF a/file_0.o.d -I"../../a/include" '
+                             '-c ../../a/src/file_0.cpp -o a/file_0.o')
+            self.assertEqual(entries[0]["file"], "../../a/src/file_0.cpp")
+            self.assertEqual(entries[0]["output"], "a/file_0.o")
+            self.assertEqual(entries[0]["directory"], str(build_dir.resolve()))
+            self.assertFalse((build_dir / "a" / "compile_commands.json").exists())
+
+    def test_fragments(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            build_dir = Path(tmp_dir)
+            target_file = make_target_file(build_dir, "fragments")
+            compdb.write_compile_commands(build_dir, target_file)
+
+            fragment = json.loads((build_dir / "a" / "compile_commands.json").read_text())
+            merged = json.loads((build_dir / "compile_commands.json").read_text())
+            self.assertEqual(fragment, merged)
+
+            # The merged file isn't rebuilt when no fragment has changed.
+            (build_dir / "compile_commands.json").write_text("[]\n")
+            compdb.write_compile_commands(build_dir, target_file)
+            self.assertEqual((build_dir / "compile_commands.json").read_text(), "[]\n")
+
+            (build_dir / "a" / "compile_commands.json").unlink()
+            compdb.write_compile_commands(build_dir, target_file)
+            self.assertEqual(json.loads((build_dir / "compile_commands.json").read_text()), merged)
+
+            # Removing a build removes its entries and its fragment.
+            target_file["builds"][0]["compile_commands"] = []
+            compdb.write_compile_commands(build_dir, target_file)
+
+            self.assertEqual(json.loads((build_dir / "compile_commands.json").read_text()), [])
+            self.assertFalse((build_dir / "a" / "compile_commands.json").exists())
+
+    def test_none(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            build_dir = Path(tmp_dir)
+            target_file = make_target_file(build_dir, "none")
+            compdb.write_compile_commands(build_dir, target_file)
+
+            self.assertFalse((build_dir / "compile_commands.json").exists())
+
+    def test_unity_build(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            (root / "src").mkdir()
+            (root / "src" / "file_0.c").write_text("int file_0(void) { return 0; }\n")
+            (root / "src" / "file_1.c").write_text("int file_1(void) { return 1; }\n")
+
+            build_dir = root / "builds" / "linux"
+            build_dir.mkdir(parents=True)
+            (build_dir / "target.py").write_text(UNITY_TARGET_FILE)
+            run_generate(str(build_dir), [])
+
+            # Tools look up the sources that are edited, so each source in a unity file gets its own entry, which
+            # compiles that source on its own.
+            entries = json.loads((build_dir / "compile_commands.json").read_text())
+            self.assertEqual(sorted(entry["file"] for entry in entries), ["../../src/file_0.c", "../../src/file_1.c"])
+            for entry in entries:
+                self.assertEqual(entry["output"], "lib/obj/unity/unity_c_0.c.o")
+                self.assertTrue(entry["command"].endswith(f'-c {entry["file"]} -o lib/obj/unity/unity_c_0.c.o'))
+
+            ninja = (build_dir / "build.ninja").read_text()
+            self.assertTrue("build lib/obj/unity/unity_c_0.c.o: compile lib/unity/unity_c_0.c" in ninja)
@@ -0,0 +1,74 @@
+import re
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest import TestCase, skipUnless
+
+from aim_build.includereport import parse_ninja_deps
+from aim_build.main import run_generate
+
+TRANSLATION_UNIT_COUNT = 256
+JOB_COUNT = 64
+
+TARGET_FILE = """
+projectRoot = "../.."
+compilerFrontend = "gcc"
+compiler = "gcc"
+archiver = "ar"
+flags = ["-O0"]
+
+builds = [
+    {
+        "name": "stress",
+        "buildRule": "staticLibrary",
+        "outputName": "Stress",
+        "sourceFiles": ["src/*.c"],
+        "includePaths": ["include"],
+    },
+]
+"""
+
+
+def make_stress_project(root: Path):
+    (root / "src").mkdir()
+    (root / "include").mkdir()
+    (root / "include" / "common.h").write_text("#define COMMON 1\n")
+
+    for index in range(TRANSLATION_UNIT_COUNT):
+        (root / "include" / f"header_{index}.h").write_text(f"#define VALUE_{index} {index}\n")
+        (root / "src" / f"tu_{index}.c").write_text(
+            f'#include "common.h"\n'
+            f'#include "header_{index}.h"\n'
+            f'int function_{index}(void) {{ return VALUE_{index}; }}\n'
+        )
+
+    build_dir = root / "builds" / "linux"
+    build_dir.mkdir(parents=True)
+    (build_dir / "target.py").write_text(TARGET_FILE)
+    return build_dir
+
+
+@skipUnless(shutil.which("ninja") and shutil.which("gcc"), "Requires ninja and gcc")
+class TestParallelDepfiles(TestCase):
+    def test_every_object_has_its_own_dependencies(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            build_dir = make_stress_project(Path(tmp_dir))
+            run_generate(str(build_dir), [])
+
+            command = ["ninja", "-C", str(build_dir), f"-j{JOB_COUNT}", "stress"]
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+
+            command = ["ninja", "-C", str(build_dir), "-t", "deps"]
+            result = subprocess.run(command, check=True, stdout=subprocess.PIPE, universal_newlines=True)
+            deps = parse_ninja_deps(result.stdout)
+
+            objects = [name for name in deps if name.endswith(".o")]
+            self.assertEqual(len(objects), TRANSLATION_UNIT_COUNT)
+
+            for obj in objects:
+                index = re.search(r"tu_(\d+)", obj).group(1)
+                headers = [Path(dep).name for dep in deps[obj]]
+                self.assertIn("common.h", headers, obj)
+                self.assertIn(f"header_{index}.h", headers, obj)
+                self.assertIn(f"tu_{index}.c", headers, obj)
@@ -0,0 +1,85 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from aim_build import fssnapshot
+from aim_build.fssnapshot import FileSystemSnapshot
+
+
+def make_tree(root: Path):
+    (root / "src").mkdir()
+    (root / "include").mkdir()
+    for name in ["a.cpp", "b.cpp", "c.h"]:
+        (root / "src" / name).write_text("")
+
+
+class TestFileSystemSnapshot(TestCase):
+    def test_matches_pathlib(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            make_tree(root)
+            snapshot = FileSystemSnapshot()
+
+            for pattern in ["src/*.cpp", "src/*.h", "src/*.c", "missing/*.cpp"]:
+                path = root / pattern
+                self.assertEqual(snapshot.glob(path), list(path.parent.glob(path.name)))
+
+            self.assertTrue(snapshot.is_dir(root / "include"))
+            self.assertTrue(snapshot.is_file(root / "src" / "a.cpp"))
+            self.assertFalse(snapshot.is_file(root / "src"))
+            self.assertFalse(snapshot.exists(root / "missing"))
+            self.assertTrue(snapshot.is_dir(root / "src" / ".." / "include"))
+            self.assertTrue(snapshot.is_dir(Path(root.anchor)))
+
+    def test_directories_are_listed_once(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            make_tree(root)
+            snapshot = FileSystemSnapshot()
+
+            self.assertEqual(len(snapshot.glob(root / "src" / "*.cpp")), 2)
+
+            # Changes made after a directory was listed aren't seen by the same snapshot.
+            (root / "src" / "d.cpp").write_text("")
+            self.assertEqual(len(snapshot.glob(root / "src" / "*.cpp")), 2)
+            self.assertEqual(len(FileSystemSnapshot().glob(root / "src" / "*.cpp")), 3)
+
+    def test_persisted_listings(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            make_tree(root)
+            build_dir = root / "include"
+
+            # The directory was only just changed, so its listing isn't persisted yet.
+            snapshot = fssnapshot.load_snapshot(build_dir)
+            snapshot.glob(root / "src" / "*.cpp")
+            self.assertEqual(snapshot.get_persistable_listings(), {})
+
+            os.utime(str(root / "src"), ns=(0, 0))
+            snapshot = fssnapshot.load_snapshot(build_dir)
+            snapshot.glob(root / "src" / "*.cpp")
+            fssnapshot.save_snapshot(build_dir, snapshot)
+
+            # A persisted listing is used while the mtime of its directory is unchanged.
+            (root / "src" / "d.cpp").write_text("")
+            os.utime(str(root / "src"), ns=(0, 0))
+            self.assertEqual(len(fssnapshot.load_snapshot(build_dir).glob(root / "src" / "*.cpp")), 2)
+
+            os.utime(str(root / "src"))
+            self.assertEqual(len(fssnapshot.load_snapshot(build_dir).glob(root / "src" / "*.cpp")), 3)
+
+    def test_names_that_differ_in_case(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            make_tree(root)
+            os.utime(str(root / "src"), ns=(0, 0))
+
+            # A listing made on a file system that ignores case can spell a name differently to the target file. Such
+            # names are checked with the file system rather than reported as missing.
+            listing = {"mtime": 0, "scanned": 0, "entries": {"A.cpp": fssnapshot.FILE, "b.cpp": fssnapshot.FILE}}
+            snapshot = FileSystemSnapshot({os.path.abspath(str(root / "src")): listing})
+
+            self.assertTrue(snapshot.is_file(root / "src" / "a.cpp"))
+            self.assertTrue(snapshot.is_file(root / "src" / "b.cpp"))
+            self.assertFalse(snapshot.exists(root / "src" / "missing.cpp"))
@@ -0,0 +1,70 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from aim_build.includereport import make_include_report, parse_ninja_deps
+
+NINJA_DEPS = """a/obj/src/a.cpp.o: #deps 5, deps mtime 1 (VALID)
+    ../../src/a.cpp
+    ../../include/big.h
+    ../../include/detail/vector.h
+    ../../include/detail/alloc.h
+    ../../include/a.h
+
+a/obj/src/b.cpp.o: #deps 4, deps mtime 1 (VALID)
+    ../../src/b.cpp
+    ../../include/big.h
+    ../../include/detail/vector.h
+    ../../include/detail/alloc.h
+
+a/obj/src/c.cpp.o: #deps 3, deps mtime 1 (STALE)
+    ../../src/c.cpp
+    ../../include/detail/vector.h
+    ../../include/detail/alloc.h
+"""
+
+HEADERS = {
+    "include/big.h": '#pragma once\n#include <detail/vector.h>\n',
+    "include/detail/vector.h": '#pragma once\n#include "alloc.h"\n',
+    "include/detail/alloc.h": '#pragma once\n#include <cstddef>\n',
+    "include/a.h": '#pragma once\n',
+}
+
+
+def make_headers(root: Path) -> Path:
+    for name, content in HEADERS.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(content)
+
+    build_dir = root / "builds" / "linux"
+    build_dir.mkdir(parents=True)
+    return build_dir
+
+
+class TestIncludeReport(TestCase):
+    def test_parse_ninja_deps(self):
+        deps = parse_ninja_deps(NINJA_DEPS)
+        self.assertEqual(list(deps), ["a/obj/src/a.cpp.o", "a/obj/src/b.cpp.o", "a/obj/src/c.cpp.o"])
+        self.assertEqual(deps["a/obj/src/c.cpp.o"],
+                         ["../../src/c.cpp", "../../include/detail/vector.h", "../../include/detail/alloc.h"])
+
+    def test_report(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            build_dir = make_headers(Path(tmp_dir))
+
+            compile_times = {"a/obj/src/a.cpp.o": 2.0, "a/obj/src/b.cpp.o": 1.5, "a/obj/src/c.cpp.o": 0.5}
+            report = make_include_report(build_dir, parse_ninja_deps(NINJA_DEPS), compile_times)
+            report = {item["header"]: item for item in report}
+
+            self.assertEqual(len(report), 4)
+            self.assertEqual(report["../../include/detail/vector.h"]["fanIn"], 3)
+            self.assertEqual(report["../../include/detail/vector.h"]["rebuildCost"], 4.0)
+            self.assertEqual(report["../../include/big.h"]["rebuildCost"], 3.5)
+
+            # big.h pulls in vector.h, which pulls in alloc.h. Headers that aren't in the deps log aren't counted.
+            self.assertEqual(report["../../include/big.h"]["pulledIn"], 2)
+            self.assertEqual(report["../../include/detail/vector.h"]["pulledIn"], 1)
+            self.assertEqual(report["../../include/detail/alloc.h"]["pulledIn"], 0)
+
+            # a.h is the only header that is included once, but it doesn't include anything.
+            self.assertEqual(report["../../include/a.h"]["pulledIn"], 0)
@@ -0,0 +1,65 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from aim_build import manifest
+
+TARGET_FILE = 'compilerFrontend = "gcc"\n'
+
+TARGET_DICT = {
+    "compilerFrontend": "gcc",
+    "builds": [
+        {"name": "app", "buildRule": "executable", "outputName": "App"},
+        {"name": "core", "buildRule": "staticLibrary", "outputName": "Core"},
+        {"name": "plugin", "buildRule": "dynamicLibrary", "outputName": "Plugin"},
+        {"name": "headers", "buildRule": "headerOnly"},
+    ],
+}
+
+
+def make_build_dir(root: Path):
+    build_dir = root / "builds" / "linux"
+    build_dir.mkdir(parents=True)
+    (build_dir / "target.py").write_text(TARGET_FILE)
+
+    manifest.write_manifest(build_dir, manifest.make_manifest(TARGET_DICT, build_dir / "target.py"))
+    return build_dir
+
+
+def fail_to_load():
+    raise AssertionError("target.py should not have been loaded")
+
+
+class TestManifest(TestCase):
+    def test_outputs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            build_dir = make_build_dir(Path(tmp_dir))
+
+            the_manifest = manifest.get_manifest(build_dir, fail_to_load)
+            outputs = [build["output"] for build in the_manifest["builds"]]
+            self.assertEqual(outputs, ["app/App", "core/libCore.a", "plugin/libPlugin.so", None])
+            self.assertEqual(manifest.get_output_names(the_manifest), ["App", "libCore.a", "libPlugin.so", "n.a."])
+
+            self.assertEqual(manifest.find_manifest_build("core", the_manifest)["buildRule"], "staticLibrary")
+            with self.assertRaises(RuntimeError):
+                manifest.find_manifest_build("missing", the_manifest)
+
+    def test_out_of_date(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            build_dir = make_build_dir(Path(tmp_dir))
+            target_file_path = build_dir / "target.py"
+            manifest_path = build_dir / manifest.MANIFEST_FILE_NAME
+
+            # Saving target.py without changing it doesn't invalidate the manifest.
+            os.utime(str(manifest_path), (0, 0))
+            self.assertIsNotNone(manifest.read_manifest(build_dir))
+
+            target_file_path.write_text(TARGET_FILE + "flags = []\n")
+            self.assertIsNone(manifest.read_manifest(build_dir))
+
+            the_manifest = manifest.get_manifest(build_dir, lambda: TARGET_DICT)
+            self.assertEqual(len(the_manifest["builds"]), 4)
+
+            manifest_path.unlink()
+            self.assertIsNone(manifest.read_manifest(build_dir))
@@ -0,0 +1,105 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from aim_build import ninjalog
+
+PREVIOUS_LOG = """# ninja log v5
+0\t100\t1\ta/obj/main.cpp.o\t1
+0\t900\t2\tbuild.ninja\t2
+"""
+
+NINJA_LOG = PREVIOUS_LOG + """0\t10\t3\tbuild.ninja\t2
+10\t500\t3\ta/obj/main.cpp.o\t3
+0\t1000\t3\tb/obj/lib.cpp.o\t5
+1000\t1500\t3\tb/libb.a\t6
+0\t2000\t3\ta/obj/slow.cpp.o\t4
+2000\t3000\t3\ta/app\t7
+"""
+
+# The same log after ninja has recompacted it, which keeps only the latest entry of each output in no particular order.
+RECOMPACTED_LOG = """# ninja log v5
+2000\t3000\t3\ta/app\t7
+0\t10\t3\tbuild.ninja\t2
+10\t500\t3\ta/obj/main.cpp.o\t3
+0\t2000\t3\ta/obj/slow.cpp.o\t4
+1000\t1500\t3\tb/libb.a\t6
+0\t1000\t3\tb/obj/lib.cpp.o\t5
+"""
+
+
+def get_marked_keys(log: str):
+    return {ninjalog.get_entry_key(entry) for entry in ninjalog.parse_ninja_log(log)}
+
+
+class TestNinjaLog(TestCase):
+    def test_last_run(self):
+        marked_keys = get_marked_keys(PREVIOUS_LOG)
+        expected = ["build.ninja", "a/obj/main.cpp.o", "b/obj/lib.cpp.o", "b/libb.a", "a/obj/slow.cpp.o", "a/app"]
+
+        # Only the entries that were added since the log was marked belong to the last run.
+        entries = ninjalog.get_last_run(ninjalog.parse_ninja_log(NINJA_LOG), marked_keys)
+        self.assertEqual([entry.output for entry in entries], expected)
+
+        entries = ninjalog.get_last_run(ninjalog.parse_ninja_log(RECOMPACTED_LOG), marked_keys)
+        self.assertEqual(sorted(entry.output for entry in entries), sorted(expected))
+
+        # Nothing was built since the log was marked.
+        self.assertEqual(ninjalog.get_last_run(ninjalog.parse_ninja_log(NINJA_LOG), get_marked_keys(NINJA_LOG)), [])
+
+    def test_mark_log(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            build_dir = Path(tmp_dir)
+            with self.assertRaises(RuntimeError):
+                ninjalog.read_last_run(build_dir)
+
+            (build_dir / ninjalog.NINJA_LOG_FILE_NAME).write_text(PREVIOUS_LOG)
+            ninjalog.mark_log(build_dir)
+            (build_dir / ninjalog.NINJA_LOG_FILE_NAME).write_text(RECOMPACTED_LOG)
+
+            self.assertEqual(len(ninjalog.read_last_run(build_dir)), 6)
+
+    def test_report(self):
+        entries = ninjalog.get_last_run(ninjalog.parse_ninja_log(NINJA_LOG), get_marked_keys(PREVIOUS_LOG))
+        report = ninjalog.make_report(entries, 2)
+
+        # Regenerating build.ninja doesn't belong to any build, and archives are reported apart from links.
+        self.assertEqual(report["edges"], 5)
+        self.assertEqual(report["wallTime"], 3.0)
+        self.assertEqual(report["cpuTime"], 4.99)
+        self.assertEqual(report["generatorTime"], 0.01)
+        self.assertEqual(sorted(report["builds"]), ["a", "b"])
+        self.assertEqual(report["builds"]["a"], {"compile": 2.49, "archive": 0.0, "link": 1.0, "edges": 3})
+        self.assertEqual(report["builds"]["b"], {"compile": 1.0, "archive": 0.5, "link": 0.0, "edges": 2})
+        slowest = [item["output"] for item in report["slowestCompiles"]]
+        self.assertEqual(slowest, ["a/obj/slow.cpp.o", "b/obj/lib.cpp.o"])
+        self.assertEqual([item["output"] for item in report["archives"]], ["b/libb.a"])
+        self.assertEqual([item["output"] for item in report["links"]], ["a/app"])
+
+    def test_report_counts_each_edge_once(self):
+        # A Windows dynamic library is linked by one edge with three outputs, which share the times and command hash.
+        log = """# ninja log v5
+0\t100\t1\tc/obj/lib.cpp.obj\t1
+100\t400\t1\tc/c.dll\t2
+100\t400\t1\tc/c.lib\t2
+100\t400\t1\tc/c.exp\t2
+"""
+        report = ninjalog.make_report(ninjalog.parse_ninja_log(log), 10)
+
+        self.assertEqual(report["edges"], 2)
+        self.assertEqual(report["cpuTime"], 0.4)
+        self.assertEqual(report["builds"]["c"], {"compile": 0.1, "archive": 0.0, "link": 0.3, "edges": 2})
+        self.assertEqual(report["archives"], [])
+        self.assertEqual(report["links"], [{"output": "c/c.dll", "time": 0.3}])
+
+    def test_compare(self):
+        previous = {"builds": {"a": {"compile": 2.0, "link": 0.0}, "old": {"compile": 1.0, "link": 0.0}}}
+        current = {"builds": {"a": {"compile": 2.0, "link": 1.0}}}
+
+        comparison = ninjalog.compare_reports(previous, current)
+        self.assertEqual(comparison[0], {"build": "a", "previous": 2.0, "current": 3.0, "change": 50.0})
+        self.assertEqual(comparison[1]["change"], -100.0)
+
+    def test_unsupported_log(self):
+        with self.assertRaises(RuntimeError):
+            ninjalog.parse_ninja_log("not a log\n")
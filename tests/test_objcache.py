@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase, skipUnless
+
+from aim_build import objcache
+
+
+class TestObjectCache(TestCase):
+    def test_parse_size(self):
+        self.assertEqual(objcache.parse_size("1024"), 1024)
+        self.assertEqual(objcache.parse_size("2k"), 2048)
+        self.assertEqual(objcache.parse_size("1.5G"), int(1.5 * 1024 ** 3))
+
+    def test_msvc_commands(self):
+        command = objcache.parse_command(["/DNDEBUG", "/showIncludes", "/c", "main.cpp", "/Foa\\main.obj"])
+        self.assertTrue(command.is_cacheable())
+        self.assertEqual(command.output, "a\\main.obj")
+        self.assertEqual(command.preprocess_args(), ["/DNDEBUG", "main.cpp", "/E"])
+
+        # Compiles that use a precompiled header are not cached.
+        command = objcache.parse_command(['/Yu"pch.h"', "/c", "main.cpp", "/Foa\\main.obj"])
+        self.assertFalse(command.is_cacheable())
+
+    def test_gcc_commands(self):
+        command = objcache.parse_command(["-O2", "-MMD", "-MF", "a/main.o.d", "-c", "main.c", "-o", "a/main.o"])
+        self.assertTrue(command.is_cacheable())
+        self.assertEqual(command.output, "a/main.o")
+        self.assertEqual(command.depfile, "a/main.o.d")
+        self.assertEqual(command.preprocess_args(), ["-O2", "main.c", "-E"])
+
+    @skipUnless(shutil.which("gcc"), "Requires gcc")
+    def test_hits_misses_and_prune(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cwd = os.getcwd()
+            os.chdir(tmp_dir)
+            try:
+                cache_dir = Path(tmp_dir) / "cache"
+                Path("main.c").write_text("int main(void) { return 0; }\n")
+                args = ["gcc", "-MMD", "-MF", "main.o.d", "-c", "main.c", "-o", "main.o"]
+
+                self.assertEqual(objcache.compile_with_cache(args, cache_dir), 0)
+                object_file = Path("main.o").read_bytes()
+
+                os.remove("main.o")
+                os.remove("main.o.d")
+                self.assertEqual(objcache.compile_with_cache(args, cache_dir), 0)
+                self.assertEqual(Path("main.o").read_bytes(), object_file)
+                self.assertTrue(Path("main.o.d").exists())
+
+                # Restored objects can be read by everyone that the umask allows, like objects made by the compiler.
+                umask = os.umask(0)
+                os.umask(umask)
+                self.assertEqual(Path("main.o").stat().st_mode & 0o777, 0o666 & ~umask)
+
+                # A change to the source is a different entry.
+                Path("main.c").write_text("int main(void) { return 1; }\n")
+                self.assertEqual(objcache.compile_with_cache(args, cache_dir), 0)
+
+                stats = objcache.get_stats(cache_dir)
+                self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 2, 2))
+
+                removed_count, _ = objcache.prune(cache_dir, 0)
+                self.assertEqual(removed_count, 2)
+                self.assertEqual(objcache.get_stats(cache_dir)["entries"], 0)
+            finally:
+                os.chdir(cwd)
@@ -0,0 +1,74 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase, skipUnless
+
+from aim_build.main import run_generate
+
+TARGET_FILE = """
+projectRoot = "../.."
+compilerFrontend = "gcc"
+compiler = "gcc"
+archiver = "ar"
+
+builds = [
+    {
+        "name": "lib",
+        "buildRule": "staticLibrary",
+        "outputName": "Lib",
+        "sourceFiles": ["src/*.c"],
+    },
+]
+"""
+
+
+def make_project(root: Path) -> Path:
+    (root / "src").mkdir()
+    (root / "src" / "lib.c").write_text("int lib(void) { return 0; }\n")
+
+    build_dir = root / "builds" / "linux"
+    build_dir.mkdir(parents=True)
+    (build_dir / "target.py").write_text(TARGET_FILE)
+    return build_dir
+
+
+def set_mtime(path: Path, mtime: int):
+    os.utime(str(path), ns=(mtime, mtime))
+
+
+def run_ninja_dry_run(build_dir: Path) -> str:
+    command = ["ninja", "-C", str(build_dir), "-n", "lib"]
+    return subprocess.run(command, check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+
+
+@skipUnless(shutil.which("ninja") and shutil.which("gcc"), "Requires ninja and gcc")
+class TestRegenerate(TestCase):
+    def test_saving_target_without_changes_does_not_regenerate(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            build_dir = make_project(Path(tmp_dir))
+            run_generate(str(build_dir), [], update_ninja_log=True)
+
+            # The mtimes are set explicitly, as their resolution can be coarse. Saving target.py without changing it
+            # makes it newer than build.ninja.
+            now = time.time_ns()
+            set_mtime(build_dir / "target.py", now - 300 * 10 ** 9)
+            set_mtime(build_dir.parent.parent / "src", now - 300 * 10 ** 9)
+            set_mtime(build_dir / "build.ninja", now - 200 * 10 ** 9)
+            subprocess.run(["ninja", "-C", str(build_dir), "lib"], check=True, stdout=subprocess.DEVNULL)
+
+            set_mtime(build_dir / "target.py", now - 100 * 10 ** 9)
+            self.assertIn("Regenerating build.ninja", run_ninja_dry_run(build_dir))
+
+            # Aim finds nothing to change, and ninja doesn't run aim_regen for nothing either.
+            self.assertIsNone(run_generate(str(build_dir), [], update_ninja_log=True))
+            self.assertIn("no work to do", run_ninja_dry_run(build_dir))
+
+            # The same applies when build.ninja is generated again and comes out the same.
+            set_mtime(build_dir / "build.ninja", now - 200 * 10 ** 9)
+            subprocess.run(["ninja", "-C", str(build_dir), "-t", "restat"], check=True, stdout=subprocess.DEVNULL)
+            self.assertIn("Regenerating build.ninja", run_ninja_dry_run(build_dir))
+            self.assertIsNotNone(run_generate(str(build_dir), [], force_regen=True, update_ninja_log=True))
+            self.assertIn("no work to do", run_ninja_dry_run(build_dir))
@@ -0,0 +1,104 @@
+import argparse
+import io
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest import TestCase, skipUnless
+
+from ninja_syntax import Writer
+
+from aim_build import gccbuilds
+from aim_build import jobserver
+from aim_build.main import get_ninja_args, get_unique_target_paths, run_ninja, split_jobs, stream_lines
+
+# Every edge fails to make the lock directory if another edge is running at the same time.
+SERIAL_NINJA_FILE = """
+rule check
+  command = (mkdir lock || touch overlapped) && sleep 0.2 && rmdir lock; touch $out
+build a: check
+build b: check
+build c: check
+"""
+
+# Writes far more to stderr than a pipe can hold, before writing anything to stdout.
+NOISY_SCRIPT = """
+import sys
+for index in range(20000):
+    sys.stderr.write(f"warning {index}\\n")
+sys.stderr.flush()
+sys.stdout.write("done\\n")
+"""
+
+
+class TestRunNinja(TestCase):
+    def test_streams_are_read_concurrently(self):
+        lines = []
+        command = [sys.executable, "-c", NOISY_SCRIPT]
+        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+            stream_lines(process, lambda stream_name, line: lines.append((stream_name, line)))
+            self.assertEqual(process.wait(timeout=60), 0)
+
+        stderr_lines = [line for stream_name, line in lines if stream_name == "stderr"]
+        self.assertEqual(len(stderr_lines), 20000)
+        self.assertEqual(stderr_lines[0], b"warning 0\n")
+        self.assertEqual(stderr_lines[-1], b"warning 19999\n")
+        self.assertIn(("stdout", b"done\n"), lines)
+
+    @skipUnless(shutil.which("ninja"), "Requires ninja")
+    def test_return_code(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            (Path(tmp_dir) / "build.ninja").write_text("rule fail\n  command = exit 3\nbuild out: fail\n")
+
+            lines = []
+            ret_code = run_ninja(tmp_dir, ["out"], lambda stream_name, line: lines.append(line))
+            self.assertNotEqual(ret_code, 0)
+            self.assertIsNotNone(ret_code)
+            self.assertTrue(any(b"FAILED" in line for line in lines))
+
+            ret_code = run_ninja(tmp_dir, ["out"])
+            self.assertNotEqual(ret_code, 0)
+
+    def test_ninja_args(self):
+        args = argparse.Namespace(jobs=8, load_average=None, keep_going=0)
+        self.assertEqual(get_ninja_args(args), ["-j", "8", "-k", "0"])
+
+        args = argparse.Namespace(jobs=None, load_average=4.5, keep_going=None)
+        self.assertEqual(get_ninja_args(args), ["-l", "4.5"])
+
+    def test_split_jobs(self):
+        self.assertEqual(split_jobs(10, 3), [4, 3, 3])
+        self.assertEqual(split_jobs(2, 3), [1, 1, 1])
+
+        args = argparse.Namespace(jobs=None, load_average=None, keep_going=None)
+        self.assertEqual(get_ninja_args(args, 4), ["-j", "4"])
+
+        args = argparse.Namespace(jobs=8, load_average=None, keep_going=0)
+        self.assertEqual(get_ninja_args(args, include_jobs=False), ["-k", "0"])
+
+    def test_unique_target_paths(self):
+        self.assertEqual(get_unique_target_paths(["builds/a", "builds/b", "builds/./a", "builds/a/"]),
+                         ["builds/a", "builds/b"])
+
+    @skipUnless(jobserver.is_supported(), "Requires ninja 1.13 or later")
+    def test_job_server(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            (Path(tmp_dir) / "build.ninja").write_text(SERIAL_NINJA_FILE)
+
+            # The only client has a job of its own, so the pipe is empty and the edges run one at a time.
+            with jobserver.JobServer(1, 1) as job_server:
+                ret_code = run_ninja(tmp_dir, [], lambda *_: None, env=job_server.get_environment())
+
+            self.assertEqual(ret_code, 0)
+            self.assertTrue((Path(tmp_dir) / "c").exists())
+            self.assertFalse((Path(tmp_dir) / "overlapped").exists())
+
+    def test_link_pool(self):
+        writer = Writer(io.StringIO())
+        gccbuilds.add_exe(writer, "link_pool")
+        gccbuilds.add_shared(writer)
+
+        rules = writer.output.getvalue().split("rule ")
+        self.assertTrue("pool = link_pool" in rules[1])
+        self.assertFalse("pool" in rules[2])
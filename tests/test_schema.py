@@ -0,0 +1,80 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from aim_build.fssnapshot import FileSystemSnapshot
+from aim_build.schema import BuildsValidator
+
+
+def make_document(builds):
+    return {
+        "projectRoot": "../..",
+        "compilerFrontend": "gcc",
+        "compiler": "g++",
+        "archiver": "ar",
+        "builds": builds,
+    }
+
+
+class TestBuildsValidator(TestCase):
+    def validate(self, builds):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project_dir = Path(tmp_dir)
+            (project_dir / "src").mkdir()
+            (project_dir / "src" / "lib.cpp").write_text("")
+
+            document = make_document(builds)
+            return BuildsValidator(document, project_dir, set(), FileSystemSnapshot()).validate(document["builds"])
+
+    def test_valid_builds(self):
+        errors = self.validate([
+            {"name": "lib", "buildRule": "staticLibrary", "outputName": "Lib", "sourceFiles": ["src/*.cpp"]},
+            {"name": "app", "buildRule": "executable", "outputName": "App", "requires": ["lib"]},
+        ])
+        self.assertEqual(errors, {})
+
+    def test_field_errors(self):
+        errors = self.validate([
+            {"name": "lib", "buildRule": "staticLibrary", "outputName": "libLib.a", "linker": "ld"},
+            {"name": "lib", "buildRule": "headerOnly", "requires": ["missing"], "unknown": 1},
+            {"buildRule": "executable", "outputName": "App", "defines": [], "requires": ["missing"]},
+            "lib",
+        ])
+
+        self.assertEqual(errors[0], [{
+            "linker": ["depends on these values: {'buildRule': ['executable']}"],
+            "outputName": ['Naming convention errors: libLib.a. Unnecessary \'lib\' prefix in libLib.a. Aim will add '
+                           'this automatically. Unecessary suffix ".a". Aim will add this automatically.'],
+        }])
+        self.assertEqual(errors[1], [{
+            "name": ['The build name must be unique. "lib" has already been used.'],
+            "requires": [
+                "Build name does not exist: missing",
+                "depends on these values: {'buildRule': ['executable', 'staticLibrary', 'dynamicLibrary']}",
+            ],
+            "unknown": ["unknown field"],
+        }])
+        self.assertEqual(errors[2], [{
+            "name": ["required field"],
+            "defines": ["empty values not allowed"],
+            "requires": ["Build name does not exist: missing"],
+        }])
+        self.assertEqual(errors[3], ["must be of dict type"])
+
+    def test_build_rule_errors(self):
+        errors = self.validate([
+            {"name": "app", "buildRule": "executable"},
+            {"name": "lib", "buildRule": "staticLibrary", "outputName": "Lib", "sourceFiles": [1]},
+        ])
+
+        self.assertEqual(errors[0], [{
+            "buildRule": [
+                "none or more than one rule validate",
+                {
+                    "oneof definition 0": ["unallowed value executable"],
+                    "oneof definition 1": ["field 'outputName' is required"],
+                    "oneof definition 2": ["unallowed value executable", "field 'outputName' is required"],
+                },
+            ],
+        }])
+        self.assertEqual(errors[1], [{"sourceFiles": [{0: ["must be of string type"]}]}])
@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest import TestCase, skipIf
+
+# Modules that quick commands must not import. They are only needed by commands that validate or generate.
+FORBIDDEN_MODULES = [
+    "cerberus",
+    "ninja_syntax",
+    "tabulate",
+    "zipfile",
+    "concurrent.futures",
+    "aim_build.schema",
+    "aim_build.gccbuilds",
+    "aim_build.msvcbuilds",
+    "aim_build.objcache",
+]
+
+# The total time spent importing modules that a bare interpreter doesn't import, in microseconds. This is generous,
+# so the test doesn't fail on a slow machine, but it still catches a heavy import sneaking back in.
+IMPORT_TIME_BUDGET = 100000
+
+TARGET_FILE = """
+projectRoot = "../.."
+compilerFrontend = "gcc"
+compiler = "g++"
+archiver = "ar"
+
+builds = [
+    {
+        "name": "app",
+        "buildRule": "executable",
+        "outputName": "App",
+        "sourceFiles": ["src/*.cpp"],
+    },
+]
+"""
+
+
+def get_import_times(command, cwd=None):
+    # Each line of -X importtime output is: "import time: <self us> | <cumulative us> | <indented module name>".
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).parent.parent))
+    result = subprocess.run([sys.executable, "-X", "importtime"] + command,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE,
+                            universal_newlines=True,
+                            cwd=cwd,
+                            env=env)
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, _, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(self_time)
+
+    return result.returncode, times
+
+
+class TestStartup(TestCase):
+    def check_startup(self, command, cwd=None):
+        _, baseline = get_import_times(["-c", "pass"])
+        ret_code, times = get_import_times(["-m", "aim_build.main"] + command, cwd)
+        self.assertEqual(ret_code, 0)
+
+        for module in FORBIDDEN_MODULES:
+            self.assertNotIn(module, times)
+
+        import_time = sum(time for name, time in times.items() if name not in baseline)
+        self.assertLess(import_time, IMPORT_TIME_BUDGET)
+
+    def test_version(self):
+        self.check_startup(["version"])
+
+    @skipIf(sys.platform == "win32", "Uses a shell script as the executable")
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            build_dir = Path(tmp_dir) / "builds" / "linux"
+            (build_dir / "app").mkdir(parents=True)
+            (build_dir / "target.py").write_text(TARGET_FILE)
+
+            executable = build_dir / "app" / "App"
+            executable.write_text("#!/bin/sh\nexit 0\n")
+            executable.chmod(0o755)
+
+            self.check_startup(["run", "builds/linux", "app"], cwd=tmp_dir)
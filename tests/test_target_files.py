@@ -1,5 +1,5 @@
 from unittest import TestCase
-from aim_build.utils import to_native_path
+from aim_build.utils import to_native_path, to_str
 import aim_build.commonbuilds as commonbuilds
 from aim_build.typedefs import PurePathList
 from aim_build.gccbuilds import (
@@ -8,13 +8,17 @@ from aim_build.gccbuilds import (
     ToObjectFiles,
     prepend_paths,
     get_rpath,
+    add_compile_rule,
     get_external_libraries_information,
     PrefixLibrary,
     PrefixLibraryPath,
     linux_add_static_library_naming_convention,
     linux_add_dynamic_library_naming_convention
 )
+from ninja_syntax import Writer
 from pathlib import Path, PurePosixPath
+import io
+import os
 import tempfile
 
 global_target_file = {
@@ -191,7 +195,7 @@ class TestTargetFiles(TestCase):
             build_a = setup_build(global_target_file, "a", tmp_dir.name)
             paths = get_src_for_build(build_a, global_target_file)
 
-            obj_files = ToObjectFiles(paths)
+            obj_files = ToObjectFiles(paths, PurePosixPath(global_target_file["projectRoot"]))
             obj_files = prepend_paths(PurePosixPath(build_a["name"]), obj_files)
 
             self.assertEqual(len(paths), 2)
@@ -199,20 +203,143 @@ class TestTargetFiles(TestCase):
             self.assertTrue(find_str("../../a/src/file_1.cpp", paths))
 
             self.assertEqual(len(obj_files), 2)
-            self.assertTrue(find_str("a/file_0.o", obj_files))
-            self.assertTrue(find_str("a/file_1.o", obj_files))
+            self.assertTrue(find_str("a/obj/a/src/file_0.cpp.o", obj_files))
+            self.assertTrue(find_str("a/obj/a/src/file_1.cpp.o", obj_files))
 
             build_b = setup_build(global_target_file, "b", tmp_dir.name)
             paths = get_src_for_build(build_b, global_target_file)
 
-            obj_files = ToObjectFiles(paths)
+            obj_files = ToObjectFiles(paths, PurePosixPath(global_target_file["projectRoot"]))
             obj_files = prepend_paths(PurePosixPath(build_b["name"]), obj_files)
 
             self.assertEqual(len(paths), 1)
             self.assertTrue(find_str("../../b/src/file_0.c", paths))
 
             self.assertEqual(len(obj_files), 1)
-            self.assertTrue(find_str("b/file_0.o", obj_files))
+            self.assertTrue(find_str("b/obj/b/src/file_0.c.o", obj_files))
+
+    def test_unity_src_files(self):
+        tmp_dir = make_tmp_directory_structure()
+        with tmp_dir:
+            build_a = setup_build(global_target_file, "a", tmp_dir.name)
+            build = dict(build_a, unityBatchSize=2)
+            paths = get_src_for_build(build, global_target_file)
+
+            unity_files = commonbuilds.get_unity_src_files(build, global_target_file, to_str(paths))
+            self.assertEqual(unity_files, ["a/unity/unity_cpp_0.cpp"])
+
+            unity_path = Path(build["build_dir"]) / unity_files[0]
+            contents = unity_path.read_text()
+            self.assertTrue('#include "../../../../a/src/file_0.cpp"' in contents)
+            self.assertTrue('#include "../../../../a/src/file_1.cpp"' in contents)
+
+            # Unchanged unity files are not rewritten.
+            os.utime(str(unity_path), (0, 0))
+            commonbuilds.get_unity_src_files(build, global_target_file, to_str(paths))
+            self.assertEqual(unity_path.stat().st_mtime, 0)
+
+            # Excluded files are compiled on their own, and a batch of one is not worth a unity file.
+            build["unityExclude"] = ["file_0.cpp"]
+            unity_files = commonbuilds.get_unity_src_files(build, global_target_file, to_str(paths))
+            self.assertEqual(len(unity_files), 2)
+            self.assertTrue("../../a/src/file_0.cpp" in unity_files)
+            self.assertTrue("../../a/src/file_1.cpp" in unity_files)
+            self.assertFalse(unity_path.exists())
+
+    def test_precompiled_header(self):
+        target_file = {
+            "projectRoot": "../..",
+            "compiler": "g++",
+            "archiver": "ar",
+            "flags": ["-std=c++17"],
+            "builds": [
+                {
+                    "name": "app",
+                    "buildRule": "executable",
+                    "requires": ["lib"],
+                    "sourceFiles": ["a/src/*.cpp"],
+                    "precompiledHeader": "a/include/pch.h",
+                },
+                {
+                    "name": "lib",
+                    "buildRule": "staticLibrary",
+                    "sourceFiles": ["a/src/*.cpp"],
+                    "precompiledHeader": "a/include/pch.h",
+                },
+            ],
+        }
+
+        tmp_dir = make_tmp_directory_structure()
+        with tmp_dir:
+            lib = setup_build(target_file, "lib", tmp_dir.name)
+            app = setup_build(target_file, "app", tmp_dir.name)
+
+            writer = Writer(io.StringIO())
+            add_compile_rule(writer, lib, target_file, [])
+            pch_info = lib["precompiled_header"]
+            self.assertEqual(pch_info["header"], "../../a/include/pch.h")
+            self.assertEqual(pch_info["output"], "lib/pch/pch.h.gch")
+
+            ninja = writer.output.getvalue()
+            self.assertTrue("build lib/pch/pch.h.gch: pch lib/pch/pch.h | ../../a/include/pch.h" in ninja)
+
+            # The header is precompiled through a stub that includes it.
+            stub = (Path(lib["build_dir"]) / "lib" / "pch" / "pch.h").read_text()
+            self.assertEqual(stub, '#include "../../../../a/include/pch.h"\n')
+            self.assertTrue("language = c++-header" in ninja)
+            self.assertTrue('-include "lib/pch/pch.h"' in ninja)
+            # The precompiled header is an implicit dependency of both object files.
+            self.assertEqual(ninja.count("lib/pch/pch.h.gch"), 3)
+
+            # The app uses the same header, compiler, flags, defines and include paths, so it reuses the library's
+            # precompiled header.
+            writer = Writer(io.StringIO())
+            add_compile_rule(writer, app, target_file, [])
+            self.assertIs(app["precompiled_header"], pch_info)
+            self.assertFalse("pch.h.gch: pch" in writer.output.getvalue())
+
+            # Different include paths, defines or flags need a different precompiled header.
+            writer = Writer(io.StringIO())
+            add_compile_rule(writer, app, target_file, ['-I"../../a/include"'])
+            self.assertEqual(app["precompiled_header"]["output"], "app/pch/pch.h.gch")
+
+            app["defines"] = ["EnableFeature"]
+            writer = Writer(io.StringIO())
+            add_compile_rule(writer, app, target_file, [])
+            self.assertEqual(app["precompiled_header"]["output"], "app/pch/pch.h.gch")
+
+            del app["defines"]
+            app["flags"] = ["-std=c++20"]
+            writer = Writer(io.StringIO())
+            add_compile_rule(writer, app, target_file, [])
+            self.assertEqual(app["precompiled_header"]["output"], "app/pch/pch.h.gch")
+
+    def test_find_builds(self):
+        builds = global_target_file["builds"]
+
+        names = [build["name"] for build in commonbuilds.find_builds(["c", "[ab]", "a"], builds)]
+        self.assertEqual(names, ["c", "a", "b"])
+
+        # Globs and all only match builds that are built.
+        names = [build["name"] for build in commonbuilds.find_builds(["*"], builds)]
+        self.assertEqual(names, ["a", "b", "c"])
+        names = [build["name"] for build in commonbuilds.find_builds([], builds, all_builds=True)]
+        self.assertEqual(names, ["a", "b", "c"])
+
+        with self.assertRaises(RuntimeError) as context:
+            commonbuilds.find_builds(["x*"], builds)
+        self.assertEqual(context.exception.args[0], "Failed to find any builds matching: x*")
+
+    def test_object_file_collisions(self):
+        src_files = ["../../a/src/file_0.cpp", "../../a/src/file_0.cpp"]
+        obj_files = ["a/obj/a/src/file_0.cpp.o", "a/obj/a/src/file_0.cpp.o"]
+
+        with self.assertRaises(RuntimeError) as context:
+            commonbuilds.check_object_collisions("a", src_files, obj_files)
+
+        self.assertEqual(context.exception.args[0],
+                         'Object file collision in build "a": "../../a/src/file_0.cpp" and "../../a/src/file_0.cpp" '
+                         'both compile to "a/obj/a/src/file_0.cpp.o".')
 
     # Next we cover dynamic libraries.
     #
@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+from aim_build import phases, trace
+from aim_build.ninjalog import LogEntry
+
+
+class TestTrace(TestCase):
+    def test_slots(self):
+        entries = [
+            LogEntry(0, 100, "a/obj/0.o"),
+            LogEntry(0, 50, "a/obj/1.o"),
+            LogEntry(50, 150, "a/obj/2.o"),
+            LogEntry(100, 200, "a/app"),
+        ]
+
+        # A slot is reused as soon as its edge has finished.
+        self.assertEqual(trace.assign_slots(entries), [1, 0, 0, 1])
+
+    def test_trace(self):
+        the_phases = [
+            {"name": "generate ninja", "start": 100.0, "duration": 0.5},
+            {"name": "ninja", "start": 101.0, "duration": 1.0},
+        ]
+        the_trace = trace.make_trace(the_phases, [LogEntry(250, 1000, "a/app")])
+
+        events = [event for event in the_trace["traceEvents"] if event["ph"] == "X"]
+        self.assertEqual([(event["name"], event["ts"], event["dur"]) for event in events], [
+            ("generate ninja", 0, 500000),
+            ("ninja", 1000000, 1000000),
+            ("a/app", 1250000, 750000),
+        ])
+        self.assertEqual(events[2]["cat"], "a")
+
+    def test_phases(self):
+        phases.reset()
+        with phases.phase("validate"):
+            pass
+
+        recorded = phases.get_phases()
+        self.assertEqual([phase["name"] for phase in recorded], ["validate"])
+        self.assertGreaterEqual(recorded[0]["duration"], 0)
+        phases.reset()
+
+    def test_counts(self):
+        phases.reset_counts()
+        phases.count("source files", 2)
+        phases.count("source files", 3)
+
+        self.assertEqual(phases.get_counts(), {"source files": 5})
+        phases.reset_counts()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+from pathlib import Path, PurePosixPath, PureWindowsPath
+from unittest import TestCase, skipIf
+
+from aim_build.utils import src_to_o, src_to_obj, write_if_changed
+
+
+class TestWriteIfChanged(TestCase):
+    def test_writes_new_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "build.ninja"
+
+            self.assertTrue(write_if_changed(path, "rule compile\n"))
+            self.assertEqual(path.read_text(), "rule compile\n")
+
+    def test_unchanged_file_is_not_touched(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "build.ninja"
+            write_if_changed(path, "rule compile\n")
+
+            # Move the mtime into the past so any rewrite would be detected.
+            os.utime(str(path), (0, 0))
+
+            self.assertFalse(write_if_changed(path, b"rule compile\n"))
+            self.assertEqual(path.stat().st_mtime, 0)
+
+            self.assertTrue(write_if_changed(path, "rule archive\n"))
+            self.assertEqual(path.read_text(), "rule archive\n")
+            self.assertNotEqual(path.stat().st_mtime, 0)
+
+            # No temporary files are left behind.
+            self.assertEqual(os.listdir(tmp_dir), ["build.ninja"])
+
+    @skipIf(os.name != "posix", "File modes are only used on POSIX")
+    def test_file_mode_follows_the_umask(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "build.ninja"
+
+            umask = os.umask(0o027)
+            try:
+                write_if_changed(path, "rule compile\n")
+            finally:
+                os.umask(umask)
+
+            self.assertEqual(path.stat().st_mode & 0o777, 0o640)
+
+
+class TestObjectPaths(TestCase):
+    def test_object_paths_mirror_the_source_tree(self):
+        project_root = PurePosixPath("../..")
+        src_files = [PurePosixPath("../../net/util.cpp"), PurePosixPath("../../db/util.cpp")]
+
+        obj_files = [str(path) for path in src_to_o(src_files, project_root)]
+        self.assertEqual(obj_files, ["obj/net/util.cpp.o", "obj/db/util.cpp.o"])
+
+    def test_object_paths_outside_the_project_root(self):
+        project_root = PurePosixPath("../..")
+        src_files = [PurePosixPath("../../../shared/util.cpp"), PurePosixPath("/usr/src/util.cpp")]
+
+        obj_files = [str(path) for path in src_to_o(src_files, project_root)]
+        self.assertEqual(obj_files, ["obj/__/shared/util.cpp.o", "obj/usr/src/util.cpp.o"])
+
+    def test_windows_object_paths(self):
+        project_root = PureWindowsPath("..\\..")
+        src_files = [PureWindowsPath("..\\..\\net\\util.cpp"), PureWindowsPath("C:\\sdk\\util.cpp")]
+
+        obj_files = [str(path) for path in src_to_obj(src_files, project_root)]
+        self.assertEqual(obj_files, ["obj/net/util.cpp.obj", "obj/C/sdk/util.cpp.obj"])
@@ -0,0 +1,80 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from aim_build import validationcache
+from aim_build.fssnapshot import FileSystemSnapshot
+
+
+def make_project(root: Path):
+    (root / "src").mkdir()
+    (root / "include").mkdir()
+    (root / "src" / "main.cpp").write_text("int main() { return 0; }\n")
+
+    build_dir = root / "builds" / "linux"
+    build_dir.mkdir(parents=True)
+    return build_dir
+
+
+def make_document():
+    return {
+        "projectRoot": "../..",
+        "compilerFrontend": "gcc",
+        "compiler": "g++",
+        "archiver": "ar",
+        "builds": [
+            {
+                "name": "app",
+                "buildRule": "executable",
+                "outputName": "App",
+                "sourceFiles": ["src/*.cpp"],
+                "includePaths": ["include"],
+            },
+        ],
+    }
+
+
+class TestValidationCache(TestCase):
+    def test_cached_until_something_changes(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            build_dir = make_project(root)
+            document = make_document()
+
+            self.assertFalse(validationcache.validate_target(document, root, build_dir))
+            self.assertTrue(validationcache.validate_target(document, root, build_dir))
+
+            # Editing a source or adding a header doesn't affect the result of the validation.
+            (root / "src" / "main.cpp").write_text("int main() { return 1; }\n")
+            (root / "include" / "app.h").write_text("#pragma once\n")
+            self.assertTrue(validationcache.validate_target(document, root, build_dir))
+
+            self.assertFalse(validationcache.validate_target(document, root, build_dir, revalidate=True))
+            self.assertTrue(validationcache.validate_target(document, root, build_dir))
+
+            document["builds"][0]["outputName"] = "Application"
+            self.assertFalse(validationcache.validate_target(document, root, build_dir))
+            self.assertTrue(validationcache.validate_target(document, root, build_dir))
+
+    def test_touched_paths_invalidate_the_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            build_dir = make_project(root)
+            document = make_document()
+            validationcache.validate_target(document, root, build_dir)
+
+            key = validationcache.hash_document(document, root)
+            self.assertTrue(validationcache.is_cached(build_dir, key, FileSystemSnapshot()))
+
+            # Adding a file to a globbed directory changes its mtime. The mtime is set explicitly, as the resolution
+            # of directory mtimes can be coarse. Note, a snapshot only lasts for one run, so each check uses a new one.
+            (root / "src" / "util.cpp").write_text("")
+            os.utime(str(root / "src"), ns=(0, 0))
+            self.assertFalse(validationcache.is_cached(build_dir, key, FileSystemSnapshot()))
+
+            validationcache.validate_target(document, root, build_dir)
+            self.assertTrue(validationcache.is_cached(build_dir, key, FileSystemSnapshot()))
+
+            (root / "include").rmdir()
+            self.assertFalse(validationcache.is_cached(build_dir, key, FileSystemSnapshot()))
@@ -189,13 +189,13 @@ class TestTargetFiles(TestCase):
             self.assertTrue(find_str("..\\..\\a\\src\\file_0.cpp", paths))
             self.assertTrue(find_str("..\\..\\a\\src\\file_1.cpp", paths))
 
-            obj_files = ToObjectFiles(paths)
+            obj_files = ToObjectFiles(paths, PureWindowsPath(global_target_file["projectRoot"]))
             obj_files = prepend_paths(PureWindowsPath(build_a["name"]), obj_files)
             obj_files = convert_posix_to_windows(obj_files)
 
             self.assertEqual(len(obj_files), 2)
-            self.assertTrue(find_str("a\\file_0.obj", obj_files))
-            self.assertTrue(find_str("a\\file_1.obj", obj_files))
+            self.assertTrue(find_str("a\\obj\\a\\src\\file_0.cpp.obj", obj_files))
+            self.assertTrue(find_str("a\\obj\\a\\src\\file_1.cpp.obj", obj_files))
 
             build_b = setup_build(global_target_file, "b", tmp_dir.name)
             paths = get_src_for_build(build_b, global_target_file)
@@ -203,12 +203,12 @@ class TestTargetFiles(TestCase):
             self.assertEqual(len(paths), 1)
             self.assertTrue(find_str("..\\..\\b\\src\\file_0.c", paths))
 
-            obj_files = ToObjectFiles(paths)
+            obj_files = ToObjectFiles(paths, PureWindowsPath(global_target_file["projectRoot"]))
             obj_files = prepend_paths(PureWindowsPath(build_b["name"]), obj_files)
             obj_files = convert_posix_to_windows(obj_files)
 
             self.assertEqual(len(obj_files), 1)
-            self.assertTrue(find_str("b\\file_0.obj", obj_files))
+            self.assertTrue(find_str("b\\obj\\b\\src\\file_0.c.obj", obj_files))
 
     # Next we cover dynamic libraries.
     #